@@ -0,0 +1,215 @@
+"""
+BoardIQ — Address index for invoice building matching
+======================================================
+_match_building() maps the address (or building name) printed on an
+invoice to a building. It used to normalize and tokenize every building's
+address for every invoice — a 500-invoice upload against 300 buildings was
+150,000 normalizations — and to rescan BUILDINGS_DB for each name alias
+that hit. AddressIndex keeps each building's normalized address, leading
+street number and token set, plus
+
+  by number   street number -> buildings whose address starts with it
+  postings    token -> buildings whose address contains it
+  fragments   alias fragment -> buildings whose lowercased address contains it
+
+so match() scores only the buildings that can win: with a street number in
+the input, those with the same number (or none) that share a token with it;
+without one, those that share any token. The scoring is the full scan's:
+
+  score = common tokens / max(input tokens, address tokens), +0.3 if the
+          street numbers match; buildings with a different number skipped
+
+and above 0.4 the best wins. A building sharing no token scores at most
+0.3, so leaving it out never changes the result. Ties go to the building
+that comes first in BUILDINGS_DB; the index gives each building an
+insertion sequence number that follows the dict's order (a re-added key
+goes last, a replaced one keeps its place).
+
+The index follows BUILDINGS_DB through sync(), which app._note_building_change
+calls on every add, delete and tombstone. If the two ever differ in size
+(the dict replaced wholesale) match() rebuilds the index first.
+"""
+
+import re
+import threading
+
+_SPACES = re.compile(r'\s+')
+_CITY = re.compile(r',.*$')
+_OWNER_SUFFIX = re.compile(r'\b(CORP|INC|LLC|OWNERS?|CORPORATION)\b.*')
+_CARE_OF = re.compile(r'C/O.*$')
+_APT = re.compile(r'APT.*$')
+_NUMBER = re.compile(r'^(\d+)')
+
+
+def normalize_address(addr):
+    """Normalize an address string for fuzzy matching."""
+    if not addr:
+        return ""
+    addr = addr.upper().strip()
+    addr = _SPACES.sub(' ', addr)
+    addr = _CITY.sub('', addr)  # remove city/state
+    addr = addr.replace(' STREET', ' ST').replace(' AVENUE', ' AVE')
+    addr = addr.replace(' EAST ', ' E ').replace(' WEST ', ' W ')
+    addr = addr.replace(' NORTH ', ' N ').replace(' SOUTH ', ' S ')
+    addr = _OWNER_SUFFIX.sub('', addr)
+    addr = _CARE_OF.sub('', addr)
+    addr = _APT.sub('', addr)
+    addr = addr.strip()
+    return addr
+
+
+def street_number(norm):
+    m = _NUMBER.match(norm)
+    return m.group(1) if m else ""
+
+
+class _Entry:
+    __slots__ = ("seq", "building", "address", "lower", "norm", "number", "tokens")
+
+    def __init__(self, seq, building, address):
+        self.seq = seq
+        self.building = building
+        self.address = address
+        self.lower = address.lower()
+        self.norm = normalize_address(address)
+        self.number = street_number(self.norm)
+        self.tokens = frozenset(self.norm.split())
+
+
+class AddressIndex:
+    """Per-worker index of BUILDINGS_DB addresses for match()."""
+
+    def __init__(self, aliases=None):
+        # (name on invoices, fragment of the building's address), checked in order
+        self.aliases = list((aliases or {}).items())
+        self._lock = threading.Lock()
+        self._reset()
+        self.matches = 0
+        self.scored = 0
+        self.rebuilds = 0
+
+    def _reset(self):
+        self._entries = {}      # bbl -> _Entry
+        self._by_number = {}    # street number ("" = none) -> set of bbls
+        self._postings = {}     # token -> set of bbls
+        self._fragments = {fragment: set() for _alias, fragment in self.aliases}
+        self._next_seq = 0
+
+    # ── Writes ──
+
+    def rebuild(self, buildings):
+        """Re-index every building, in the dict's order."""
+        with self._lock:
+            self._rebuild(buildings)
+
+    def _rebuild(self, buildings):
+        # Called with _lock held
+        self._reset()
+        for bbl, building in list(buildings.items()):
+            self._put(bbl, building)
+        self.rebuilds += 1
+
+    def sync(self, bbl, buildings):
+        """Bring one key up to date with buildings (added, changed or gone)."""
+        building = buildings.get(bbl)
+        with self._lock:
+            if building is None:
+                self._remove(bbl)
+            else:
+                self._put(bbl, building)
+
+    def _put(self, bbl, building):
+        # Called with _lock held
+        address = building.get("address", "") or ""
+        old = self._entries.get(bbl)
+        if old is not None:
+            if old.building is building and old.address == address:
+                return
+            self._remove(bbl)
+            seq = old.seq
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+        entry = self._entries[bbl] = _Entry(seq, building, address)
+        if entry.norm:
+            self._by_number.setdefault(entry.number, set()).add(bbl)
+            for token in entry.tokens:
+                self._postings.setdefault(token, set()).add(bbl)
+        for fragment, hits in self._fragments.items():
+            if fragment in entry.lower:
+                hits.add(bbl)
+
+    def _remove(self, bbl):
+        # Called with _lock held
+        entry = self._entries.pop(bbl, None)
+        if entry is None:
+            return
+        if entry.norm:
+            _discard(self._by_number, entry.number, bbl)
+            for token in entry.tokens:
+                _discard(self._postings, token, bbl)
+        for hits in self._fragments.values():
+            hits.discard(bbl)
+
+    # ── Reads ──
+
+    def match(self, raw_address, buildings):
+        """(bbl, building, confidence) for a raw invoice address, or (None, None, 0)."""
+        if not raw_address:
+            return None, None, 0
+        with self._lock:
+            if len(self._entries) != len(buildings):
+                self._rebuild(buildings)
+            self.matches += 1
+            return self._match(raw_address)
+
+    def _match(self, raw_address):
+        # Called with _lock held
+        raw_lower = raw_address.lower().strip()
+        for alias, fragment in self.aliases:
+            if alias in raw_lower and self._fragments[fragment]:
+                bbl = min(self._fragments[fragment], key=lambda b: self._entries[b].seq)
+                return bbl, self._entries[bbl].building, 0.9
+
+        norm_input = normalize_address(raw_address)
+        if not norm_input or len(norm_input) < 5:
+            return None, None, 0
+        input_num = street_number(norm_input)
+        input_tokens = set(norm_input.split())
+
+        if input_num:
+            pool = self._by_number.get(input_num, set()) | self._by_number.get("", set())
+        else:
+            pool = set().union(*(self._postings.get(t, ()) for t in input_tokens))
+        entries = [(bbl, self._entries[bbl]) for bbl in pool]
+        entries.sort(key=lambda item: item[1].seq)
+        self.scored += len(entries)
+
+        best_bbl, best_entry, best_score = None, None, 0
+        for bbl, entry in entries:
+            common = input_tokens & entry.tokens
+            if not common:
+                continue
+            score = len(common) / max(len(input_tokens), len(entry.tokens))
+            if input_num and input_num == entry.number:
+                score += 0.3
+            if score > best_score:
+                best_bbl, best_entry, best_score = bbl, entry, score
+
+        if best_score > 0.4:
+            return best_bbl, best_entry.building, round(best_score, 2)
+        return None, None, 0
+
+    def stats(self):
+        with self._lock:
+            return {"buildings": len(self._entries), "tokens": len(self._postings),
+                    "street_numbers": len(self._by_number), "matches": self.matches,
+                    "candidates_scored": self.scored, "rebuilds": self.rebuilds}
+
+
+def _discard(index, key, bbl):
+    members = index.get(key)
+    if members is not None:
+        members.discard(bbl)
+        if not members:
+            del index[key]
@@ -25,21 +25,73 @@ import io
 import re
 import uuid
 import threading
+import time
 from datetime import datetime, timedelta
 from functools import wraps
+from collections import OrderedDict
+
+import numpy as np
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from flask import (Flask, render_template_string, request, jsonify,
+from flask import (Flask, render_template, request, jsonify,
                    session, redirect, url_for, flash)
+from jinja2 import FunctionLoader, FileSystemBytecodeCache
 from invoice_pipeline import InvoiceProcessor, create_sample_csv, CATEGORIES
-from benchmarking_engine import benchmark_building, NETWORK_BENCHMARKS
+from benchmarking_engine import (benchmark_building, benchmark_portfolio, network_peer_values, rebid_scenario,
+                                 peer_group_key, NETWORK_BENCHMARKS, PER_UNIT_CATEGORIES)
 from yardi_import import parse_yardi_expense_report, parse_multi_building_report
 import db as boardiq_db
+import write_behind
+import boot_snapshot
+import static_assets
+import compression
+import peer_stats
+import llm_dispatch
+import pdf_extract
+import parse_cache
+import jobs
+import classifier
+import address_index
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "boardiq-dev-key-change-in-production")
 
+
+# ── Inline page templates ──
+# The page templates are module-level strings (LOGIN_HTML, DASHBOARD_HTML, ...).
+# render_template_string re-parses and re-compiles the whole string on every
+# request; resolving them by name through a loader lets Jinja compile each one
+# once per worker and keep it in the environment's template cache.
+# _PAGE_TEMPLATES is filled at the end of this module, once every template is
+# defined, with their static CSS/JS moved out to /assets (static_assets.py).
+_PAGE_TEMPLATES = {}
+
+def _inline_template_source(name):
+    source = _PAGE_TEMPLATES.get(name)
+    if source is None:
+        return None
+    return source, None, lambda: True   # module strings never change at runtime
+
+app.jinja_loader = FunctionLoader(_inline_template_source)
+# Flask picks autoescaping by file extension and these names have none;
+# keep escaping on, as render_template_string did
+app.jinja_env.autoescape = True
+
+# Optional on-disk bytecode cache shared by all gunicorn workers, so only the
+# first worker after a deploy pays for compilation. Entries are keyed by
+# template name and checked against a hash of the source.
+_JINJA_CACHE_DIR = os.environ.get("BOARDIQ_JINJA_CACHE_DIR")
+if _JINJA_CACHE_DIR:
+    os.makedirs(_JINJA_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(_JINJA_CACHE_DIR, "boardiq-%s.cache")
+
+
+# ── Response compression (see compression.py) ──
+@app.after_request
+def _compress_response(response):
+    return compression.compress_response(response, request)
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  ACCESS REQUEST SYSTEM
 #  - Visitors request access via dropdown (no passwords exposed)
@@ -130,6 +182,26 @@ def _verify_invite_code(code, portal):
                 return False
     return False
 
+# ── Initialize database (PostgreSQL, or the local SQLite file) ──────────────
+_db_available = boardiq_db.init_db()
+
+# ── Boot snapshot (see boot_snapshot.py) ────────────────────────────────────
+# The merged building/vendor/contract state from the last boot that made no
+# writes. When it's still valid the loaders below take their values from it
+# instead of exec-loading the building files and querying the database.
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_BOOT_FINGERPRINT = boot_snapshot.fingerprint(
+    [os.path.join(_APP_DIR, f) for f in ("app.py", "century_buildings.py", "mrc_buildings.py")],
+    extra=(boardiq_db.BACKEND, boardiq_db.database_identity()))
+_BOOT_DATA_VERSION = boardiq_db.data_version()
+_BOOT_SNAPSHOT = boot_snapshot.load(_BOOT_FINGERPRINT, _BOOT_DATA_VERSION)
+
+def _boot_state(key, loader):
+    """Value for `key` from the boot snapshot if one was restored, else loader()."""
+    if _BOOT_SNAPSHOT is not None:
+        return _BOOT_SNAPSHOT[key]
+    return loader()
+
 # ── Load Century Management buildings from enriched database ─────────────────
 def _load_century_buildings():
     try:
@@ -145,7 +217,7 @@ def _load_century_buildings():
         print(f"[BoardIQ] Warning: Could not load century_buildings.py: {e}")
         return {}
 
-CENTURY_BUILDINGS = _load_century_buildings()
+CENTURY_BUILDINGS = _boot_state("century", _load_century_buildings)
 
 # ── Load Madison Realty Capital buildings ─────────────────────────────────────
 def _load_mrc_buildings():
@@ -162,32 +234,45 @@ def _load_mrc_buildings():
         print(f"[BoardIQ] Warning: Could not load mrc_buildings.py: {e}")
         return {}
 
-MRC_BUILDINGS = _load_mrc_buildings()
+MRC_BUILDINGS = _boot_state("mrc", _load_mrc_buildings)
 
-# ── User-added buildings (persisted to added_buildings.json) ────────────────
+def _load_legacy_json(path, label):
+    """Read a pre-SQLite JSON side file, if one is still lying around."""
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"[BoardIQ] Warning: Could not load {label}: {e}")
+    return None
+
+# ── User-added buildings (persisted in the added_buildings table) ───────────
 _ADDED_BUILDINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "added_buildings.json")
 
 def _load_added_buildings():
-    """Load user-added buildings from side JSON file. Returns {id: building_dict}."""
-    try:
-        if os.path.exists(_ADDED_BUILDINGS_PATH):
-            with open(_ADDED_BUILDINGS_PATH, "r") as f:
-                data = json.load(f)
-            print(f"[BoardIQ] Loaded {len(data)} user-added buildings")
-            return data
-    except Exception as e:
-        print(f"[BoardIQ] Warning: Could not load added_buildings.json: {e}")
+    """Load user-added buildings from the DB, importing a legacy added_buildings.json once."""
+    data = boardiq_db.load_added_buildings()
+    if data:
+        print(f"[BoardIQ] Loaded {len(data)} user-added buildings")
+        return data
+    legacy = _load_legacy_json(_ADDED_BUILDINGS_PATH, "added_buildings.json")
+    if isinstance(legacy, dict) and legacy:
+        boardiq_db.save_added_buildings(legacy)
+        print(f"[BoardIQ] Imported {len(legacy)} user-added buildings from added_buildings.json")
+        return legacy
     return {}
 
-def _save_added_buildings(added):
-    """Persist user-added buildings to side JSON file."""
-    try:
-        with open(_ADDED_BUILDINGS_PATH, "w") as f:
-            json.dump(added, f, indent=2, default=str)
-    except Exception as e:
-        print(f"[BoardIQ] Warning: Could not save added_buildings.json: {e}")
+def _persist_added_building(bbl):
+    """Upsert (or remove, if it's gone from ADDED_BUILDINGS) one added building."""
+    building = ADDED_BUILDINGS.get(bbl)
+    if building is None:
+        ok = boardiq_db.delete_added_buildings([bbl])
+    else:
+        ok = boardiq_db.save_added_buildings({bbl: building})
+    if not ok:
+        raise boardiq_db.WriteError(f"added building {bbl} not saved")
 
-ADDED_BUILDINGS = _load_added_buildings()
+ADDED_BUILDINGS = _boot_state("added", _load_added_buildings)
 
 # ── Tombstoned (user-deleted) building ids ──────────────────────────────────
 # MRC admins can delete seeded MRC buildings. We keep a tombstone list so the
@@ -197,76 +282,134 @@ _DELETED_BUILDINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)
 
 def _load_deleted_buildings():
     """Load the set of bbls that the user has explicitly deleted."""
-    try:
-        if os.path.exists(_DELETED_BUILDINGS_PATH):
-            with open(_DELETED_BUILDINGS_PATH, "r") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                print(f"[BoardIQ] Loaded {len(data)} tombstoned (deleted) building ids")
-                return set(data)
-    except Exception as e:
-        print(f"[BoardIQ] Warning: Could not load deleted_buildings.json: {e}")
-    return set()
-
-def _save_deleted_buildings(deleted):
-    """Persist the tombstone list."""
-    try:
-        with open(_DELETED_BUILDINGS_PATH, "w") as f:
-            json.dump(sorted(deleted), f, indent=2)
-    except Exception as e:
-        print(f"[BoardIQ] Warning: Could not save deleted_buildings.json: {e}")
-
-DELETED_BUILDINGS = _load_deleted_buildings()
-
-# ── Vendor data persistence (PostgreSQL with JSON file fallback) ─────────────
+    deleted = boardiq_db.load_deleted_buildings()
+    if not deleted:
+        legacy = _load_legacy_json(_DELETED_BUILDINGS_PATH, "deleted_buildings.json")
+        if isinstance(legacy, list) and legacy:
+            deleted = set(legacy)
+            boardiq_db.add_deleted_buildings(deleted)
+    if deleted:
+        print(f"[BoardIQ] Loaded {len(deleted)} tombstoned (deleted) building ids")
+    return deleted
+
+DELETED_BUILDINGS = _boot_state("deleted", _load_deleted_buildings)
+
+# ── Vendor data persistence (PostgreSQL or SQLite, see db.py) ────────────────
 _VENDOR_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor_data.json")
 
 def _load_persisted_vendor_data():
-    """Load committed vendor data from DB (or JSON fallback) and apply to BUILDINGS_DB."""
-    # Try PostgreSQL first
+    """Load committed vendor data from the DB and apply to BUILDINGS_DB.
+
+    A legacy vendor_data.json is imported (and written to the DB) only when
+    the DB has no vendor data yet.
+    """
     db_data = boardiq_db.load_all_vendor_data()
-    if db_data:
-        count = 0
-        for bbl, vendor_list in db_data.items():
-            if bbl in BUILDINGS_DB:
-                BUILDINGS_DB[bbl]["vendor_data"] = vendor_list
-                count += 1
-        print(f"[BoardIQ] Loaded persisted vendor data for {count} buildings from PostgreSQL")
-        return
-    # Fallback to JSON file
-    try:
-        if os.path.exists(_VENDOR_DATA_PATH):
-            with open(_VENDOR_DATA_PATH, "r") as f:
-                saved = json.load(f)
-            count = 0
-            for bbl, vendor_list in saved.items():
-                if bbl in BUILDINGS_DB:
-                    BUILDINGS_DB[bbl]["vendor_data"] = vendor_list
-                    count += 1
-            print(f"[BoardIQ] Loaded persisted vendor data for {count} buildings from JSON file")
-    except Exception as e:
-        print(f"[BoardIQ] Warning: Could not load vendor_data.json: {e}")
+    source = boardiq_db.BACKEND
+    if not db_data:
+        db_data = _load_legacy_json(_VENDOR_DATA_PATH, "vendor_data.json") or {}
+        source = "vendor_data.json"
+    count = 0
+    for bbl, vendor_list in db_data.items():
+        if bbl in BUILDINGS_DB:
+            BUILDINGS_DB[bbl]["vendor_data"] = vendor_list
+            count += 1
+            if source == "vendor_data.json":
+                _mark_vendor_data_dirty(bbl)
+    if count:
+        print(f"[BoardIQ] Loaded persisted vendor data for {count} buildings from {source}")
+    _save_vendor_data()
+
+# Buildings whose vendor_data changed since the last save. Commits mark the
+# buildings they touch so _save_vendor_data() only rewrites those rows.
+_DIRTY_VENDOR_BBLS = set()
+_dirty_vendor_lock = threading.Lock()
+
+def _building_keys(bbl):
+    """All BUILDINGS_DB keys that share the record for bbl (demo BBL + Century/MRC aliases)."""
+    nbbl = normalize_bbl(bbl)
+    keys = [nbbl]
+    for _src, _dst in BBL_NORMALIZE.items():
+        if _dst == nbbl and _src in BUILDINGS_DB:
+            keys.append(_src)
+    return keys
+
+def _mark_vendor_data_dirty(bbl):
+    """Flag a building (and its alias keys) for the next _save_vendor_data()."""
+    with _dirty_vendor_lock:
+        _DIRTY_VENDOR_BBLS.update(_building_keys(bbl))
 
 def _save_vendor_data():
-    """Persist all building vendor_data to DB (and JSON fallback)."""
-    # Save to PostgreSQL
-    boardiq_db.save_all_vendor_data(BUILDINGS_DB)
-    # Also save to JSON as fallback
+    """Persist vendor_data for buildings marked dirty since the last save.
+
+    Writes go to the DB as a single transaction of per-building upserts.
+    Without a database (BOARDIQ_SQLITE_PATH=off) this is a no-op. If the
+    write fails the buildings stay dirty, a write-behind retry is queued and
+    this returns False.
+    """
+    if _write_dirty_vendor_data():
+        return True
+    write_behind.submit("vendor_data", _vendor_data_job)
+    return False
+
+def _write_dirty_vendor_data():
+    with _dirty_vendor_lock:
+        dirty = set(_DIRTY_VENDOR_BBLS)
+        _DIRTY_VENDOR_BBLS.clear()
+    if not dirty or not boardiq_db.has_database():
+        return True
+    changes = {bbl: BUILDINGS_DB[bbl].get("vendor_data", []) for bbl in dirty if bbl in BUILDINGS_DB}
     try:
-        to_save = {}
-        for bbl, building in BUILDINGS_DB.items():
-            if building.get("vendor_data"):
-                to_save[bbl] = building["vendor_data"]
-        with open(_VENDOR_DATA_PATH, "w") as f:
-            json.dump(to_save, f)
-    except Exception:
-        pass
+        ok = boardiq_db.save_vendor_data_for_buildings(changes)
+    except boardiq_db.PoolTimeout as e:
+        print(f"[BoardIQ] Vendor data save deferred: {e}")
+        ok = False
+    if not ok:
+        # Keep them dirty so the next save retries
+        with _dirty_vendor_lock:
+            _DIRTY_VENDOR_BBLS.update(dirty)
+    return ok
+
+def _vendor_data_job():
+    """Write-behind job for vendor_data; raises so the queue retries a failed save."""
+    if not _write_dirty_vendor_data():
+        raise boardiq_db.WriteError("vendor data not saved")
 
 def _save_building_vendor_data(bbl):
     """Persist vendor_data for a single building to DB."""
-    building = BUILDINGS_DB.get(bbl)
-    if building:
-        boardiq_db.save_building_vendor_data(bbl, building.get("vendor_data", []))
+    _mark_vendor_data_dirty(bbl)
+    _save_vendor_data()
+
+# ── Write-behind persistence (see write_behind.py) ──────────────────────────
+# Request handlers queue their writes and return; jobs read current state
+# when they run, so keys coalesce repeated edits between flushes.
+
+def _queue_vendor_data_save(bbl):
+    _mark_vendor_data_dirty(bbl)
+    write_behind.submit("vendor_data", _vendor_data_job)
+
+def _queue_contract_save(contract_id):
+    def _write():
+        contract = BUILDING_CONTRACTS.get(contract_id)
+        if contract is not None and not boardiq_db.save_contract(contract_id, contract):
+            raise boardiq_db.WriteError(f"contract {contract_id} not saved")
+    write_behind.submit(("contract", contract_id), _write)
+
+def _queue_added_building_save(bbl):
+    write_behind.submit(("added_building", bbl), _persist_added_building, bbl)
+
+def _queue_tombstones(bbls):
+    bbls = sorted(bbls)
+    def _write():
+        if not boardiq_db.add_deleted_buildings(bbls):
+            raise boardiq_db.WriteError(f"{len(bbls)} tombstones not saved")
+    write_behind.submit(("tombstone", tuple(bbls)), _write)
+
+def _durable_ack():
+    """Honour ?durable=1 by waiting for queued writes. True once they're on disk/DB;
+    False on timeout or if any of them failed for good."""
+    if request.args.get("durable") in ("1", "true"):
+        return write_behind.flush(timeout=30)
+    return False
 
 # ── In-memory database (swap for PostgreSQL in production) ───────────────────
 BUILDINGS_DB = {
@@ -586,16 +729,22 @@ _DEMO_ADDR_TO_BBL = {_norm_addr(b.get("address", "")): k for k, b in BUILDINGS_D
 
 # BBL_NORMALIZE: maps any Century key to its demo BBL equivalent (if one exists)
 BBL_NORMALIZE = {}
-for _ckey, _cbldg in CENTURY_BUILDINGS.items():
-    _caddr = _norm_addr(_cbldg.get("address", ""))
-    if _caddr in _DEMO_ADDR_TO_BBL:
-        BBL_NORMALIZE[_ckey] = _DEMO_ADDR_TO_BBL[_caddr]
-    else:
-        BUILDINGS_DB[_ckey] = _cbldg
+if _BOOT_SNAPSHOT is not None:
+    # Already merged (Century, MRC, added, tombstones, vendor data); the
+    # snapshot's building dicts are shared with CENTURY/MRC/ADDED_BUILDINGS
+    BUILDINGS_DB = _BOOT_SNAPSHOT["buildings"]
+    BBL_NORMALIZE = _BOOT_SNAPSHOT["bbl_normalize"]
+else:
+    for _ckey, _cbldg in CENTURY_BUILDINGS.items():
+        _caddr = _norm_addr(_cbldg.get("address", ""))
+        if _caddr in _DEMO_ADDR_TO_BBL:
+            BBL_NORMALIZE[_ckey] = _DEMO_ADDR_TO_BBL[_caddr]
+        else:
+            BUILDINGS_DB[_ckey] = _cbldg
 
-# Also add Century keys that map to demo buildings, so /switch-building/bldg_004 works
-for _ckey, _demo_bbl in BBL_NORMALIZE.items():
-    BUILDINGS_DB[_ckey] = BUILDINGS_DB[_demo_bbl]
+    # Also add Century keys that map to demo buildings, so /switch-building/bldg_004 works
+    for _ckey, _demo_bbl in BBL_NORMALIZE.items():
+        BUILDINGS_DB[_ckey] = BUILDINGS_DB[_demo_bbl]
 
 def normalize_bbl(bbl):
     """If a Century key has a demo equivalent, return the demo BBL."""
@@ -615,28 +764,30 @@ if BBL_NORMALIZE:
         print(f"  {_c} → {_d}")
 
 # ── Merge MRC buildings into main DB ─────────────────────────────────────────
-for _mkey, _mbldg in MRC_BUILDINGS.items():
-    _maddr = _norm_addr(_mbldg.get("address", ""))
-    if _maddr in _DEMO_ADDR_TO_BBL:
-        BBL_NORMALIZE[_mkey] = _DEMO_ADDR_TO_BBL[_maddr]
-    else:
-        BUILDINGS_DB[_mkey] = _mbldg
+if _BOOT_SNAPSHOT is None:
+    for _mkey, _mbldg in MRC_BUILDINGS.items():
+        _maddr = _norm_addr(_mbldg.get("address", ""))
+        if _maddr in _DEMO_ADDR_TO_BBL:
+            BBL_NORMALIZE[_mkey] = _DEMO_ADDR_TO_BBL[_maddr]
+        else:
+            BUILDINGS_DB[_mkey] = _mbldg
 
-# Also add MRC keys that map to demo buildings
-for _mkey, _demo_bbl in list(BBL_NORMALIZE.items()):
-    if _mkey.startswith("mrc_"):
-        BUILDINGS_DB[_mkey] = BUILDINGS_DB[_demo_bbl]
+    # Also add MRC keys that map to demo buildings
+    for _mkey, _demo_bbl in list(BBL_NORMALIZE.items()):
+        if _mkey.startswith("mrc_"):
+            BUILDINGS_DB[_mkey] = BUILDINGS_DB[_demo_bbl]
 
 print(f"[BoardIQ] Merged MRC buildings ({len(MRC_BUILDINGS)} total)")
 
 # ── Merge user-added buildings into main DB ─────────────────────────────────
-for _akey, _abldg in ADDED_BUILDINGS.items():
-    BUILDINGS_DB[_akey] = _abldg
+if _BOOT_SNAPSHOT is None:
+    for _akey, _abldg in ADDED_BUILDINGS.items():
+        BUILDINGS_DB[_akey] = _abldg
 if ADDED_BUILDINGS:
     print(f"[BoardIQ] Merged {len(ADDED_BUILDINGS)} user-added buildings")
 
 # ── Apply delete tombstones (user-deleted MRC seed buildings) ────────────────
-if DELETED_BUILDINGS:
+if DELETED_BUILDINGS and _BOOT_SNAPSHOT is None:
     _tomb_removed = 0
     for _tbbl in list(DELETED_BUILDINGS):
         if _tbbl in BUILDINGS_DB:
@@ -648,11 +799,11 @@ if DELETED_BUILDINGS:
     if _tomb_removed:
         print(f"[BoardIQ] Suppressed {_tomb_removed} deleted buildings via tombstone list")
     # Persist the ADDED_BUILDINGS cleanup
-    _save_added_buildings(ADDED_BUILDINGS)
+    boardiq_db.delete_added_buildings(DELETED_BUILDINGS)
 
-# ── Initialize database and load persisted data ─────────────────────────────
-_db_available = boardiq_db.init_db()
-_load_persisted_vendor_data()
+# ── Load persisted vendor data ──────────────────────────────────────────────
+if _BOOT_SNAPSHOT is None:
+    _load_persisted_vendor_data()
 
 # ── Auth (simple demo auth — swap for real auth in production) ───────────────
 DEMO_USERS = {
@@ -853,15 +1004,80 @@ VENDOR_BIDS = {
     },
 }
 
+# Secondary indexes over VENDOR_BIDS so BidBoard lookups don't scan every bid.
+# Always add/change/remove bids through _store_bids / _remove_bid.
+_BIDS_BY_VENDOR = {}     # vendor_id -> {bid_id}
+_BIDS_BY_BUILDING = {}   # building_bbl -> {bid_id}
+_BIDS_BY_REQUEST = {}    # bid_request_id -> {bid_id}
+_BID_INDEX_KEYS = {}     # bid_id -> (vendor_id, building_bbl, bid_request_id) as indexed
+_bid_index_lock = threading.RLock()
+
+def _unindex_bid(bid_id):
+    keys = _BID_INDEX_KEYS.pop(bid_id, None)
+    if keys is None:
+        return
+    for index, key in zip((_BIDS_BY_VENDOR, _BIDS_BY_BUILDING, _BIDS_BY_REQUEST), keys):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(bid_id)
+            if not ids:
+                del index[key]
+
+def _index_bid(bid):
+    with _bid_index_lock:
+        _unindex_bid(bid["bid_id"])
+        keys = (bid.get("vendor_id"), bid.get("building_bbl"), bid.get("bid_request_id"))
+        _BID_INDEX_KEYS[bid["bid_id"]] = keys
+        for index, key in zip((_BIDS_BY_VENDOR, _BIDS_BY_BUILDING, _BIDS_BY_REQUEST), keys):
+            if key is not None:
+                index.setdefault(key, set()).add(bid["bid_id"])
+
+def _store_bids(*bids, persist=True):
+    """Insert or re-index bids after a change and persist them in one write."""
+    for bid in bids:
+        VENDOR_BIDS[bid["bid_id"]] = bid
+        _index_bid(bid)
+    if persist:
+        boardiq_db.save_vendor_bids({b["bid_id"]: b for b in bids})
+
+def _remove_bid(bid_id, persist=True):
+    with _bid_index_lock:
+        VENDOR_BIDS.pop(bid_id, None)
+        _unindex_bid(bid_id)
+    if persist:
+        boardiq_db.delete_vendor_bid(bid_id)
+
+def _bids_in(index, key):
+    with _bid_index_lock:
+        ids = sorted(index.get(key, ()))
+    return [VENDOR_BIDS[b] for b in ids if b in VENDOR_BIDS]
+
 def _next_bid_id():
     existing = [int(k[1:]) for k in VENDOR_BIDS if k.startswith("b") and k[1:].isdigit()]
-    return f"b{(max(existing) + 1) if existing else 1:03d}"
+    n = (max(existing) + 1) if existing else 1
+    # The DB counter keeps two workers from minting the same id
+    n = boardiq_db.next_id("vendor_bid", n) or n
+    return f"b{n:03d}"
 
 def _get_vendor_bids(vendor_id):
-    return [b for b in VENDOR_BIDS.values() if b["vendor_id"] == vendor_id]
+    return _bids_in(_BIDS_BY_VENDOR, vendor_id)
 
 def _get_bids_for_building(bbl):
-    return [b for b in VENDOR_BIDS.values() if b["building_bbl"] == bbl]
+    return _bids_in(_BIDS_BY_BUILDING, bbl)
+
+def _get_bids_for_request(request_id):
+    return _bids_in(_BIDS_BY_REQUEST, request_id)
+
+# ── Load bids from DB (DB is authoritative once seeded, so withdrawals stick) ─
+_db_bids = _boot_state("vendor_bids", boardiq_db.load_all_vendor_bids)
+if _db_bids:
+    VENDOR_BIDS.clear()
+    VENDOR_BIDS.update(_db_bids)
+elif _db_available:
+    boardiq_db.save_all_vendor_bids(VENDOR_BIDS)
+    print("[BoardIQ] Seeded vendor bids into the database")
+for _bid in VENDOR_BIDS.values():
+    _index_bid(_bid)
 
 # ── Bid Requests (Compliance / Contract → Vendor Opportunities) ──────────────
 
@@ -941,19 +1157,52 @@ BID_REQUESTS = {
     },
 }
 
+_BID_REQUESTS_BY_BUILDING = {}  # building_bbl -> [request_id, ...] in creation order
+
+def _store_bid_request(br, persist=True):
+    """Insert or update a bid request, keep the building index current and persist it."""
+    rid = br["request_id"]
+    old = BID_REQUESTS.get(rid)
+    if old is not None and old.get("building_bbl") != br.get("building_bbl"):
+        ids = _BID_REQUESTS_BY_BUILDING.get(old.get("building_bbl"), [])
+        if rid in ids:
+            ids.remove(rid)
+    BID_REQUESTS[rid] = br
+    ids = _BID_REQUESTS_BY_BUILDING.setdefault(br.get("building_bbl"), [])
+    if rid not in ids:
+        ids.append(rid)
+    if persist:
+        boardiq_db.save_bid_request(rid, br)
+
 def _next_bid_request_id():
     existing = [int(k[2:]) for k in BID_REQUESTS if k.startswith("br") and k[2:].isdigit()]
-    return f"br{(max(existing) + 1) if existing else 1:03d}"
+    n = (max(existing) + 1) if existing else 1
+    n = boardiq_db.next_id("bid_request", n) or n
+    return f"br{n:03d}"
 
 def _get_bid_requests_for_building(bbl):
     nbbl = normalize_bbl(bbl)
-    return [br for br in BID_REQUESTS.values() if br["building_bbl"] == nbbl or br["building_bbl"] == bbl]
+    rids = list(_BID_REQUESTS_BY_BUILDING.get(nbbl, []))
+    if bbl != nbbl:
+        rids += _BID_REQUESTS_BY_BUILDING.get(bbl, [])
+    return [BID_REQUESTS[r] for r in rids if r in BID_REQUESTS]
 
 def _get_open_requests_for_category(category):
     return [br for br in BID_REQUESTS.values() if br["status"] == "open" and br["category"] == category]
 
 def _count_bids_for_request(request_id):
-    return len([b for b in VENDOR_BIDS.values() if b.get("bid_request_id") == request_id])
+    with _bid_index_lock:
+        return len(_BIDS_BY_REQUEST.get(request_id, ()))
+
+_db_bid_requests = _boot_state("bid_requests", boardiq_db.load_all_bid_requests)
+if _db_bid_requests:
+    BID_REQUESTS.clear()
+    BID_REQUESTS.update(_db_bid_requests)
+elif _db_available:
+    boardiq_db.save_all_bid_requests(BID_REQUESTS)
+    print("[BoardIQ] Seeded bid requests into the database")
+for _br in list(BID_REQUESTS.values()):
+    _store_bid_request(_br, persist=False)
 
 def _get_eligible_vendor_count(category):
     return len([v for v in VENDOR_PROFILES.values() if category in v.get("categories", [])])
@@ -1204,21 +1453,21 @@ for _cid, _contract in BUILDING_CONTRACTS.items():
         _contract["vendor_id"] = _auto_link_contract_vendor(_contract)
 
 # ── Load vendor profiles from DB (merge over defaults, DB wins) ──────────────
-_db_profiles = boardiq_db.load_all_vendor_profiles()
+_db_profiles = _boot_state("vendor_profiles", boardiq_db.load_all_vendor_profiles)
 if _db_profiles:
     VENDOR_PROFILES.update(_db_profiles)
 elif _db_available:
     # First deploy: seed DB with the hardcoded demo profiles
     boardiq_db.save_all_vendor_profiles(VENDOR_PROFILES)
-    print("[BoardIQ] Seeded vendor profiles into PostgreSQL")
+    print("[BoardIQ] Seeded vendor profiles into the database")
 
 # Also seed vendor_data into DB on first deploy if DB is empty
 if _db_available and not _db_profiles:
     boardiq_db.save_all_vendor_data(BUILDINGS_DB)
-    print("[BoardIQ] Seeded building vendor data into PostgreSQL")
+    print("[BoardIQ] Seeded building vendor data into the database")
 
 # ── Load contracts from DB (merge over seed data, DB wins) ──────────────────
-_db_contracts = boardiq_db.load_all_contracts()
+_db_contracts = _boot_state("contracts", boardiq_db.load_all_contracts)
 if _db_contracts:
     # Normalize any Century BBLs to demo BBLs so board members can see them
     for _cid, _ct in _db_contracts.items():
@@ -1230,11 +1479,75 @@ if _db_contracts:
             # Also update in DB so this only happens once
             boardiq_db.save_contract(_cid, _ct)
     BUILDING_CONTRACTS.update(_db_contracts)
-    print(f"[BoardIQ] Loaded {len(_db_contracts)} contracts from PostgreSQL")
+    print(f"[BoardIQ] Loaded {len(_db_contracts)} contracts from the database")
 elif _db_available:
     # First deploy: seed DB with hardcoded demo contracts
     boardiq_db.save_all_contracts(BUILDING_CONTRACTS)
-    print("[BoardIQ] Seeded contracts into PostgreSQL")
+    print("[BoardIQ] Seeded contracts into the database")
+
+# ── Cross-worker coherence: reload rows other workers changed ───────────────
+def _apply_remote_change(kind, keys):
+    """Handle a change notification from another gunicorn worker (see db.start_change_listener)."""
+    if kind == "vendor_data":
+        if keys is None:
+            _load_persisted_vendor_data()
+            _rebuild_peer_stats()
+            return
+        for bbl, vendor_list in boardiq_db.load_vendor_data_for_buildings(keys).items():
+            if bbl in BUILDINGS_DB:
+                BUILDINGS_DB[bbl]["vendor_data"] = vendor_list
+                _note_building_change(bbl)
+    elif kind == "contract":
+        fresh = boardiq_db.load_all_contracts() if keys is None else boardiq_db.load_contracts(keys)
+        for cid, ct in fresh.items():
+            ct["building_bbl"] = normalize_bbl(ct.get("building_bbl", ""))
+            BUILDING_CONTRACTS[cid] = ct
+    elif kind == "vendor_profile":
+        fresh = boardiq_db.load_all_vendor_profiles() if keys is None else boardiq_db.load_vendor_profiles(keys)
+        VENDOR_PROFILES.update(fresh)
+    elif kind == "vendor_registry":
+        fresh = boardiq_db.load_all_vendor_registry() if keys is None else boardiq_db.load_vendor_registry_entries(keys)
+        VENDOR_REGISTRY.update(fresh)
+    elif kind == "vendor_bid":
+        fresh = boardiq_db.load_all_vendor_bids() if keys is None else boardiq_db.load_vendor_bids(keys)
+        for bid_id in (keys if keys is not None else list(VENDOR_BIDS)):
+            if bid_id not in fresh:
+                _remove_bid(bid_id, persist=False)
+        _store_bids(*fresh.values(), persist=False)
+    elif kind == "bid_request":
+        fresh = boardiq_db.load_all_bid_requests() if keys is None else boardiq_db.load_bid_requests(keys)
+        for br in fresh.values():
+            _store_bid_request(br, persist=False)
+    elif kind == "added_building":
+        # Rows only disappear when the building is deleted, which also
+        # tombstones it; the deleted_building branch takes it out
+        fresh = boardiq_db.load_added_buildings(keys)
+        vendor_data = boardiq_db.load_vendor_data_for_buildings(list(fresh)) if fresh else {}
+        mrc_user = DEMO_USERS.get("mrc@boardiq.com")
+        for bbl, building in fresh.items():
+            if bbl in vendor_data:
+                building["vendor_data"] = vendor_data[bbl]
+            BUILDINGS_DB[bbl] = ADDED_BUILDINGS[bbl] = building
+            _note_building_change(bbl)
+            if mrc_user and bbl not in mrc_user["buildings"]:
+                mrc_user["buildings"].append(bbl)
+    elif kind == "deleted_building":
+        tombstoned = boardiq_db.load_deleted_buildings()
+        if keys is not None:
+            tombstoned &= set(keys)
+        for bbl in tombstoned:
+            DELETED_BUILDINGS.add(bbl)
+            ADDED_BUILDINGS.pop(bbl, None)
+            if BUILDINGS_DB.pop(bbl, None) is not None:
+                _note_building_change(bbl)
+        for _src, _dst in list(BBL_NORMALIZE.items()):
+            if _src in tombstoned or _dst in tombstoned:
+                BBL_NORMALIZE.pop(_src, None)
+        mrc_user = DEMO_USERS.get("mrc@boardiq.com")
+        if mrc_user and tombstoned:
+            mrc_user["buildings"] = [x for x in mrc_user["buildings"] if x not in tombstoned]
+
+boardiq_db.start_change_listener(_apply_remote_change)
 
 # Map: management company name → list of building BBLs
 MANAGEMENT_CO_BUILDINGS = {
@@ -1323,8 +1636,8 @@ _CATEGORY_TO_BENCHMARK = {
     "FACADE_REPAIRS": "ROOFING",
 }
 
-def compute_benchmarks(building):
-    """Compute live benchmark scores for a building's vendor data."""
+def _benchmark_inputs(building):
+    """(vendor summary keyed vendor::category, last bid year by category, peer group key)."""
     vendor_flat = {}
     for v in building.get("vendor_data", []):
         raw_cat = v["category"]
@@ -1338,16 +1651,190 @@ def compute_benchmarks(building):
         }
     last_bids = {_CATEGORY_TO_BENCHMARK.get(v["category"], v["category"]): v["last_bid_year"]
                  for v in building.get("vendor_data", []) if v.get("last_bid_year")}
+    group = peer_group_key(building["units"], building.get("neighborhood", ""),
+                           building.get("borough", "Manhattan"), _is_prewar(building),
+                           building.get("building_type", "Coop"))
+    return vendor_flat, last_bids, group
+
+def _is_prewar(building):
+    return building.get("is_prewar", building.get("year_built", 1960) < 1940)
+
+def _compute_benchmarks(building):
+    vendor_flat, last_bids, _group = _benchmark_inputs(building)
     return benchmark_building(
         vendor_flat,
         units=building["units"],
         last_bid_years=last_bids,
         neighborhood=building.get("neighborhood", ""),
         borough=building.get("borough", "Manhattan"),
-        is_prewar=building.get("is_prewar", building.get("year_built", 1960) < 1940),
+        is_prewar=_is_prewar(building),
         building_type=building.get("building_type", "Coop"),
+        peer_stats=NETWORK_PEER_STATS,
     )
 
+def compute_benchmarks(building, bbl=None):
+    """Compute live benchmark scores for a building's vendor data.
+
+    With a bbl the result comes from the benchmark cache while the building's
+    data, its peer distributions and the calendar year are unchanged. Cached
+    results are shared between requests: treat them as read-only.
+    """
+    if bbl is None or BENCHMARK_CACHE_SIZE <= 0:
+        return _compute_benchmarks(building)
+    key = normalize_bbl(bbl)
+    try:
+        group = peer_group_key(building["units"], building.get("neighborhood", ""),
+                               building.get("borough", "Manhattan"), _is_prewar(building),
+                               building.get("building_type", "Coop"))
+    except (KeyError, TypeError):
+        return _compute_benchmarks(building)
+    # Read the stamp before computing: a write that lands mid-computation
+    # leaves the entry stale-stamped, so the next call recomputes
+    stamp = (_BUILDING_VERSIONS.get(key, 0), NETWORK_PEER_STATS.version(group), datetime.now().year)
+    with _benchmark_cache_lock:
+        entry = _BENCHMARK_CACHE.get(key)
+        if entry is not None and entry[0] == stamp and entry[1] is building:
+            _BENCHMARK_CACHE.move_to_end(key)
+            _benchmark_cache_stats["hits"] += 1
+            return entry[2]
+        _benchmark_cache_stats["misses"] += 1
+    result = _compute_benchmarks(building)
+    with _benchmark_cache_lock:
+        _BENCHMARK_CACHE[key] = (stamp, building, result)
+        _BENCHMARK_CACHE.move_to_end(key)
+        while len(_BENCHMARK_CACHE) > BENCHMARK_CACHE_SIZE:
+            _BENCHMARK_CACHE.popitem(last=False)
+            _benchmark_cache_stats["evictions"] += 1
+    return result
+
+
+# ── Invoice address index (see address_index.py) ─────────────────────────────
+# Building names used on invoices → a fragment of the matching building's
+# lowercased address; checked in order before address matching. _note_building_change() keeps the index in step with BUILDINGS_DB.
+BUILDING_NAME_ALIASES = {
+    "bleecker court": "77 bleecker",
+    "77 bleecker": "77 bleecker",
+    "century operating corp": "77 bleecker",
+    "77 bleecker st. corp": "77 bleecker",
+    "77 bleecker street corp": "77 bleecker",
+    "the hopkins condominium": "172 west 79",
+    "hopkins condo": "172 west 79",
+    "172 west 79th street": "172 west 79",
+    "130 east 18th owners corp": "130 east 18",
+    "130 east 18th": "130 east 18",
+    "444 east 86th street": "444 east 86",
+    "444 east 86": "444 east 86",
+    "33 east 74th street": "33 east 74",
+}
+ADDRESS_INDEX = address_index.AddressIndex(BUILDING_NAME_ALIASES)
+ADDRESS_INDEX.rebuild(BUILDINGS_DB)
+
+
+# ── Benchmark result cache ──────────────────────────────────────────────────
+# Benchmarks only change when a building's vendor data or profile does, or when
+# a write elsewhere shifts its peer distributions. Each building carries a data
+# version (keyed by normalized BBL, like the peer stats); writers call
+# _note_building_change() after changing a building, which bumps it and
+# refreshes the building's peer-stats contribution. The cache is per worker;
+# remote changes arrive through _apply_remote_change like any other write.
+BENCHMARK_CACHE_SIZE = int(os.environ.get("BOARDIQ_BENCHMARK_CACHE_SIZE", "512"))
+_BUILDING_VERSIONS = {}            # normalized BBL -> data version
+_BENCHMARK_CACHE = OrderedDict()   # normalized BBL -> (stamp, building, result), LRU order
+_benchmark_cache_lock = threading.Lock()
+_benchmark_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+def _note_building_change(bbl):
+    """Invalidate a building's cached benchmarks and refresh its peer stats
+    and address index entry."""
+    ADDRESS_INDEX.sync(bbl, BUILDINGS_DB)
+    key = normalize_bbl(bbl)
+    with _benchmark_cache_lock:
+        _BUILDING_VERSIONS[key] = _BUILDING_VERSIONS.get(key, 0) + 1
+        _BENCHMARK_CACHE.pop(key, None)
+        _benchmark_cache_stats["invalidations"] += 1
+    _refresh_peer_stats(bbl)
+
+def _benchmark_cache_metrics():
+    with _benchmark_cache_lock:
+        return dict(_benchmark_cache_stats, entries=len(_BENCHMARK_CACHE), max_entries=BENCHMARK_CACHE_SIZE)
+
+
+# ── Network peer statistics (see peer_stats.py) ─────────────────────────────
+# Every building's benchmark-mapped per-unit spend feeds the peer
+# distributions. Alias keys share a record, so buildings are tracked by their
+# normalized BBL; writers go through _note_building_change() after changing vendor_data.
+NETWORK_PEER_STATS = peer_stats.PeerStatsStore()
+
+def _refresh_peer_stats(bbl):
+    """Swap one building's contribution to the peer distributions for its current data."""
+    building = BUILDINGS_DB.get(bbl)
+    if building is None:
+        NETWORK_PEER_STATS.remove_building(normalize_bbl(bbl))
+        return
+    try:
+        vendor_flat, _last_bids, group = _benchmark_inputs(building)
+    except (KeyError, TypeError):
+        return   # no units on record: can't place it in a peer group
+    values = {}
+    for v in vendor_flat.values():
+        if v["category"] in PER_UNIT_CATEGORIES:
+            values.setdefault(v["category"], v["per_unit_annual"])
+    NETWORK_PEER_STATS.update_building(normalize_bbl(bbl), group, values)
+
+def _rebuild_peer_stats():
+    for bbl in list(BUILDINGS_DB):
+        _note_building_change(bbl)
+
+_rebuild_peer_stats()
+
+
+# ── Rebid scenario positions ────────────────────────────────────────────────
+# Every building's position in every per-unit category (current spend and
+# peer p25–p90), laid out as the (buildings × categories) arrays
+# rebid_scenario() takes. Built with one benchmark_portfolio() call and rebuilt
+# lazily after any building change, so a scenario request is row selection
+# plus a few array operations.
+_scenario_table_cache = {"stamp": None, "table": None}
+_scenario_table_lock = threading.Lock()
+
+def _build_scenario_table():
+    rows, addresses, units, spend, peer, groups = {}, [], [], [], [], []
+    for bbl, building in list(BUILDINGS_DB.items()):
+        key = normalize_bbl(bbl)
+        if key in rows:
+            continue
+        try:
+            vendor_flat, _last_bids, group = _benchmark_inputs(building)
+        except (KeyError, TypeError):
+            continue
+        by_category = {}
+        for v in vendor_flat.values():
+            by_category.setdefault(v["category"], v["per_unit_annual"])
+        rows[key] = len(units)
+        addresses.append(building.get("address", ""))
+        units.append(building["units"])
+        spend.append([np.nan if by_category.get(c) is None else by_category[c] for c in PER_UNIT_CATEGORIES])
+        peer.append([network_peer_values(NETWORK_PEER_STATS.quantiles(c, group)) for c in PER_UNIT_CATEGORIES])
+        groups.append(group)
+    batch = benchmark_portfolio(units, spend, [g[1] for g in groups], [g[2] for g in groups],
+                                [g[3] for g in groups], peer=peer)
+    return {
+        "rows": rows,
+        "address": addresses,
+        "units": np.asarray(units, dtype=np.float64),
+        "spend": np.asarray(spend, dtype=np.float64),
+        "peer": batch["peer"],
+    }
+
+def _scenario_table():
+    with _benchmark_cache_lock:
+        stamp = _benchmark_cache_stats["invalidations"]
+    with _scenario_table_lock:
+        if _scenario_table_cache["stamp"] != stamp:
+            _scenario_table_cache["table"] = _build_scenario_table()
+            _scenario_table_cache["stamp"] = stamp
+        return _scenario_table_cache["table"]
+
 
 def ensure_building_data(building):
     """
@@ -1547,7 +2034,7 @@ def login():
     # Build access options for the request-access dropdown
     _access_options = _build_access_options()
 
-    return render_template_string(LOGIN_HTML,
+    return render_template("LOGIN_HTML",
         error=error,
         total_buildings=total_buildings,
         total_units=f"{total_units:,}",
@@ -2002,7 +2489,7 @@ def dashboard():
         except (ValueError, TypeError):
             pass  # Leave as-is if due_date format is unexpected
 
-    benchmarks = compute_benchmarks(building)
+    benchmarks = compute_benchmarks(building, session.get("active_building"))
     user = DEMO_USERS.get(session["user_email"], {})
     is_admin = user.get("is_admin", False) or user.get("role") == "admin"
 
@@ -2039,7 +2526,7 @@ def dashboard():
     _user_building_keys = [b for b in DEMO_USERS[session["user_email"]].get("buildings", [])
                            if b in BUILDINGS_DB]
     _user_buildings = [ensure_building_data(BUILDINGS_DB[b]) for b in _user_building_keys]
-    return render_template_string(DASHBOARD_HTML,
+    return render_template("DASHBOARD_HTML",
         building=building,
         benchmarks=benchmarks,
         user_name=session.get("user_name"),
@@ -2063,7 +2550,7 @@ def dashboard():
         bid_requests_json=json.dumps([dict(br, bids_count=_count_bids_for_request(br["request_id"]),
                                            category_label=CATEGORY_LABELS.get(br["category"], br["category"]),
                                            bids=[dict(b, vendor_name=VENDOR_PROFILES.get(b["vendor_id"], {}).get("company_name", "Unknown"))
-                                                 for b in VENDOR_BIDS.values() if b.get("bid_request_id") == br["request_id"]])
+                                                 for b in _get_bids_for_request(br["request_id"])])
                                      for br in _get_bid_requests_for_building(active_bbl)], default=str),
     )
 
@@ -2081,13 +2568,280 @@ def api_building(bbl):
     building = BUILDINGS_DB.get(bbl)
     if not building:
         return jsonify({"error": "Building not found"}), 404
-    benchmarks = compute_benchmarks(building)
+    benchmarks = compute_benchmarks(building, bbl)
     return jsonify({"building": building, "benchmarks": benchmarks})
 
+def _requested_bbls(user, data):
+    """(bbls, error response) from {"bbls": [...]} / {"portfolio": id} in the
+    JSON body or ?bbls=a,b / ?portfolio=id. A portfolio id is "mine" (the
+    user's own buildings) or a management company name from
+    MANAGEMENT_CO_BUILDINGS. BBLs come back de-duplicated, in request order."""
+    if not isinstance(data, dict):
+        return None, (jsonify({"error": "Request body must be a JSON object"}), 400)
+    bbls = data.get("bbls")
+    if bbls is None and request.args.get("bbls"):
+        bbls = [b.strip() for b in request.args["bbls"].split(",") if b.strip()]
+    portfolio = data.get("portfolio") or request.args.get("portfolio")
+    if bbls is None and portfolio:
+        if portfolio == "mine":
+            bbls = user.get("buildings", [])
+        elif portfolio in MANAGEMENT_CO_BUILDINGS:
+            bbls = MANAGEMENT_CO_BUILDINGS[portfolio]
+        else:
+            return None, (jsonify({"error": f"Unknown portfolio: {portfolio}"}), 404)
+    if not isinstance(bbls, list) or not bbls:
+        return None, (jsonify({"error": "Provide a list of bbls or a portfolio id"}), 400)
+    return list(dict.fromkeys(str(b) for b in bbls)), None
+
+@app.route("/api/benchmarks", methods=["GET", "POST"])
+@login_required
+def api_benchmarks():
+    """Benchmarks for many buildings, streamed as NDJSON: one line per building
+    in request order, written as soon as it is computed.
+
+    Takes a list of BBLs or a portfolio id (see _requested_bbls). Non-admins
+    only get buildings in their own list; other BBLs come back as error lines.
+    """
+    user = DEMO_USERS.get(session["user_email"], {})
+    bbls, err = _requested_bbls(user, request.get_json(silent=True) or {})
+    if err:
+        return err
+    is_admin = user.get("is_admin") or user.get("role") == "admin"
+    allowed = None if is_admin else set(user.get("buildings", []))
+
+    def generate():
+        for bbl in bbls:
+            building = BUILDINGS_DB.get(bbl)
+            if building is None or (allowed is not None and bbl not in allowed):
+                row = {"bbl": bbl, "error": "Building not found"}
+            else:
+                try:
+                    row = {"bbl": bbl, "address": building.get("address", ""),
+                           "benchmarks": compute_benchmarks(building, bbl)}
+                except (KeyError, TypeError, ValueError) as e:
+                    row = {"bbl": bbl, "error": f"Benchmarking failed: {e}"}
+            yield json.dumps(row, default=str) + "\n"
+
+    from flask import Response
+    return Response(generate(), mimetype="application/x-ndjson",
+                    headers={"X-Building-Count": str(len(bbls)), "Cache-Control": "no-store"})
+
+@app.route("/api/scenarios/rebid", methods=["POST"])
+@login_required
+def api_rebid_scenario():
+    """What-if rebid: projected savings if the chosen buildings rebid the chosen
+    categories and landed at target percentiles of their peer groups.
+
+    Body: buildings as for /api/benchmarks ({"bbls": [...]} or {"portfolio": id}),
+    "categories" (default: every per-unit category) and "target_percentile",
+    either one number or {category: percentile}. Only building × categories
+    currently priced above the target contribute.
+    """
+    user = DEMO_USERS.get(session["user_email"], {})
+    data = request.get_json(silent=True) or {}
+    bbls, err = _requested_bbls(user, data)
+    if err:
+        return err
+
+    categories = data.get("categories") or PER_UNIT_CATEGORIES
+    if not isinstance(categories, list):
+        return jsonify({"error": "categories must be a list"}), 400
+    unknown = [c for c in categories if c not in PER_UNIT_CATEGORIES]
+    if unknown:
+        return jsonify({"error": f"Unknown categories: {', '.join(map(str, unknown))}"}), 400
+    targets = data.get("target_percentile", 50)
+    try:
+        if isinstance(targets, dict):
+            targets = [float(targets.get(c, 50)) for c in categories]
+        else:
+            targets = [float(targets)] * len(categories)
+    except (TypeError, ValueError):
+        return jsonify({"error": "target_percentile must be a number or {category: number}"}), 400
+    if not all(0 < t < 100 for t in targets):
+        return jsonify({"error": "target_percentile must be between 0 and 100"}), 400
+
+    table = _scenario_table()
+    is_admin = user.get("is_admin") or user.get("role") == "admin"
+    allowed = None if is_admin else set(user.get("buildings", []))
+    selected, missing, seen = [], [], set()
+    for bbl in bbls:
+        row = table["rows"].get(normalize_bbl(bbl))
+        if row is None or (allowed is not None and bbl not in allowed):
+            missing.append(bbl)
+        elif row not in seen:   # alias keys share a row; count each building once
+            seen.add(row)
+            selected.append((bbl, row))
+    idx = np.array([row for _bbl, row in selected], dtype=np.intp)
+    cols = np.array([PER_UNIT_CATEGORIES.index(c) for c in categories], dtype=np.intp)
+    result = rebid_scenario(table["units"][idx],
+                            table["spend"][np.ix_(idx, cols)],
+                            table["peer"][np.ix_(idx, cols)],
+                            np.asarray(targets))
+
+    savings = result["savings_annual"].tolist()
+    buildings = []
+    for i, (bbl, row) in enumerate(selected):
+        buildings.append({
+            "bbl": bbl,
+            "address": table["address"][row],
+            "savings_annual": float(result["building_savings_annual"][i]),
+            "categories": {c: savings[i][j] for j, c in enumerate(categories) if savings[i][j]},
+        })
+    return jsonify({
+        "buildings": buildings,
+        "categories": dict(zip(categories, result["savings_annual"].sum(axis=0).tolist())),
+        "targets": dict(zip(categories, targets)),
+        "total_savings_opportunity": result["total_savings"],
+        "net_savings_after_fee": result["net_savings_after_fee"],
+        "rebid_count": result["rebid_count"],
+        "building_count": len(selected),
+        "missing": missing,
+    })
+
+# ── Upload jobs (see jobs.py) ────────────────────────────────────────────────
+# ?wait=1 gives up (and answers 202) before gunicorn's --timeout kills the worker
+JOB_WAIT_SECONDS = 240
+
+def _job_accepted(job):
+    """202 for a submitted upload job, or the finished result with ?wait=1."""
+    if request.args.get("wait") == "1":
+        state = jobs.wait(job.id, timeout=JOB_WAIT_SECONDS)
+        if state["status"] == "done":
+            return jsonify(state["result"])
+        if state["status"] == "error":
+            return jsonify({"error": state["error"]}), 500
+    return jsonify({"success": True, "job_id": job.id, "status": job.status,
+                    "status_url": f"/api/jobs/{job.id}"}), 202
+
+
+def _visible_job(job_id):
+    """The job's state if the session user owns it (or is an admin), else None."""
+    state = jobs.get(job_id)
+    user = DEMO_USERS.get(session.get("user_email"), {})
+    is_admin = user.get("is_admin") or user.get("role") == "admin"
+    if state is None or (state.get("owner") != session.get("user_email") and not is_admin):
+        return None
+    state.pop("owner", None)
+    return state
+
+
+@app.route("/api/jobs/<job_id>")
+@login_required
+def api_job_status(job_id):
+    """Status, per-stage progress and (once done) the result of an upload job."""
+    state = _visible_job(job_id)
+    if state is None:
+        return jsonify({"error": "Job not found"}), 404
+    state.pop("items", None)
+    state["elapsed"] = round((state["updated_at"] if state["status"] in jobs.FINISHED else time.time())
+                             - state["created_at"], 1)
+    return jsonify(state)
+
+
+# An open events stream occupies one of a worker's gthread threads (see
+# Procfile), not the whole worker. Each stream still ends after this long and
+# the browser's EventSource reconnects with Last-Event-ID, so dropped
+# connections don't pin threads for long
+SSE_MAX_SECONDS = float(os.environ.get("BOARDIQ_SSE_MAX_SECONDS", "25"))
+SSE_HEARTBEAT_SECONDS = 10.0
+
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.route("/api/jobs/<job_id>/events")
+@login_required
+def api_job_events(job_id):
+    """Server-Sent Events for an upload job, so the review table fills in while
+    the rest of the file is still parsing:
+
+      invoices   a list of newly parsed, matched and classified invoices
+      reset      drop the invoices received so far (the job started over)
+      progress   {status, stage, stages}
+      done       {count}; the streamed invoices are the complete result
+      failed     {error}
+
+    Event ids are "<epoch>:<invoices sent>"; a reconnect with Last-Event-ID
+    (or ?last_event_id=) resumes after them.
+    """
+    state = _visible_job(job_id)
+    if state is None:
+        return jsonify({"error": "Job not found"}), 404
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or ""
+    try:
+        epoch, sent = (int(x) for x in last_id.split(":"))
+    except ValueError:
+        epoch, sent = 0, 0
+
+    def generate(state, epoch, sent):
+        started = beat = time.time()
+        last_progress = None
+        yield "retry: 1000\n\n"
+        while True:
+            if state.get("items_epoch", 0) != epoch:
+                epoch, sent = state.get("items_epoch", 0), 0
+                yield _sse("reset", {}, f"{epoch}:0")
+            if state["status"] in jobs.FINISHED:
+                # A finished job keeps its invoices only in its (sorted)
+                # result: send those, from the top unless all already went out
+                items = (state.get("result") or {}).get("invoices") or []
+                if 0 < sent < len(items):
+                    epoch, sent = epoch + 1, 0
+                    yield _sse("reset", {}, f"{epoch}:0")
+                items = items[sent:]
+            else:
+                # From memory, or job_items if another worker runs the job
+                items = jobs.items(job_id, epoch, sent)
+            if items:
+                sent += len(items)
+                yield _sse("invoices", items, f"{epoch}:{sent}")
+            progress = {k: state[k] for k in ("status", "stage", "stages")}
+            if progress != last_progress:
+                last_progress = progress
+                yield _sse("progress", progress)
+            if state["status"] == "done":
+                yield _sse("done", {"count": (state["result"] or {}).get("count", sent)})
+                return
+            if state["status"] == "error":
+                yield _sse("failed", {"error": state["error"]})
+                return
+            now = time.time()
+            if now - started > SSE_MAX_SECONDS:
+                return
+            if now - beat > SSE_HEARTBEAT_SECONDS:
+                beat = now
+                yield ": keep-alive\n\n"
+            jobs.wait_change(job_id, state.get("version"), 1.0)
+            state = jobs.get(job_id) or state
+
+    from flask import Response
+    # no-transform: keep compression.py (and proxies) from buffering events
+    return Response(generate(state, epoch, sent), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"})
+
+
+def _run_invoice_upload(tmp_path, suffix, progress, emit):
+    try:
+        if suffix == ".pdf":
+            invoices = _parse_pdf_invoices(tmp_path, progress, emit)
+        else:
+            invoices = _parse_csv_invoices(tmp_path, progress, emit)
+    finally:
+        try: os.remove(tmp_path)
+        except OSError: pass
+    return {"success": True, "invoices": invoices, "count": len(invoices)}
+
+
 @app.route("/api/upload-invoices", methods=["POST"])
 @login_required
 def upload_invoices():
-    """Accept PDF invoice upload, parse all invoices, return structured data for review."""
+    """Accept PDF/CSV invoice upload and parse it in the background.
+
+    Returns 202 with a job id; poll /api/jobs/<id> for progress and, once
+    done, {"success", "invoices", "count"} for review. ?wait=1 blocks and
+    returns that result directly."""
     if "file" not in request.files:
         return jsonify({"error": "No file provided"}), 400
 
@@ -2095,25 +2849,17 @@ def upload_invoices():
     if not f.filename:
         return jsonify({"error": "No file selected"}), 400
 
-    import tempfile, subprocess, re
+    import tempfile
 
-    # Save uploaded file, close it, then parse
+    # Save uploaded file, close it, then hand it to the job
     suffix = ".pdf" if f.filename.lower().endswith(".pdf") else ".csv"
     with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
         tmp_path = tmp.name
     f.save(tmp_path)  # save after closing the temp file handle
 
-    try:
-        if suffix == ".pdf":
-            invoices = _parse_pdf_invoices(tmp_path)
-        else:
-            invoices = _parse_csv_invoices(tmp_path)
-        os.remove(tmp_path)
-        return jsonify({"success": True, "invoices": invoices, "count": len(invoices)})
-    except Exception as e:
-        try: os.remove(tmp_path)
-        except: pass
-        return jsonify({"error": str(e)}), 500
+    job = jobs.submit("invoices", session.get("user_email"), _run_invoice_upload, tmp_path, suffix,
+                      meta={"filename": f.filename})
+    return _job_accepted(job)
 
 
 @app.route("/api/import-yardi", methods=["POST"])
@@ -2177,10 +2923,13 @@ def import_yardi():
     if result.get("property_code"):
         building["yardi_property_code"] = result["property_code"]
 
-    _save_vendor_data()
+    _note_building_change(bbl)
+    _queue_vendor_data_save(bbl)
+    persisted = _durable_ack()
 
     return jsonify({
         "success": True,
+        "persisted": persisted,
         "property_code": result["property_code"],
         "period": result["period"],
         "imported": len(imported),
@@ -2284,7 +3033,9 @@ def admin_add_building():
     # Persist
     BUILDINGS_DB[bbl] = result
     ADDED_BUILDINGS[bbl] = result
-    _save_added_buildings(ADDED_BUILDINGS)
+    _note_building_change(bbl)
+    _queue_added_building_save(bbl)
+    persisted = _durable_ack()
 
     # Update the Madison admin's building list so the switcher picks it up
     mrc_user = DEMO_USERS.get("mrc@boardiq.com")
@@ -2293,6 +3044,7 @@ def admin_add_building():
 
     return jsonify({
         "success": True,
+        "persisted": persisted,
         "bbl": bbl,
         "building": {
             "id": bbl,
@@ -2311,7 +3063,7 @@ def admin_add_building():
 def admin_delete_building():
     """Remove a building from the MRC portfolio. Works for both user-added
     and seeded MRC buildings. Seed deletions are persisted via a tombstone
-    list (deleted_buildings.json) so they survive process restarts."""
+    list (deleted_buildings table) so they survive process restarts."""
     user, err = _require_mrc_admin()
     if err:
         return err
@@ -2346,9 +3098,11 @@ def admin_delete_building():
     for _k in keys_to_remove:
         ADDED_BUILDINGS.pop(_k, None)
         BUILDINGS_DB.pop(_k, None)
+        _note_building_change(_k)
         DELETED_BUILDINGS.add(_k)
-    _save_added_buildings(ADDED_BUILDINGS)
-    _save_deleted_buildings(DELETED_BUILDINGS)
+        _queue_added_building_save(_k)
+    _queue_tombstones(keys_to_remove)
+    persisted = _durable_ack()
 
     # Clear from Madison admin's building list (any of the keys we removed)
     mrc_user = DEMO_USERS.get("mrc@boardiq.com")
@@ -2362,199 +3116,98 @@ def admin_delete_building():
 
     return jsonify({
         "success": True,
+        "persisted": persisted,
         "deleted_bbl": bbl,
         "deleted_address": removed_address,
     })
 
 
-def _normalize_address(addr):
-    """Normalize an address string for fuzzy matching."""
-    if not addr:
-        return ""
-    addr = addr.upper().strip()
-    addr = re.sub(r'\s+', ' ', addr)
-    addr = re.sub(r',.*$', '', addr)  # remove city/state
-    addr = addr.replace(' STREET', ' ST').replace(' AVENUE', ' AVE')
-    addr = addr.replace(' EAST ', ' E ').replace(' WEST ', ' W ')
-    addr = addr.replace(' NORTH ', ' N ').replace(' SOUTH ', ' S ')
-    addr = re.sub(r'\b(CORP|INC|LLC|OWNERS?|CORPORATION)\b.*', '', addr)
-    addr = re.sub(r'C/O.*$', '', addr)
-    addr = re.sub(r'APT.*$', '', addr)
-    addr = addr.strip()
-    return addr
+@app.route("/api/admin/metrics")
+@login_required
+def admin_metrics():
+    """Operational counters (DB pool, write-behind queue, ...) for admins."""
+    user = DEMO_USERS.get(session.get("user_email"), {})
+    if not (user.get("is_admin") or user.get("role") == "admin"):
+        return jsonify({"error": "Admin access required"}), 403
+    return jsonify({
+        "db_pool": boardiq_db.pool_stats(),
+        "write_behind": write_behind.stats(),
+        "static_assets": static_assets.stats(),
+        "compression": compression.stats(),
+        "peer_stats": NETWORK_PEER_STATS.stats(),
+        "benchmark_cache": _benchmark_cache_metrics(),
+        "llm_dispatch": llm_dispatch.stats(),
+        "jobs": jobs.stats(),
+        "pdf_extract": pdf_extract.stats(),
+        "parse_cache": parse_cache.stats(),
+        "classifier": classifier.stats(),
+        "address_index": ADDRESS_INDEX.stats(),
+    })
 
 
 def _match_building(raw_address):
     """Fuzzy match a raw address string to a building in BUILDINGS_DB.
     Returns (bbl, building, confidence_score) or (None, None, 0)."""
-    if not raw_address:
-        return None, None, 0
-
-    # ── Known building name aliases ────────────────────────────────────────────
-    # These are building names used on invoices that map to known addresses
-    NAME_ALIASES = {
-        "bleecker court": "77 bleecker",
-        "77 bleecker": "77 bleecker",
-        "century operating corp": "77 bleecker",
-        "77 bleecker st. corp": "77 bleecker",
-        "77 bleecker street corp": "77 bleecker",
-        "the hopkins condominium": "172 west 79",
-        "hopkins condo": "172 west 79",
-        "172 west 79th street": "172 west 79",
-        "130 east 18th owners corp": "130 east 18",
-        "130 east 18th": "130 east 18",
-        "444 east 86th street": "444 east 86",
-        "444 east 86": "444 east 86",
-        "33 east 74th street": "33 east 74",
-    }
-    raw_lower = raw_address.lower().strip()
-    for alias, key_fragment in NAME_ALIASES.items():
-        if alias in raw_lower:
-            # Find building matching the key_fragment
-            for bbl, bldg in BUILDINGS_DB.items():
-                addr = bldg.get("address", "").lower()
-                if key_fragment in addr:
-                    return bbl, bldg, 0.9
-
-    norm_input = _normalize_address(raw_address)
-    if not norm_input or len(norm_input) < 5:
-        return None, None, 0
-
-    # Extract street number from input
-    num_match = re.match(r'^(\d+)', norm_input)
-    input_num = num_match.group(1) if num_match else ""
-
-    best_bbl, best_bldg, best_score = None, None, 0
-
-    for bbl, bldg in BUILDINGS_DB.items():
-        norm_db = _normalize_address(bldg.get("address", ""))
-        if not norm_db:
-            continue
-
-        # Street number must match exactly
-        db_num_match = re.match(r'^(\d+)', norm_db)
-        db_num = db_num_match.group(1) if db_num_match else ""
-        if input_num and db_num and input_num != db_num:
-            continue
-
-        # Score based on common tokens
-        input_tokens = set(norm_input.split())
-        db_tokens = set(norm_db.split())
-        if not input_tokens or not db_tokens:
-            continue
-
-        common = input_tokens & db_tokens
-        score = len(common) / max(len(input_tokens), len(db_tokens))
-
-        # Boost if street number matches
-        if input_num and input_num == db_num:
-            score += 0.3
-
-        if score > best_score:
-            best_score = score
-            best_bbl = bbl
-            best_bldg = bldg
-
-    if best_score > 0.4:
-        return best_bbl, best_bldg, round(best_score, 2)
-    return None, None, 0
+    return ADDRESS_INDEX.match(raw_address, BUILDINGS_DB)
+
+
+# ── Category rules ──
+# First rule with a keyword in "vendor description" wins (classifier.py).
+# Keywords starting with \b or containing "(" are regexes, the rest substrings.
+_CATEGORY_RULES = classifier.KeywordRules([
+    # Known vendors by name first
+    ("UTILITIES_ELECTRIC", ["con edison", "consolidated edison"]),
+    ("LEGAL", ["fox rothschild"]),
+    ("LEGAL", ["schrager", "lrwof"]),
+    ("ELEVATOR_MAINTENANCE", ["elevator", "lift", r"\bcab\b", "unitec", "otis", "schindler", "kone", "thyssen"]),
+    ("PLUMBING_REPAIRS", ["plumb", "heating", "boiler", r"\bhvac\b", "adriatic", r"\bsteam\b", "radiator"]),
+    ("WATER_TREATMENT", ["water treatment", "legionella", "vitralogy", "cooling tower"]),
+    ("EXTERMINATING", ["pest", "exterminator", "exterminating", "rodent", "bedbug", "roach", "termite"]),
+    ("INSURANCE", ["insurance", "amtrust", "chubb", "travelers", "liability insur", "general liability"]),
+    ("WASTE_REMOVAL", [r"\bwaste\b", "garbage", r"\btrash\b", r"\bsanitation\b", "recycl", "carting", "bi-coastal"]),
+    ("LANDSCAPING", ["landscap", r"\bflower\b", r"\bgarden\b", "ariston", r"\blawn\b", "horticulture", "grounds maint"]),
+    ("MANAGEMENT_FEE", ["management fee", "mgmt fee", "managing agent"]),
+    ("UTILITIES_GAS", ["bay city metering", "gas piping", "gas meter", "national fuel", "national grid"]),
+    ("UTILITIES_GAS", [r"\bgas\b"]),
+    ("UTILITIES_WATER", ["water bill", "water meter", "dep water", r"\bsewer\b"]),
+    ("LEGAL", ["legal", "attorney", "counsel", "law office", r"\besq\.", "law firm", "fox rothschild", "schrager"]),
+    ("SECURITY", ["security", "intercom", r"\bcamera\b", "access control", "locksmith", "abbey lock", "smartcon", r"\bkeys?\b"]),
+    ("FACADE_REPAIRS", ["facade", "fisp", r"\bwaterproof\b", "exterior wall", r"\bmasonry\b", "pointing", "cgi northeast", "parapet"]),
+    ("UTILITIES_TELECOM", ["telecom", "granite telecom", "granitenet", "fios", "verizon", "spectrum", "optimum", "broadband"]),
+    ("UTILITIES_ELECTRIC", [r"\belectric\b", "electrical", r"\bwiring\b", "we wire", "coned", "consolidated edison", "con edison"]),
+    ("SUPPLIES", [r"\bhardware\b", "c&s hardware", "building supply"]),
+    ("ENVIRONMENTAL", ["environmental", "remediation", "asbestos", r"\bmold\b", "abatement", "lead paint", "stericycle"]),
+    ("ROOFING", [r"\broof(ing|er)?\b", "copper hill"]),
+    ("WINDOW_GLASS", [r"\bwindow\b", r"\bglass\b", "glazing", "jesse shapiro", "james glass"]),
+    ("FIRE_SAFETY", ["sprinkler", "fire alarm", "fire suppression", "fire safety"]),
+    ("ACCOUNTING", ["accounting", "bookkeep", r"\baudit\b", r"\bcpa\b"]),
+    ("PAINTING", [r"\bpaint(ing|er)?\b", r"\bplaster\b", "drywall"]),
+    ("MORTGAGE", ["mortgage", r"\bloan\b", "cooperative bank"]),
+    ("ENGINEERING", ["consulting", "engineer", "engineering", r"\binspection\b", "domani", "metric consult"]),
+    ("LAUNDRY", ["laundry", r"\bwasher\b", r"\bdryer\b", "coinmach"]),
+    ("HVAC_MAINTENANCE", ["simon industries", "isseks", "metro group", r"\bhvac\b", "mechanical", "procore"]),
+    ("CLEANING", ["clean", "janitor", "porter", r"\bmaid\b", "bags galore", "cleaning supply"]),
+    ("REPAIRS_GENERAL", ["construction", "renovation", "contractor", "gc reliable", "atz enterprise", "reliable construction"]),
+    ("WATER_TREATMENT", [r"\bwater tank\b", "isseks", "tank repair"]),
+    ("FIRE_SAFETY", ["nfpa", "fire protection", "fire inspection", "sprinkler", "fire alarm", "fire suppression", "fire safety"]),
+    ("LANDSCAPING", ["florist", "flowers", "plants", "garden", "qflorist"]),
+    ("LAUNDRY", ["laundry", r"\bwasher\b", r"\bdryer\b", "sophie"]),
+    ("LEGAL", ["professional services", "for services rendered", "for professional services", "law offices", "law office"]),
+    ("REPAIRS_GENERAL", ["monthly service", "monthly maintenance", "monthly invoice", "service agreement"]),
+    ("SUPPLIES", ["staples", "office supply", "office depot", "tru red", "copy paper"]),
+], regex=lambda k: k.startswith(r'\b') or '(' in k)
 
 
 def _classify_category(vendor_name, description):
     """Classify vendor into a service category based on name and description."""
-    text = (vendor_name + " " + description).lower()
+    # default: most unclassified items are repairs
+    return _CATEGORY_RULES.first(vendor_name + " " + description) or "REPAIRS_GENERAL"
 
-    def m(*keywords):
-        for k in keywords:
-            if k.startswith(r'\b') or '(' in k:
-                if re.search(k, text):
-                    return True
-            else:
-                if k in text:
-                    return True
-        return False
 
-    # Handle known vendors by name first
-    if "con edison" in text or "consolidated edison" in text:
-        return "UTILITIES_ELECTRIC"
-    if "fox rothschild" in text:
-        return "LEGAL"
-    if "schrager" in text or "lrwof" in text:
-        return "LEGAL"
-
-    if m("elevator", "lift", r"\bcab\b", "unitec", "otis", "schindler", "kone", "thyssen"):
-        return "ELEVATOR_MAINTENANCE"
-    if m("plumb", "heating", "boiler", r"\bhvac\b", "adriatic", r"\bsteam\b", "radiator"):
-        return "PLUMBING_REPAIRS"
-    if m("water treatment", "legionella", "vitralogy", "cooling tower"):
-        return "WATER_TREATMENT"
-    if m("pest", "exterminator", "exterminating", "rodent", "bedbug", "roach", "termite"):
-        return "EXTERMINATING"
-    if m("insurance", "amtrust", "chubb", "travelers", "liability insur", "general liability"):
-        return "INSURANCE"
-    if m(r"\bwaste\b", "garbage", r"\btrash\b", r"\bsanitation\b", "recycl", "carting", "bi-coastal"):
-        return "WASTE_REMOVAL"
-    if m("landscap", r"\bflower\b", r"\bgarden\b", "ariston", r"\blawn\b", "horticulture", "grounds maint"):
-        return "LANDSCAPING"
-    if m("management fee", "mgmt fee", "managing agent"):
-        return "MANAGEMENT_FEE"
-    if m("bay city metering", "gas piping", "gas meter", "national fuel", "national grid"):
-        return "UTILITIES_GAS"
-    if m(r"\bgas\b"):
-        return "UTILITIES_GAS"
-    if m("water bill", "water meter", "dep water", r"\bsewer\b"):
-        return "UTILITIES_WATER"
-    if m("legal", "attorney", "counsel", "law office", r"\besq\.", "law firm", "fox rothschild", "schrager"):
-        return "LEGAL"
-    if m("security", "intercom", r"\bcamera\b", "access control", "locksmith", "abbey lock", "smartcon", r"\bkeys?\b"):
-        return "SECURITY"
-    if m("facade", "fisp", r"\bwaterproof\b", "exterior wall", r"\bmasonry\b", "pointing", "cgi northeast", "parapet"):
-        return "FACADE_REPAIRS"
-    if m("telecom", "granite telecom", "granitenet", "fios", "verizon", "spectrum", "optimum", "broadband"):
-        return "UTILITIES_TELECOM"
-    if m(r"\belectric\b", "electrical", r"\bwiring\b", "we wire", "coned", "consolidated edison", "con edison"):
-        return "UTILITIES_ELECTRIC"
-    if m(r"\bhardware\b", "c&s hardware", "building supply"):
-        return "SUPPLIES"
-    if m("environmental", "remediation", "asbestos", r"\bmold\b", "abatement", "lead paint", "stericycle"):
-        return "ENVIRONMENTAL"
-    if m(r"\broof(ing|er)?\b", "copper hill"):
-        return "ROOFING"
-    if m(r"\bwindow\b", r"\bglass\b", "glazing", "jesse shapiro", "james glass"):
-        return "WINDOW_GLASS"
-    if m("sprinkler", "fire alarm", "fire suppression", "fire safety"):
-        return "FIRE_SAFETY"
-    if m("accounting", "bookkeep", r"\baudit\b", r"\bcpa\b"):
-        return "ACCOUNTING"
-    if m(r"\bpaint(ing|er)?\b", r"\bplaster\b", "drywall"):
-        return "PAINTING"
-    if m("mortgage", r"\bloan\b", "cooperative bank"):
-        return "MORTGAGE"
-    if m("consulting", "engineer", "engineering", r"\binspection\b", "domani", "metric consult"):
-        return "ENGINEERING"
-    if m("laundry", r"\bwasher\b", r"\bdryer\b", "coinmach"):
-        return "LAUNDRY"
-    if m("simon industries", "isseks", "metro group", r"\bhvac\b", "mechanical", "procore"):
-        return "HVAC_MAINTENANCE"
-    if m("clean", "janitor", "porter", r"\bmaid\b", "bags galore", "cleaning supply"):
-        return "CLEANING"
-    if m("construction", "renovation", "contractor", "gc reliable", "atz enterprise", "reliable construction"):
-        return "REPAIRS_GENERAL"
-    if m(r"\bwater tank\b", "isseks", "tank repair"):
-        return "WATER_TREATMENT"
-    if m("nfpa", "fire protection", "fire inspection", "sprinkler", "fire alarm", "fire suppression", "fire safety"):
-        return "FIRE_SAFETY"
-    if m("florist", "flowers", "plants", "garden", "qflorist"):
-        return "LANDSCAPING"
-    if m("laundry", r"\bwasher\b", r"\bdryer\b", "sophie"):
-        return "LAUNDRY"
-    if m("professional services", "for services rendered", "for professional services", "law offices", "law office"):
-        return "LEGAL"
-    if m("monthly service", "monthly maintenance", "monthly invoice", "service agreement"):
-        return "REPAIRS_GENERAL"
-    if m("staples", "office supply", "office depot", "tru red", "copy paper"):
-        return "SUPPLIES"
-    return "REPAIRS_GENERAL"  # default: most unclassified items are repairs
+LLM_MODEL = "claude-sonnet-4-20250514"
+# Bump when a prompt below changes, so parse_cache stops serving old answers
+INVOICE_PROMPT_VERSION = 1
+CONTRACT_PROMPT_VERSION = 1
 
 
 def _call_claude_for_invoices(page_texts, api_key):
@@ -2597,13 +3250,13 @@ PDF PAGES:
 {pages_block}"""
 
     payload = _json.dumps({
-        "model": "claude-sonnet-4-20250514",
+        "model": LLM_MODEL,
         "max_tokens": 4000,
         "messages": [{"role": "user", "content": prompt}]
     }).encode("utf-8")
 
     req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
+        llm_dispatch.API_URL,
         data=payload,
         headers={
             "Content-Type": "application/json",
@@ -2661,13 +3314,13 @@ CONTRACT TEXT:
 {trimmed}"""
 
     payload = _json.dumps({
-        "model": "claude-sonnet-4-20250514",
+        "model": LLM_MODEL,
         "max_tokens": 4000,
         "messages": [{"role": "user", "content": prompt}]
     }).encode("utf-8")
 
     req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
+        llm_dispatch.API_URL,
         data=payload,
         headers={
             "Content-Type": "application/json",
@@ -2688,30 +3341,32 @@ CONTRACT TEXT:
     return _json.loads(text)
 
 
-def _parse_pdf_invoices(pdf_path):
+def _no_progress(stage, done=None, total=None):
+    pass
+
+
+def _no_emit(items=(), reset=False):
+    pass
+
+
+def _parse_pdf_invoices(pdf_path, progress=None, emit=None):
     """Extract structured invoice data from a PDF using Claude AI.
-    Falls back to regex parsing if no API key configured."""
+    Falls back to regex parsing if no API key configured.
+
+    progress(stage, done, total) is told about pages extracted ("extract"),
+    batches or invoice groups parsed ("parse") and invoices matched ("match");
+    emit(invoices) gets each batch's or page group's invoices as soon as they
+    are matched and classified. See jobs.py."""
     import warnings
     import os
 
+    progress = progress or _no_progress
+    emit = emit or _no_emit
     api_key = os.environ.get("ANTHROPIC_API_KEY", "")
 
-    # ── Extract page text with pypdf ─────────────────────────────────────────
-    pages = []
+    # ── Extract page text with pypdf (large PDFs on a process pool) ──────────
     try:
-        from pypdf import PdfReader
-        import warnings as _warnings
-        with _warnings.catch_warnings():
-            _warnings.simplefilter("ignore")
-            reader = PdfReader(pdf_path, strict=False)
-        for page in reader.pages:
-            try:
-                text = page.extract_text() or ""
-                # Ensure text is valid UTF-8
-                text = text.encode("utf-8", errors="replace").decode("utf-8", errors="replace")
-                pages.append(text)
-            except Exception:
-                pages.append("")
+        pages = pdf_extract.extract_pages(pdf_path, progress, cache=parse_cache.pages)
     except Exception as e:
         raise Exception(f"Could not parse PDF: {e}")
 
@@ -2721,70 +3376,93 @@ def _parse_pdf_invoices(pdf_path):
     # ── AI PATH: send pages to Claude API ────────────────────────────────────
     if api_key:
         try:
-            # Send in batches of 25 pages to stay within token limits
+            # Send in batches of 15 pages to stay within token limits,
+            # several at a time (see llm_dispatch.py); results stay in page order
             BATCH = 15
-            raw_invoices = []
-            for i in range(0, len(pages), BATCH):
-                batch = pages[i:i+BATCH]
-                results = _call_claude_for_invoices(batch, api_key)
-                raw_invoices.extend(results)
-
-            # Match buildings and classify, build final invoice list
+            # Batches parsed before (same pages, model and prompt) come from
+            # parse_cache; each new answer is stored as soon as it arrives
+            batches = [pages[i:i+BATCH] for i in range(0, len(pages), BATCH)]
+            keys = [parse_cache.batch_key(b, LLM_MODEL, INVOICE_PROMPT_VERSION) for b in batches]
+            parsed = parse_cache.llm.get(keys)
+            todo = [i for i, k in enumerate(keys) if k not in parsed]
+            progress("parse", len(batches) - len(todo), len(batches))
+
+            def _parse_batch(i):
+                results = _call_claude_for_invoices(batches[i], api_key)
+                parse_cache.llm.put({keys[i]: results})
+                progress("parse")
+                return results
+
+            def _batch_results():
+                # In page order, each as soon as it's in (see imap_batches)
+                fresh = llm_dispatch.imap_batches(_parse_batch, todo)
+                for k in keys:
+                    yield parsed[k] if k in parsed else next(fresh)
+
+            # Match buildings and classify batch by batch, streaming each
+            # batch's invoices to the upload job as soon as they're built
             invoices = []
             seen = set()
-            for r in raw_invoices:
-                vendor = str(r.get("vendor_name", "")).strip()
-                addr   = str(r.get("service_address", "")).strip()
-                amt    = r.get("total_amount", 0)
-                try:
-                    amt = float(str(amt).replace(",", "").replace("$", "")) 
-                except:
-                    amt = 0.0
-                if amt <= 0 or not vendor:
-                    continue
-
-                inv_num  = str(r.get("invoice_number", "")).strip()
-                inv_date = str(r.get("invoice_date", "")).strip()
-                desc     = str(r.get("description", "")).strip()
-                svc_type = str(r.get("service_type", "ONE_TIME")).upper()
-                category = str(r.get("category", "REPAIRS_GENERAL")).upper()
-                if category not in ALL_CATEGORIES:
-                    category = _classify_category(vendor, desc)
-
-                # Deduplicate
-                dedup_key = f"{vendor[:20]}|{inv_num or str(amt)}"
-                if dedup_key in seen:
-                    continue
-                seen.add(dedup_key)
-
-                # Match building
-                matched_bbl, matched_bldg, confidence = _match_building(addr)
-
-                # Annualize
-                RECURRING_CATS = {"ELEVATOR_MAINTENANCE","MANAGEMENT_FEE","UTILITIES_ELECTRIC",
-                                  "UTILITIES_GAS","UTILITIES_WATER","UTILITIES_TELECOM",
-                                  "HVAC_MAINTENANCE","EXTERMINATING","WASTE_REMOVAL",
-                                  "LANDSCAPING","LAUNDRY","CLEANING","INSURANCE"}
-                is_contract = (svc_type == "CONTRACT" or category in RECURRING_CATS or
-                               re.search(r'monthly|service agreement|annual contract|per month|/month',
-                                         desc, re.IGNORECASE))
-                annual = amt * 12 if is_contract else amt
-
-                invoices.append({
-                    "vendor": vendor,
-                    "description": desc or f"{CATEGORY_LABELS.get(category, category)} service",
-                    "amount": amt,
-                    "annual": annual,
-                    "invoice_number": inv_num,
-                    "invoice_date": inv_date,
-                    "service_type": svc_type,
-                    "raw_building": addr,
-                    "matched_bbl": matched_bbl,
-                    "matched_address": matched_bldg["address"] if matched_bldg else "",
-                    "match_confidence": confidence,
-                    "category": category,
-                    "status": "matched" if matched_bbl else "unmatched",
-                })
+            raw_count = 0
+            for raw_invoices in _batch_results():
+                raw_count += len(raw_invoices)
+                progress("match", total=raw_count)
+                emitted = len(invoices)
+                for r in raw_invoices:
+                    progress("match")
+                    vendor = str(r.get("vendor_name", "")).strip()
+                    addr   = str(r.get("service_address", "")).strip()
+                    amt    = r.get("total_amount", 0)
+                    try:
+                        amt = float(str(amt).replace(",", "").replace("$", "")) 
+                    except:
+                        amt = 0.0
+                    if amt <= 0 or not vendor:
+                        continue
+
+                    inv_num  = str(r.get("invoice_number", "")).strip()
+                    inv_date = str(r.get("invoice_date", "")).strip()
+                    desc     = str(r.get("description", "")).strip()
+                    svc_type = str(r.get("service_type", "ONE_TIME")).upper()
+                    category = str(r.get("category", "REPAIRS_GENERAL")).upper()
+                    if category not in ALL_CATEGORIES:
+                        category = _classify_category(vendor, desc)
+
+                    # Deduplicate
+                    dedup_key = f"{vendor[:20]}|{inv_num or str(amt)}"
+                    if dedup_key in seen:
+                        continue
+                    seen.add(dedup_key)
+
+                    # Match building
+                    matched_bbl, matched_bldg, confidence = _match_building(addr)
+
+                    # Annualize
+                    RECURRING_CATS = {"ELEVATOR_MAINTENANCE","MANAGEMENT_FEE","UTILITIES_ELECTRIC",
+                                      "UTILITIES_GAS","UTILITIES_WATER","UTILITIES_TELECOM",
+                                      "HVAC_MAINTENANCE","EXTERMINATING","WASTE_REMOVAL",
+                                      "LANDSCAPING","LAUNDRY","CLEANING","INSURANCE"}
+                    is_contract = (svc_type == "CONTRACT" or category in RECURRING_CATS or
+                                   re.search(r'monthly|service agreement|annual contract|per month|/month',
+                                             desc, re.IGNORECASE))
+                    annual = amt * 12 if is_contract else amt
+
+                    invoices.append({
+                        "vendor": vendor,
+                        "description": desc or f"{CATEGORY_LABELS.get(category, category)} service",
+                        "amount": amt,
+                        "annual": annual,
+                        "invoice_number": inv_num,
+                        "invoice_date": inv_date,
+                        "service_type": svc_type,
+                        "raw_building": addr,
+                        "matched_bbl": matched_bbl,
+                        "matched_address": matched_bldg["address"] if matched_bldg else "",
+                        "match_confidence": confidence,
+                        "category": category,
+                        "status": "matched" if matched_bbl else "unmatched",
+                    })
+                emit(invoices[emitted:])
 
             invoices.sort(key=lambda x: (0 if x["matched_bbl"] else 1, x["matched_address"]))
             return invoices
@@ -2792,6 +3470,7 @@ def _parse_pdf_invoices(pdf_path):
         except Exception as e:
             # If API call fails, fall through to regex parsing
             print(f"[AI parser error: {e}] Falling back to regex parser")
+            emit(reset=True)
 
     # ── FALLBACK: regex-based parser ─────────────────────────────────────────
     def _is_continuation(text):
@@ -2898,7 +3577,9 @@ def _parse_pdf_invoices(pdf_path):
         re.IGNORECASE
     )
 
+    progress("parse", 0, len(groups))
     for start_idx, group_pages in groups:
+        progress("parse")
         first_page = group_pages[0]
         all_text = "\n".join(group_pages)
 
@@ -3142,6 +3823,7 @@ def _parse_pdf_invoices(pdf_path):
 
         # ── Match building ────────────────────────────────────────────────────
         matched_bbl, matched_bldg, confidence = _match_building(raw_building)
+        progress("match")
 
         # ── Category ─────────────────────────────────────────────────────────
         category = _classify_category(vendor_name, description + " " + first_page[:500])
@@ -3161,15 +3843,19 @@ def _parse_pdf_invoices(pdf_path):
             "category": category,
             "status": "matched" if matched_bbl else "unmatched",
         })
+        emit(invoices[-1:])
 
+    progress("match", len(invoices), len(invoices))
     # Sort: matched first, then by address
     invoices.sort(key=lambda x: (0 if x["matched_bbl"] else 1, x["matched_address"]))
     return invoices
 
 
-def _parse_csv_invoices(csv_path):
-    """Parse a CSV file into invoice records."""
+def _parse_csv_invoices(csv_path, progress=None, emit=None):
+    """Parse a CSV file into invoice records (progress: "match" per row, emit each)."""
     import csv
+    progress = progress or _no_progress
+    emit = emit or _no_emit
     invoices = []
     with open(csv_path, newline='', encoding='utf-8-sig') as f:
         reader = csv.DictReader(f)
@@ -3182,6 +3868,7 @@ def _parse_csv_invoices(csv_path):
                 amount = 0
             address = row.get("Building", row.get("Address", row.get("building", "")))
             matched_bbl, matched_bldg, confidence = _match_building(address)
+            progress("match")
             category = _classify_category(vendor, row.get("Description", ""))
             invoices.append({
                 "page": i + 1,
@@ -3198,9 +3885,32 @@ def _parse_csv_invoices(csv_path):
                 "category": category,
                 "status": "matched" if matched_bbl else "unmatched",
             })
+            emit(invoices[-1:])
+    progress("match", len(invoices), len(invoices))
     return invoices
 
 
+_INVOICE_DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%m/%d/%y", "%m-%d-%Y", "%b %d, %Y", "%B %d, %Y")
+
+def _parse_invoice_date(raw):
+    """Best-effort parse of an extracted invoice date; None if unrecognised."""
+    raw = (raw or "").strip()
+    for fmt in _INVOICE_DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _display_invoice_date(iso):
+    """The ledger's YYYY-MM-DD as the MM/DD/YYYY vendor_data rows use elsewhere."""
+    try:
+        return datetime.strptime(str(iso)[:10], "%Y-%m-%d").strftime("%m/%d/%Y")
+    except ValueError:
+        return str(iso)
+
+
 @app.route("/api/commit-invoices", methods=["POST"])
 @login_required
 def commit_invoices():
@@ -3211,6 +3921,7 @@ def commit_invoices():
         return jsonify({"error": "No invoices provided"}), 400
 
     updated_buildings = {}  # bbl -> {"address": str, "vendors": [{"vendor": str, "amount": float, "category": str}]}
+    ledger_lines = []
     skipped = 0
     skip_reasons = []
 
@@ -3247,6 +3958,27 @@ def commit_invoices():
                                   inv.get("description", ""), re.IGNORECASE))
         annual = amount * 12 if is_recurring else amount
 
+        # The AI path stores "invoice_date", the regex and CSV paths "date".
+        # The line's hash uses the invoice's own date (the raw string when it
+        # can't be parsed), never today's, so re-committing on a later day
+        # is still a no-op; today only stands in as the ledger date.
+        raw_date = str(inv.get("date") or inv.get("invoice_date") or "").strip()
+        parsed_date = _parse_invoice_date(raw_date)
+        invoice_date = parsed_date or datetime.now().date()
+        ledger_lines.append({
+            "building_bbl": bbl,
+            "vendor": vendor_name,
+            "category": category,
+            "invoice_date": invoice_date,
+            "amount": round(amount, 2),
+            "invoice_number": str(inv.get("invoice_number") or ""),
+            "recurring": bool(is_recurring),
+            "source_hash": boardiq_db.invoice_source_hash(bbl, vendor_name, category,
+                                                          parsed_date or raw_date, amount,
+                                                          str(inv.get("invoice_number") or "")),
+            "data": inv,
+        })
+
         # Check if vendor already exists in building
         existing = None
         for v in building.get("vendor_data", []):
@@ -3257,7 +3989,7 @@ def commit_invoices():
         if existing:
             existing["annual"] = annual
             existing["per_unit"] = round(annual / max(units, 1))
-            existing["last_invoice_date"] = inv.get("date", "")
+            existing["last_invoice_date"] = raw_date
             existing["last_invoice_amount"] = amount
         else:
             if "vendor_data" not in building:
@@ -3269,10 +4001,11 @@ def commit_invoices():
                 "per_unit": round(annual / max(units, 1)),
                 "last_bid_year": None,
                 "months_left": None,
-                "last_invoice_date": inv.get("date", ""),
+                "last_invoice_date": raw_date,
                 "last_invoice_amount": amount,
             })
 
+        _mark_vendor_data_dirty(bbl)
         if bbl not in updated_buildings:
             updated_buildings[bbl] = {"address": building.get("address", bbl), "vendors": []}
         updated_buildings[bbl]["vendors"].append({
@@ -3283,13 +4016,21 @@ def commit_invoices():
 
         print(f"[CommitInvoice] OK — {vendor_name} → {building.get('address', bbl)} (${annual:,.0f}/yr)")
 
-    # Persist to disk so data survives restarts
-    _save_vendor_data()
+    for bbl in updated_buildings:
+        _note_building_change(bbl)
+
+    # Ledger write, TTM refresh and vendor_data save happen write-behind;
+    # ?durable=1 waits for them (and reports ledger-derived amounts)
+    if ledger_lines:
+        write_behind.submit(("invoices", uuid.uuid4().hex), _record_invoice_batch,
+                            ledger_lines, updated_buildings)
+    persisted = _durable_ack()
     if skip_reasons:
         print(f"[CommitInvoice] Skipped {len(skip_reasons)}: {'; '.join(skip_reasons[:5])}")
 
     return jsonify({
         "success": True,
+        "persisted": persisted,
         "updated": len(updated_buildings),
         "skipped": skipped,
         "buildings_detail": {addr_info["address"]: addr_info["vendors"] for addr_info in updated_buildings.values()},
@@ -3297,11 +4038,52 @@ def commit_invoices():
     })
 
 
+def _record_invoice_batch(ledger_lines, updated_buildings):
+    """Write-behind job: keep the raw lines, then let the ledger's trailing-12-month
+    view supply annual spend (the single-invoice estimate stands without a DB)."""
+    new_lines = boardiq_db.record_invoices(ledger_lines)
+    if new_lines is None and boardiq_db.has_database():
+        raise boardiq_db.WriteError(f"{len(ledger_lines)} ledger lines not recorded")
+    if new_lines is not None:
+        print(f"[CommitInvoice] Ledger: {new_lines} new of {len(ledger_lines)} lines")
+        _apply_invoice_spend(updated_buildings)
+        # Re-mark: another queued save may have flushed these before the refresh
+        for bbl in updated_buildings:
+            _mark_vendor_data_dirty(bbl)
+    _vendor_data_job()
+
+
+def _apply_invoice_spend(updated_buildings):
+    """Refresh invoice-derived vendor_data rows from the ledger's TTM aggregate."""
+    spend = boardiq_db.load_invoice_spend(list(updated_buildings))
+    for bbl, info in updated_buildings.items():
+        building = BUILDINGS_DB.get(bbl, {})
+        units = max(building.get("units", 1), 1)
+        for v in building.get("vendor_data", []):
+            agg = spend.get((bbl, v.get("vendor", "").lower(), v.get("category")))
+            if not agg:
+                continue
+            v["annual"] = round(agg["annual"], 2)
+            v["per_unit"] = round(agg["annual"] / units)
+            v["last_invoice_date"] = _display_invoice_date(agg["last_invoice_date"])
+            v["last_invoice_amount"] = agg["last_invoice_amount"]
+        _note_building_change(bbl)
+        for detail in info["vendors"]:
+            agg = next((a for (b, vendor_key, cat), a in spend.items()
+                        if b == bbl and vendor_key == detail["vendor"].lower()
+                        and CATEGORY_LABELS.get(cat, cat) == detail["category"]), None)
+            if agg:
+                detail["amount"] = round(agg["annual"], 2)
+
+
 # ── Contract Management Routes ────────────────────────────────────────────────
 @app.route("/api/upload-contract", methods=["POST"])
 @login_required
 def upload_contract():
-    """Accept contract PDF, extract text, and parse contract terms. Admin/management only."""
+    """Accept contract PDF and parse its terms in the background. Admin/management only.
+
+    Returns 202 with a job id (see upload_invoices); the job result is the
+    extracted contract fields."""
     user = DEMO_USERS.get(session.get("user_email"), {})
     if not (user.get("is_admin") or user.get("role") == "admin"):
         return jsonify({"error": "Contract uploads are restricted to management company users"}), 403
@@ -3317,77 +4099,82 @@ def upload_contract():
         tmp_path = tmp.name
     f.save(tmp_path)
 
+    job = jobs.submit("contract", session.get("user_email"), _parse_contract_upload, tmp_path, f.filename,
+                      meta={"filename": f.filename})
+    return _job_accepted(job)
+
+
+def _parse_contract_upload(tmp_path, filename, progress=None, emit=None):
+    """Extract text from an uploaded contract PDF and parse its terms."""
+    progress = progress or _no_progress
+    # Extract text from PDF
+    text = ""
     try:
-        # Extract text from PDF
+        text = "".join(pdf_extract.extract_pages(tmp_path, progress, cache=parse_cache.pages))
+    except Exception as pdf_err:
+        print(f"[contract-upload] PDF read error: {pdf_err}")
         text = ""
-        page_count = 0
+    finally:
         try:
-            import pypdf
-            reader = pypdf.PdfReader(tmp_path)
-            page_count = len(reader.pages)
-            for page in reader.pages:
-                text += page.extract_text() or ""
-        except Exception as pdf_err:
-            print(f"[contract-upload] PDF read error: {pdf_err}")
-            text = ""
-
-        os.remove(tmp_path)
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
-        # Handle empty/unreadable PDFs
-        if not text.strip():
-            return jsonify({
-                "success": True,
-                "filename": f.filename,
-                "parse_method": "none",
-                "empty_pdf": True,
-                "message": "Could not extract text from this PDF. It may be a scanned document or image-based file. Please enter the contract details manually.",
-                "vendor_name": "", "category": "", "annual_value": 0,
-                "term_years": 1, "start_date": "", "end_date": "",
-                "description": "", "auto_renew": False,
-                "cancellation_notice_days": 30, "key_terms": [],
-                "confidence": {f: "low" for f in ["vendor_name", "category", "annual_value",
-                    "start_date", "end_date", "term_years", "auto_renew",
-                    "cancellation_notice_days", "key_terms", "service_description"]},
-            })
+    # Handle empty/unreadable PDFs
+    if not text.strip():
+        return {
+            "success": True,
+            "filename": filename,
+            "parse_method": "none",
+            "empty_pdf": True,
+            "message": "Could not extract text from this PDF. It may be a scanned document or image-based file. Please enter the contract details manually.",
+            "vendor_name": "", "category": "", "annual_value": 0,
+            "term_years": 1, "start_date": "", "end_date": "",
+            "description": "", "auto_renew": False,
+            "cancellation_notice_days": 30, "key_terms": [],
+            "confidence": {f: "low" for f in ["vendor_name", "category", "annual_value",
+                "start_date", "end_date", "term_years", "auto_renew",
+                "cancellation_notice_days", "key_terms", "service_description"]},
+        }
 
-        # Try Claude AI first, fall back to regex
-        parse_method = "regex"
-        api_key = os.environ.get("ANTHROPIC_API_KEY", "")
-        result = None
+    # Try Claude AI first, fall back to regex
+    progress("parse", 0, 1)
+    parse_method = "regex"
+    api_key = os.environ.get("ANTHROPIC_API_KEY", "")
+    result = None
 
-        if api_key and text.strip():
-            try:
-                result = _call_claude_for_contract(text, api_key)
-                parse_method = "ai"
-            except Exception as ai_err:
-                print(f"[contract-ai] Claude API failed, falling back to regex: {ai_err}")
-                result = None
-
-        if result is None:
-            # Regex fallback with auto-generated confidence
-            result = _parse_contract_text(text)
-            # Generate confidence based on what regex actually found
-            confidence = {}
-            for field in ["vendor_name", "category", "annual_value", "start_date",
-                          "end_date", "term_years", "auto_renew", "cancellation_notice_days",
-                          "key_terms", "service_description"]:
-                val = result.get(field)
-                if not val or val == 0 or val == [] or val == "":
-                    confidence[field] = "low"
-                else:
-                    confidence[field] = "medium"
-            result["confidence"] = confidence
-
-        result["success"] = True
-        result["filename"] = f.filename
-        result["parse_method"] = parse_method
-        return jsonify(result)
-    except Exception as e:
+    if api_key and text.strip():
         try:
-            os.remove(tmp_path)
-        except:
-            pass
-        return jsonify({"error": str(e)}), 500
+            key = parse_cache.batch_key([text], LLM_MODEL, CONTRACT_PROMPT_VERSION)
+            result = parse_cache.llm.get([key]).get(key)
+            if result is None:
+                result = _call_claude_for_contract(text, api_key)
+                parse_cache.llm.put({key: result})
+            parse_method = "ai"
+        except Exception as ai_err:
+            print(f"[contract-ai] Claude API failed, falling back to regex: {ai_err}")
+            result = None
+
+    if result is None:
+        # Regex fallback with auto-generated confidence
+        result = _parse_contract_text(text)
+        # Generate confidence based on what regex actually found
+        confidence = {}
+        for field in ["vendor_name", "category", "annual_value", "start_date",
+                      "end_date", "term_years", "auto_renew", "cancellation_notice_days",
+                      "key_terms", "service_description"]:
+            val = result.get(field)
+            if not val or val == 0 or val == [] or val == "":
+                confidence[field] = "low"
+            else:
+                confidence[field] = "medium"
+        result["confidence"] = confidence
+    progress("parse", 1)
+
+    result["success"] = True
+    result["filename"] = filename
+    result["parse_method"] = parse_method
+    return result
 
 
 def _parse_contract_text(text):
@@ -3676,8 +4463,8 @@ def save_contract():
 
         BUILDING_CONTRACTS[contract_id] = c
 
-    # Persist to PostgreSQL if available
-    boardiq_db.save_contract(contract_id, BUILDING_CONTRACTS[contract_id])
+    # Persist to the database
+    _queue_contract_save(contract_id)
 
     return jsonify({"success": True, "contract_id": contract_id})
 
@@ -3706,8 +4493,8 @@ def request_contract():
         "urgency": "MEDIUM",
     })
 
-    # Persist to PostgreSQL if available
-    boardiq_db.save_contract(contract_id, c)
+    # Persist to the database
+    _queue_contract_save(contract_id)
 
     return jsonify({"success": True, "contract_id": contract_id})
 
@@ -3778,7 +4565,7 @@ def create_bid_request():
         category = "MANAGEMENT_FEE"  # fallback
 
     # Check for duplicate open request
-    for br in BID_REQUESTS.values():
+    for br in _get_bid_requests_for_building(bbl):
         if br["building_bbl"] == bbl and br["category"] == category and br["status"] == "open" and br.get("source_ref", "").lower() == source_ref.lower():
             return jsonify({
                 "ok": True, "duplicate": True,
@@ -3789,7 +4576,7 @@ def create_bid_request():
 
     rid = _next_bid_request_id()
     now_str = datetime.now().strftime("%Y-%m-%d")
-    BID_REQUESTS[rid] = {
+    _store_bid_request({
         "request_id": rid,
         "building_bbl": bbl,
         "category": category,
@@ -3806,7 +4593,7 @@ def create_bid_request():
         "created_date": now_str,
         "awarded_vendor_id": None,
         "awarded_bid_id": None,
-    }
+    })
     eligible = _get_eligible_vendor_count(category)
     print(f"[BidRequest] Created {rid}: {title} — {category} — {eligible} eligible vendors")
     return jsonify({
@@ -3848,11 +4635,15 @@ def award_bid_request():
     bid["mgmt_response"] = f"Bid awarded on {bid['updated_date']}"
 
     # Mark other bids for this request as lost
-    for b in VENDOR_BIDS.values():
-        if b.get("bid_request_id") == request_id and b["bid_id"] != bid_id and b["status"] not in ("won", "lost"):
+    changed = [bid]
+    for b in _get_bids_for_request(request_id):
+        if b["bid_id"] != bid_id and b["status"] not in ("won", "lost"):
             b["status"] = "lost"
             b["updated_date"] = bid["updated_date"]
             b["mgmt_response"] = "Another vendor was selected."
+            changed.append(b)
+    _store_bid_request(br)
+    _store_bids(*changed)
 
     print(f"[BidRequest] Awarded {request_id} to bid {bid_id} (vendor {bid['vendor_id']})")
     return jsonify({"ok": True, "request_id": request_id, "bid_id": bid_id})
@@ -3872,6 +4663,7 @@ def close_bid_request():
         return jsonify({"error": "Bid request not found"}), 404
 
     BID_REQUESTS[request_id]["status"] = "closed"
+    _store_bid_request(BID_REQUESTS[request_id])
     return jsonify({"ok": True, "request_id": request_id})
 
 
@@ -3884,7 +4676,7 @@ def upload_page():
     bldg_list = json.dumps([{"bbl": k, "address": v["address"]} for k,v in BUILDINGS_DB.items()])
     cat_list = json.dumps(list(CATEGORY_LABELS.items()))
     html = _build_upload_html(bldg_list, cat_list)
-    return html
+    return static_assets.externalize(html, "upload", register_new=False)
 
 
 def _build_upload_html(bldg_list_json, cat_list_json):
@@ -4027,7 +4819,34 @@ body{font-family:'Inter',sans-serif;background:var(--surface);color:var(--text);
 <script>
 const BUILDINGS = """ + bldg_list_json + """;
 const CATEGORIES = """ + cat_list_json + """;
+</script>
+
+<script>
 let invoices = [];
+let streaming = false;   // invoices still arriving from the upload job
+let parsing = '';        // its latest progress line
+
+// The upload is parsed as a background job; its invoices stream in over
+// Server-Sent Events (/api/jobs/<id>/events) so review can start at once
+function streamUploadJob(jobId, onProgress) {
+  return new Promise((resolve, reject) => {
+    const es = new EventSource('/api/jobs/' + jobId + '/events');
+    es.addEventListener('invoices', e => appendInvoices(JSON.parse(e.data)));
+    es.addEventListener('reset', () => { invoices = []; if (document.getElementById('res').classList.contains('show')) renderResults(); });
+    es.addEventListener('progress', e => onProgress(JSON.parse(e.data)));
+    es.addEventListener('done', e => { es.close(); resolve(JSON.parse(e.data)); });
+    es.addEventListener('failed', e => { es.close(); reject(new Error(JSON.parse(e.data).error || 'Upload failed')); });
+    // Streams end every few seconds and EventSource reconnects on its own;
+    // only give up if it couldn't (e.g. the job is gone)
+    es.onerror = () => { if (es.readyState === EventSource.CLOSED) reject(new Error('Lost connection to the upload job')); };
+  });
+}
+
+function jobStageText(d, labels) {
+  const st = d.stage && d.stages[d.stage];
+  if (!st) return null;
+  return `${labels[d.stage] || d.stage}... ${st.done}${st.total != null ? ' of ' + st.total : ''}`;
+}
 
 const dz = document.getElementById('dropZone');
 dz.addEventListener('dragover', e => { e.preventDefault(); dz.classList.add('drag-over'); });
@@ -4045,59 +4864,88 @@ async function uploadFile(file) {
   const fd = new FormData(); fd.append('file', file);
   try {
     const r = await fetch('/api/upload-invoices', {method:'POST', body:fd});
-    clearInterval(tick);
     const d = await r.json();
-    if(!d.success) throw new Error(d.error||'Upload failed');
-    invoices = d.invoices;
-    renderResults();
+    if(!d.job_id) throw new Error(d.error||'Upload failed');
+    invoices = []; streaming = true;
+    await streamUploadJob(d.job_id, j => {
+      const t = jobStageText(j, {extract:'Extracting pages', parse:'Parsing invoices', match:'Matching buildings'});
+      if(t) { clearInterval(tick); document.getElementById('procDetail').textContent = parsing = t; renderStats(); }
+    });
+    clearInterval(tick);
+    streaming = false; parsing = '';
+    showResults(); renderStats(); updateSum();
   } catch(e) {
     clearInterval(tick);
+    streaming = false; parsing = '';
     document.getElementById('proc').classList.remove('show');
+    document.getElementById('res').classList.remove('show');
+    document.getElementById('commitBar').style.display = 'none';
     dz.style.display = '';
     alert('Error: ' + e.message);
   }
 }
 
-function renderResults() {
+function showResults() {
   document.getElementById('proc').classList.remove('show');
   document.getElementById('res').classList.add('show');
   document.getElementById('commitBar').style.display = 'flex';
+}
 
+function renderStats() {
+  if (!document.getElementById('res').classList.contains('show')) return;
   const matched = invoices.filter(i=>i.matched_bbl&&!i.skip).length;
   const unmatched = invoices.filter(i=>!i.matched_bbl).length;
   document.getElementById('statsBar').innerHTML =
     `<span class="stat-pill green">✓ ${matched} matched</span>` +
     (unmatched ? `<span class="stat-pill red">⚠ ${unmatched} unmatched</span>` : '') +
-    `<span class="stat-pill yellow">${invoices.length} total invoices</span>`;
+    `<span class="stat-pill yellow">${invoices.length} total invoices</span>` +
+    (streaming ? `<span class="stat-pill">⏳ ${parsing || 'Parsing...'}</span>` : '');
+}
 
+function renderResults() {
+  showResults();
+  renderStats();
   const tbody = document.getElementById('tbody');
   tbody.innerHTML = '';
-  invoices.forEach((inv, idx) => {
-    const pct = Math.round((inv.match_confidence||0)*100);
-    const bc = inv.matched_bbl ? (pct>65?'matched':'low') : 'unmatched';
-    const bl = inv.matched_bbl ? (pct>65?`✓ ${pct}%`:`⚠ ${pct}%`) : '✗ No match';
-    const bldgOpts = '<option value="">— Not assigned —</option>' +
-      BUILDINGS.map(b=>`<option value="${b.bbl}"${b.bbl===inv.matched_bbl?' selected':''}>${b.address.substring(0,38)}</option>`).join('');
-    const catOpts = CATEGORIES.map(([k,v])=>`<option value="${k}"${k===inv.category?' selected':''}>${v}</option>`).join('');
-    const tr = document.createElement('tr');
-    tr.id = 'r'+idx;
-    tr.innerHTML = `
-      <td><div class="vendor-name">${inv.vendor||'—'}</div></td>
-      <td><div class="inv-num">${inv.invoice_number||'—'}</div></td>
-      <td style="font-size:11px;color:var(--muted);white-space:nowrap">${inv.date||'—'}</td>
-      <td><div class="amount-val">${inv.total||'—'}</div></td>
-      <td>
-        <span class="badge ${bc}">${bl}</span><br>
-        <select class="bldg-select" style="margin-top:4px" onchange="updBldg(${idx},this.value)">${bldgOpts}</select>
-      </td>
-      <td><select class="cat-select" onchange="updCat(${idx},this.value)">${catOpts}</select></td>
-      <td style="font-size:11px;color:var(--dim);max-width:140px">${(inv.description||'').substring(0,55)}</td>
-      <td><button class="skip-btn" id="sk${idx}" onclick="toggleSkip(${idx})">Skip</button></td>`;
-    tbody.appendChild(tr);
-  });
+  invoices.forEach((inv, idx) => tbody.appendChild(renderRow(inv, idx)));
+  updateSum();
+}
+
+// Add streamed invoices below the rows already under review
+function appendInvoices(items) {
+  const start = invoices.length;
+  invoices.push(...items);
+  if (!document.getElementById('res').classList.contains('show')) return renderResults();
+  const tbody = document.getElementById('tbody');
+  items.forEach((inv, k) => tbody.appendChild(renderRow(inv, start + k)));
+  renderStats();
   updateSum();
 }
 
+function renderRow(inv, idx) {
+  const pct = Math.round((inv.match_confidence||0)*100);
+  const bc = inv.matched_bbl ? (pct>65?'matched':'low') : 'unmatched';
+  const bl = inv.matched_bbl ? (pct>65?`✓ ${pct}%`:`⚠ ${pct}%`) : '✗ No match';
+  const bldgOpts = '<option value="">— Not assigned —</option>' +
+    BUILDINGS.map(b=>`<option value="${b.bbl}"${b.bbl===inv.matched_bbl?' selected':''}>${b.address.substring(0,38)}</option>`).join('');
+  const catOpts = CATEGORIES.map(([k,v])=>`<option value="${k}"${k===inv.category?' selected':''}>${v}</option>`).join('');
+  const tr = document.createElement('tr');
+  tr.id = 'r'+idx;
+  tr.innerHTML = `
+    <td><div class="vendor-name">${inv.vendor||'—'}</div></td>
+    <td><div class="inv-num">${inv.invoice_number||'—'}</div></td>
+    <td style="font-size:11px;color:var(--muted);white-space:nowrap">${inv.date||'—'}</td>
+    <td><div class="amount-val">${inv.total||'—'}</div></td>
+    <td>
+      <span class="badge ${bc}">${bl}</span><br>
+      <select class="bldg-select" style="margin-top:4px" onchange="updBldg(${idx},this.value)">${bldgOpts}</select>
+    </td>
+    <td><select class="cat-select" onchange="updCat(${idx},this.value)">${catOpts}</select></td>
+    <td style="font-size:11px;color:var(--dim);max-width:140px">${(inv.description||'').substring(0,55)}</td>
+    <td><button class="skip-btn" id="sk${idx}" onclick="toggleSkip(${idx})">Skip</button></td>`;
+  return tr;
+}
+
 function updBldg(i, v) { invoices[i].matched_bbl=v; const b=BUILDINGS.find(x=>x.bbl===v); invoices[i].matched_address=b?b.address:''; updateSum(); }
 function updCat(i, v) { invoices[i].category=v; }
 function toggleSkip(i) {
@@ -4113,7 +4961,7 @@ function updateSum() {
   const amt = toCommit.reduce((s,i)=>s+(i.total_amount||0),0);
   document.getElementById('commitSum').innerHTML =
     `<strong>${toCommit.length}</strong> invoices · <strong>${bldgs.size}</strong> buildings · $${amt.toLocaleString('en-US',{maximumFractionDigits:0})} total`;
-  document.getElementById('commitBtn').disabled = toCommit.length===0;
+  document.getElementById('commitBtn').disabled = toCommit.length===0 || streaming;
 }
 
 async function commit() {
@@ -5598,7 +6446,20 @@ const contractItems    = {{ contracts_json | safe }};
 const bidRequestItems  = {{ bid_requests_json | safe }};
 const isAdmin          = {{ 'true' if is_admin else 'false' }};
 const buildingBBL      = '{{ building.bbl }}';
+const taxAssessment    = {{ building.tax_assessment | tojson }};
+const peerBuildingCount = {{ benchmarks.peer_group.peer_building_count }};
+// HTML-escaped strings for building markup into innerHTML
+const buildingHtml = {
+  address:       {{ building.address | e | tojson }},
+  building_type: {{ building.building_type | e | tojson }},
+  units:         {{ building.units | e | tojson }},
+  floors:        {{ building.floors | e | tojson }},
+  year_built:    {{ building.year_built | e | tojson }},
+  peer_era:      {{ benchmarks.peer_group.era | e | tojson }},
+};
+</script>
 
+<script>
 async function createBidRequest(sourceType, sourceId, sourceRef, btn) {
   if (btn) { btn.disabled = true; btn.textContent = 'Sending...'; }
   try {
@@ -5961,8 +6822,8 @@ function openPanel(type, idx) {
         <div style="background:white;border:1px solid var(--border);border-radius:5px;padding:14px;margin:12px 0">
           <div style="font-size:10px;letter-spacing:1.5px;text-transform:uppercase;color:var(--muted);font-weight:600;margin-bottom:8px">Scope of Work — ${d.law.split(/[-—]/)[0].trim()}</div>
           <div style="font-size:12px;color:var(--dim);line-height:1.7">
-            <strong>Building:</strong> {{ building.address }}<br>
-            <strong>Type:</strong> {{ building.building_type }} · {{ building.units }} units · {{ building.floors }} floors · Built {{ building.year_built }}<br>
+            <strong>Building:</strong> ${buildingHtml.address}<br>
+            <strong>Type:</strong> ${buildingHtml.building_type} · ${buildingHtml.units} units · ${buildingHtml.floors} floors · Built ${buildingHtml.year_built}<br>
             <strong>Deadline:</strong> ${d.due_date}<br>
             <strong>Budget Range:</strong> $${d.cost_low.toLocaleString()} – $${d.cost_high.toLocaleString()}<br>
             ${details ? `<strong>Requirement:</strong> ${details.what.replace(/<[^>]+>/g, '').substring(0, 150)}…` : ''}
@@ -6049,6 +6910,27 @@ function closePanel() {
   document.getElementById('overlay').classList.remove('open');
 }
 
+// Uploads are parsed as background jobs: the POST returns a job id, then
+// /api/jobs/<id> is polled until the result is ready (see jobs.py)
+async function awaitUploadJob(resp, onProgress) {
+  let d = await resp.json();
+  if (!d.job_id) return d;
+  while (d.status !== 'done' && d.status !== 'error') {
+    await new Promise(res => setTimeout(res, 1000));
+    const r = await fetch('/api/jobs/' + d.job_id);
+    d = await r.json();
+    if (!r.ok) throw new Error(d.error || 'Upload job lost');
+    if (onProgress) onProgress(d);
+  }
+  return d.status === 'done' ? d.result : {success: false, error: d.error};
+}
+
+function jobStageText(d, labels) {
+  const st = d.stage && d.stages[d.stage];
+  if (!st) return null;
+  return `${labels[d.stage] || d.stage}... ${st.done}${st.total != null ? ' of ' + st.total : ''}`;
+}
+
 async function uploadInvoices(input) {
   const file = input.files[0];
   if (!file) return;
@@ -6059,9 +6941,13 @@ async function uploadInvoices(input) {
   resultEl.textContent = '⏳ Processing invoices...';
   try {
     const resp = await fetch('/api/upload-invoices', {method:'POST', body:formData});
-    const data = await resp.json();
+    const data = await awaitUploadJob(resp, j => {
+      const t = jobStageText(j, {extract:'⏳ Extracting pages', parse:'⏳ Parsing invoices', match:'⏳ Matching buildings'});
+      if (t) resultEl.textContent = t;
+    });
     if (data.success) {
-      resultEl.textContent = `✓ Processed ${data.records} invoice records · ${data.classification_rate}% classified · Dashboard updated`;
+      const matched = data.invoices.filter(i => i.matched_bbl).length;
+      resultEl.textContent = `✓ Parsed ${data.count} invoices · ${matched} matched to buildings`;
     } else {
       resultEl.style.background = 'var(--red-light)';
       resultEl.style.color = 'var(--red)';
@@ -6124,7 +7010,7 @@ const eduGuides = {
     buildingCallout: function() {
       const match = complianceItems.find(c => c.law.toLowerCase().includes('11') || c.law.toLowerCase().includes('fisp'));
       if (!match) return '';
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has a FISP deadline of <strong>' + match.due_date + '</strong> (' + match.months_away + ' months away). Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has a FISP deadline of <strong>' + match.due_date + '</strong> (' + match.months_away + ' months away). Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
     },
     complianceLink: 'fisp'
   },
@@ -6146,7 +7032,7 @@ const eduGuides = {
     buildingCallout: function() {
       const match = complianceItems.find(c => c.law.toLowerCase().includes('97') || c.law.toLowerCase().includes('carbon'));
       if (!match) return '';
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> faces an estimated LL97 penalty of <strong>' + match.consequence + '</strong>. Compliance deadline: ' + match.due_date + '. Network cost range for compliance work: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable filings.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> faces an estimated LL97 penalty of <strong>' + match.consequence + '</strong>. Compliance deadline: ' + match.due_date + '. Network cost range for compliance work: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable filings.</div>';
     },
     complianceLink: '97'
   },
@@ -6168,7 +7054,7 @@ const eduGuides = {
     buildingCallout: function() {
       const match = complianceItems.find(c => c.law.toLowerCase().includes('87') || c.law.toLowerCase().includes('energy audit'));
       if (!match) return '';
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has an LL87 deadline of <strong>' + match.due_date + '</strong>. Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has an LL87 deadline of <strong>' + match.due_date + '</strong>. Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
     },
     complianceLink: '87'
   },
@@ -6190,7 +7076,7 @@ const eduGuides = {
     buildingCallout: function() {
       const match = complianceItems.find(c => c.law.toLowerCase().includes('152') || c.law.toLowerCase().includes('gas'));
       if (!match) return '';
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has an LL152 deadline of <strong>' + match.due_date + '</strong>. Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has an LL152 deadline of <strong>' + match.due_date + '</strong>. Network cost range: $' + match.cost_low.toLocaleString() + '–$' + match.cost_high.toLocaleString() + ' based on ' + match.network_comps + ' comparable buildings.</div>';
     },
     complianceLink: '152'
   },
@@ -6213,7 +7099,7 @@ const eduGuides = {
       const vendor = vendorBenchmarks.find(v => v.category === 'ELEVATOR_MAINTENANCE');
       let html = '';
       if (match) {
-        html += '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has an elevator inspection deadline of <strong>' + match.due_date + '</strong> (' + match.months_away + ' months away).</div>';
+        html += '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has an elevator inspection deadline of <strong>' + match.due_date + '</strong> (' + match.months_away + ' months away).</div>';
       }
       if (vendor) {
         const pctColor = vendor.percentile > 75 ? 'var(--red)' : vendor.percentile > 50 ? 'var(--yellow)' : 'var(--green)';
@@ -6241,7 +7127,7 @@ const eduGuides = {
       const aboveMarket = vendorBenchmarks.filter(v => v.percentile > 75);
       if (aboveMarket.length === 0) return '';
       const total = aboveMarket.reduce((s,v) => s + (v.potential_savings || 0), 0);
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has <strong>' + aboveMarket.length + ' vendor categor' + (aboveMarket.length === 1 ? 'y' : 'ies') + '</strong> above the 75th percentile.' + (total > 0 ? ' Estimated annual savings opportunity: <strong>$' + total.toLocaleString() + '</strong>.' : '') + ' Check your Savings section above for details.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has <strong>' + aboveMarket.length + ' vendor categor' + (aboveMarket.length === 1 ? 'y' : 'ies') + '</strong> above the 75th percentile.' + (total > 0 ? ' Estimated annual savings opportunity: <strong>$' + total.toLocaleString() + '</strong>.' : '') + ' Check your Savings section above for details.</div>';
     }
   },
   tax: {
@@ -6259,9 +7145,9 @@ const eduGuides = {
       { heading: 'Board Tip', type: 'tip', content: 'Most tax certiorari attorneys work on contingency, so there\\'s no upfront cost to the building. They only get paid if they win. Check your Tax & Assessment section above — BoardIQ flags buildings where a review is recommended based on comparable properties.' }
     ],
     buildingCallout: function() {
-      const tax = {{ building.tax_assessment | tojson }};
+      const tax = taxAssessment;
       if (!tax) return '';
-      let html = '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has an assessed value of <strong>$' + tax.assessed_value.toLocaleString() + '</strong> (' + tax.fiscal_year + ')';
+      let html = '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has an assessed value of <strong>$' + tax.assessed_value.toLocaleString() + '</strong> (' + tax.fiscal_year + ')';
       if (tax.trend_pct_2yr > 0) html += ', up <strong>' + tax.trend_pct_2yr + '%</strong> over 2 years';
       html += '.';
       if (tax.certiorari_recommended) html += ' <strong>BoardIQ recommends a certiorari review for your building.</strong>';
@@ -6285,7 +7171,7 @@ const eduGuides = {
     buildingCallout: function() {
       const expiring = contractItems.filter(c => c.status === 'expiring_soon' || c.status === 'expired');
       if (expiring.length === 0) return '';
-      return '<div class="edu-callout">📍 <strong>Your building ({{ building.address }})</strong> has <strong>' + expiring.length + ' contract' + (expiring.length === 1 ? '' : 's') + '</strong> that ' + (expiring.length === 1 ? 'is' : 'are') + ' expiring or expired. Review them in your Contracts section above to avoid auto-renewal traps.</div>';
+      return '<div class="edu-callout">📍 <strong>Your building (' + buildingHtml.address + ')</strong> has <strong>' + expiring.length + ' contract' + (expiring.length === 1 ? '' : 's') + '</strong> that ' + (expiring.length === 1 ? 'is' : 'are') + ' expiring or expired. Review them in your Contracts section above to avoid auto-renewal traps.</div>';
     }
   }
 };
@@ -6469,7 +7355,7 @@ openPanel = function(type, idx) {
     enrichHTML += '<div style="font-size:10px;letter-spacing:1.5px;text-transform:uppercase;color:var(--muted);font-weight:600;margin-bottom:10px">Additional Context</div>';
     // Spend context
     enrichHTML += '<div style="background:var(--surface2);border:1px solid var(--border);border-radius:6px;padding:12px;margin-bottom:8px;font-size:12px;color:var(--dim);line-height:1.6">';
-    enrichHTML += '<strong>Peer comparison:</strong> Among ' + {{ benchmarks.peer_group.peer_building_count }} + ' comparable {{ benchmarks.peer_group.era }} buildings, the median spend for ' + bm.category_label + ' is <strong>$' + (bm.network_median * buildingUnits).toLocaleString() + '/yr</strong> ($' + bm.network_median + '/unit). ';
+    enrichHTML += '<strong>Peer comparison:</strong> Among ' + peerBuildingCount + ' comparable ' + buildingHtml.peer_era + ' buildings, the median spend for ' + bm.category_label + ' is <strong>$' + (bm.network_median * buildingUnits).toLocaleString() + '/yr</strong> ($' + bm.network_median + '/unit). ';
     enrichHTML += 'Your spend of $' + (bm.annual_spend||0).toLocaleString() + '/yr places you at the <strong>' + bm.percentile + 'th percentile</strong>.';
     if (bm.last_bid_year) {
       var yearsSince = new Date().getFullYear() - bm.last_bid_year;
@@ -6644,7 +7530,10 @@ function filterSidebarBldgs(q) {
   });
 }
 
+</script>
+
 {% if is_mrc_admin %}
+<script>
 // ── Add Building Drawer ──────────────────────────────────────────────
 let _pendingBuilding = null;
 
@@ -6805,11 +7694,16 @@ async function deleteBuilding(bbl, address) {
     alert('Network error: ' + err.message);
   }
 }
+</script>
 {% endif %}
 
+<script>
 // ── Upload Drawer ─────────────────────────────────────────────────────
 const D_BUILDINGS = {{ all_buildings_json | safe }};
 const D_CATEGORIES = {{ categories_json | safe }};
+</script>
+
+<script>
 let dInvoices = [];
 
 function openUploadDrawer() {
@@ -6838,8 +7732,11 @@ async function dUploadFile(file) {
   const fd = new FormData(); fd.append('file', file);
   try {
     const r = await fetch('/api/upload-invoices', { method: 'POST', body: fd });
+    const d = await awaitUploadJob(r, j => {
+      const t = jobStageText(j, {extract: 'Extracting pages', parse: 'Parsing invoices', match: 'Matching buildings'});
+      if (t) { clearInterval(tick); document.getElementById('dProcDetail').textContent = t; }
+    });
     clearInterval(tick);
-    const d = await r.json();
     if (!d.success) throw new Error(d.error || 'Upload failed');
     dInvoices = d.invoices;
     dRenderResults();
@@ -7220,8 +8117,11 @@ async function cdUploadFile(file) {
   if (cdEditingId) fd.append('contract_id', cdEditingId);
   try {
     const r = await fetch('/api/upload-contract', { method: 'POST', body: fd });
+    const d = await awaitUploadJob(r, j => {
+      const t = jobStageText(j, {extract: 'Extracting text from contract', parse: 'Parsing terms and conditions'});
+      if (t) { clearInterval(tick); document.getElementById('cdProcDetail').textContent = t; }
+    });
     clearInterval(tick);
-    const d = await r.json();
     if (!d.success) throw new Error(d.error || 'Upload failed');
     // Fill form with extracted data
     document.getElementById('cdProc').style.display = 'none';
@@ -7562,7 +8462,7 @@ def portfolio_dashboard():
     _company_name = user.get("name", "Portfolio")
     _theme = "mrc" if "madison" in _company_name.lower() else "default"
 
-    return render_template_string(PORTFOLIO_HTML,
+    return render_template("PORTFOLIO_HTML",
         portfolio=portfolio,
         buildings=buildings_data,
         user_name=session.get("user_name"),
@@ -8064,8 +8964,8 @@ def portfolio_benchmark():
     total_portfolio_annual = sum(r["total_annual"] for r in rows)
     buildings_without_data = len(all_portfolio_buildings) - len(portfolio_buildings)
 
-    return render_template_string(
-        PORTFOLIO_BENCHMARK_HTML,
+    return render_template(
+        "PORTFOLIO_BENCHMARK_HTML",
         user_name=user.get("name", ""),
         buildings=portfolio_buildings,
         all_building_count=len(all_portfolio_buildings),
@@ -8329,7 +9229,7 @@ def vendor_landing():
     else:
         total_vendor_spend = f"{total_spend / 1_000:,.0f}K"
     num_categories = len(ALL_CATEGORIES)
-    return render_template_string(VENDOR_LANDING_HTML,
+    return render_template("VENDOR_LANDING_HTML",
         total_buildings=total_buildings,
         total_units=f"{total_units:,}",
         total_vendor_spend=total_vendor_spend,
@@ -8385,12 +9285,12 @@ def vendor_dashboard():
                 if ml and ml < min_months_left:
                     min_months_left = ml
             # Count how many other vendors are interested in this building
-            competing_bids = len([b for b in VENDOR_BIDS.values()
-                                  if b["building_bbl"] == bbl and b["vendor_id"] != vid
+            building_bids = _get_bids_for_building(bbl)
+            competing_bids = len([b for b in building_bids
+                                  if b["vendor_id"] != vid
                                   and b["status"] in ("interested", "proposal_sent", "under_review")])
             # Check if vendor already has a bid on this building
-            vendor_bid = next((b for b in VENDOR_BIDS.values()
-                               if b["building_bbl"] == bbl and b["vendor_id"] == vid), None)
+            vendor_bid = next((b for b in building_bids if b["vendor_id"] == vid), None)
             # Strip vendor names — vendors must NEVER see other vendor identities or pricing.
             # Only expose building-level category spend (anonymised market data).
             category_spend = [{"category": v["category"], "annual": v.get("annual", 0)}
@@ -8414,8 +9314,8 @@ def vendor_dashboard():
     opportunities.sort(key=lambda x: (x.get("months_left") or 999, -(x.get("potential_annual") or 0)))
 
     # Vendor bids for pipeline
-    vendor_bids = _get_vendor_bids(vid)
-    # Enrich bids with building info
+    vendor_bids = [dict(b) for b in _get_vendor_bids(vid)]
+    # Enrich bids with building info (copies, so display fields aren't persisted)
     for bid in vendor_bids:
         bldg = BUILDINGS_DB.get(bid["building_bbl"], {})
         bid["building_name"] = bldg.get("name", bldg.get("address", "Unknown"))
@@ -8515,8 +9415,8 @@ def vendor_dashboard():
     for br in BID_REQUESTS.values():
         if br["status"] == "open" and br["category"] in vendor_categories:
             # Check if vendor already submitted a bid for this request
-            existing_bid = next((b for b in VENDOR_BIDS.values()
-                                 if b.get("bid_request_id") == br["request_id"] and b["vendor_id"] == vid), None)
+            existing_bid = next((b for b in _get_bids_for_request(br["request_id"])
+                                 if b["vendor_id"] == vid), None)
             vendor_bid_requests.append({
                 **br,
                 "category_label": CATEGORY_LABELS.get(br["category"], br["category"]),
@@ -8525,7 +9425,7 @@ def vendor_dashboard():
                 "existing_bid_status": existing_bid["status"] if existing_bid else None,
             })
 
-    return render_template_string(VENDOR_DASHBOARD_HTML,
+    return render_template("VENDOR_DASHBOARD_HTML",
         profile=profile,
         current_work=current_work,
         opportunities=opportunities[:30],
@@ -8618,10 +9518,10 @@ def vendor_bid():
         return jsonify({"ok": False, "error": "Missing building BBL"}), 400
 
     # Check if bid already exists for this vendor+building
-    existing = [b for b in VENDOR_BIDS.values() if b["vendor_id"] == vid and b["building_bbl"] == bbl]
+    existing = [b for b in _get_vendor_bids(vid) if b["building_bbl"] == bbl]
 
     if action == "withdraw" and existing:
-        del VENDOR_BIDS[existing[0]["bid_id"]]
+        _remove_bid(existing[0]["bid_id"])
         return jsonify({"ok": True, "message": "Bid withdrawn"})
 
     if action == "advance" and existing:
@@ -8629,6 +9529,7 @@ def vendor_bid():
         next_status = {"interested": "proposal_sent", "proposal_sent": "under_review"}.get(bid["status"], bid["status"])
         bid["status"] = next_status
         bid["updated_date"] = datetime.now().strftime("%Y-%m-%d")
+        _store_bids(bid)
         return jsonify({"ok": True, "status": next_status})
 
     if existing and action == "interest":
@@ -8647,6 +9548,7 @@ def vendor_bid():
             bid["updated_date"] = datetime.now().strftime("%Y-%m-%d")
             if bid_request_id:
                 bid["bid_request_id"] = bid_request_id
+            _store_bids(bid)
             return jsonify({"ok": True, "message": "Proposal submitted", "bid_id": bid["bid_id"]})
 
     # Create new bid
@@ -8667,7 +9569,7 @@ def vendor_bid():
     }
     if bid_request_id:
         new_bid["bid_request_id"] = bid_request_id
-    VENDOR_BIDS[bid_id] = new_bid
+    _store_bids(new_bid)
     return jsonify({"ok": True, "message": "Interest registered" if action == "interest" else "Proposal submitted", "bid_id": bid_id})
 
 
@@ -8699,8 +9601,8 @@ def vendor_upload_contract():
     # Remove request alerts
     c["alerts"] = [a for a in c.get("alerts", []) if a.get("type") not in ("missing_doc", "requested")]
 
-    # Persist to PostgreSQL if available
-    boardiq_db.save_contract(contract_id, c)
+    # Persist to the database
+    _queue_contract_save(contract_id)
 
     return jsonify({"success": True, "contract_id": contract_id})
 
@@ -10728,7 +11630,7 @@ if __name__ == "__main__":
 # In-memory vendor registry (keyed by email). In production: database.
 VENDOR_REGISTRY = {}  # email -> {vendor_id, password, profile, subscribed, sub_expires}
 # Load registered vendors from DB
-_db_registry = boardiq_db.load_all_vendor_registry()
+_db_registry = _boot_state("vendor_registry", boardiq_db.load_all_vendor_registry)
 if _db_registry:
     VENDOR_REGISTRY.update(_db_registry)
     # Also add to DEMO_USERS so login works for DB-registered vendors
@@ -10819,7 +11721,7 @@ def vendor_register():
             }
             success = f"Account created for {company}! You can now log in."
 
-    return render_template_string(VENDOR_REGISTER_HTML,
+    return render_template("VENDOR_REGISTER_HTML",
         error=error, success=success,
         all_categories=ALL_CATEGORIES,
         category_labels=CATEGORY_LABELS,
@@ -11029,3 +11931,53 @@ textarea{resize:vertical;min-height:80px}
 </div>
 </body>
 </html>"""
+
+
+# ── Page templates and their static assets ──────────────────────────────────
+# Registered at import so every worker can serve every asset URL, whichever
+# worker rendered the page that references it.
+for _name, _source in list(globals().items()):
+    if _name.endswith("_HTML") and isinstance(_source, str):
+        _PAGE_TEMPLATES[_name] = static_assets.externalize(_source, _name[:-5].lower())
+# The upload page is assembled per request; its static blocks don't depend on
+# the building/category data, so registering one rendering covers them all.
+static_assets.externalize(_build_upload_html("[]", "[]"), "upload")
+threading.Thread(target=static_assets.precompress, name="boardiq-precompress", daemon=True).start()
+
+
+@app.route("/assets/<path:filename>")
+def static_asset(filename):
+    asset = static_assets.get(filename)
+    if asset is None:
+        return "Not found", 404
+    encoding = next(e for e in asset.encodings()
+                    if e == "identity" or e in request.accept_encodings)
+    resp = app.response_class(asset.variant(encoding), content_type=asset.mimetype)
+    if encoding != "identity":
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    # The content hash is in the file name, so a URL's bytes never change
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    resp.set_etag(f"{asset.digest}-{encoding}")
+    return resp.make_conditional(request)
+
+
+# ── Write the boot snapshot (see boot_snapshot.py) ──────────────────────────
+# Only after a boot that left the database untouched: if anything was written
+# meanwhile (first-deploy seeding, another worker) the state may not match
+# any single data_version, so the next boot takes the cold path instead.
+if _BOOT_SNAPSHOT is None and boardiq_db.data_version() == _BOOT_DATA_VERSION:
+    if boot_snapshot.save({
+        "century": CENTURY_BUILDINGS,
+        "mrc": MRC_BUILDINGS,
+        "added": ADDED_BUILDINGS,
+        "deleted": DELETED_BUILDINGS,
+        "buildings": BUILDINGS_DB,
+        "bbl_normalize": BBL_NORMALIZE,
+        "vendor_bids": VENDOR_BIDS,
+        "bid_requests": BID_REQUESTS,
+        "vendor_profiles": VENDOR_PROFILES,
+        "contracts": BUILDING_CONTRACTS,
+        "vendor_registry": VENDOR_REGISTRY,
+    }, _BOOT_FINGERPRINT, _BOOT_DATA_VERSION):
+        print("[BoardIQ] Wrote boot snapshot")
@@ -0,0 +1,151 @@
+"""
+BoardIQ — Invoice address matching: full scan vs AddressIndex
+==============================================================
+Times _match_building two ways on synthetic portfolios (bench/fixtures.py)
+swapped into BUILDINGS_DB:
+
+  full scan   the old loop: aliases, then every building's address
+              normalized, tokenized and scored for each invoice
+  index       address_index.AddressIndex, as app._match_building uses it
+
+over the invoice rows' addresses plus variants (with city and zip, upper
+case, "Owners Corp" suffixes, a dropped word, a wrong street number, a
+building-name alias). Every result is checked against the full scan, and a
+sample again after a tenth of the buildings are deleted and re-added
+through app._note_building_change. The full scan is slow at 10,000
+buildings, so it runs once; the index runs --runs times.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/bench_address_index.py [--scales 100,1000,10000] [--invoices 500] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+
+
+def full_scan(raw_address, buildings, aliases, normalize, street_number):
+    """The pre-index _match_building, kept here as the reference."""
+    if not raw_address:
+        return None, None, 0
+    raw_lower = raw_address.lower().strip()
+    for alias, key_fragment in aliases.items():
+        if alias in raw_lower:
+            for bbl, bldg in buildings.items():
+                if key_fragment in bldg.get("address", "").lower():
+                    return bbl, bldg, 0.9
+    norm_input = normalize(raw_address)
+    if not norm_input or len(norm_input) < 5:
+        return None, None, 0
+    input_num = street_number(norm_input)
+    best_bbl, best_bldg, best_score = None, None, 0
+    for bbl, bldg in buildings.items():
+        norm_db = normalize(bldg.get("address", ""))
+        if not norm_db:
+            continue
+        db_num = street_number(norm_db)
+        if input_num and db_num and input_num != db_num:
+            continue
+        input_tokens = set(norm_input.split())
+        db_tokens = set(norm_db.split())
+        common = input_tokens & db_tokens
+        score = len(common) / max(len(input_tokens), len(db_tokens))
+        if input_num and input_num == db_num:
+            score += 0.3
+        if score > best_score:
+            best_bbl, best_bldg, best_score = bbl, bldg, score
+    if best_score > 0.4:
+        return best_bbl, best_bldg, round(best_score, 2)
+    return None, None, 0
+
+
+def addresses(buildings, n, aliases, seed=18):
+    rnd = random.Random(seed)
+    out = []
+    for row in fixtures.invoice_rows(buildings, n, seed=seed):
+        a = row["Building"]
+        words = a.split()
+        out.append(rnd.choice([
+            a,
+            a.upper() + ", New York, NY 10021",
+            a + " Owners Corp c/o Managing Agent",
+            " ".join(words[:1] + words[2:]),
+            f"{int(words[0]) + 2} " + " ".join(words[1:]) if words[0].isdigit() else a,
+            rnd.choice(list(aliases)),
+        ]))
+    return out
+
+
+def timed(fn, inputs, runs):
+    samples, results = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        results = [fn(a) for a in inputs]
+        samples.append((time.perf_counter() - t0) * 1e6 / len(inputs))
+    return statistics.median(samples), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="100,1000,10000")
+    parser.add_argument("--invoices", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-match-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    sys.path.insert(0, ROOT)
+    import app
+    import address_index
+
+    def scan(a):
+        return full_scan(a, app.BUILDINGS_DB, app.BUILDING_NAME_ALIASES,
+                         address_index.normalize_address, address_index.street_number)
+
+    def same(got, expected):
+        return all(g[0] == e[0] and g[1] is e[1] and g[2] == e[2] for g, e in zip(got, expected))
+
+    print(f"{args.invoices} invoice addresses; µs per match (full scan: one run, index: median of {args.runs})")
+    print(f"{'buildings':>9} {'full scan':>10} {'index':>9} {'speedup':>8} {'scored':>7} {'same':>5}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        buildings = fixtures.make_buildings(scale)
+        app.BUILDINGS_DB.clear()
+        app.BUILDINGS_DB.update(buildings)
+        app.ADDRESS_INDEX.rebuild(app.BUILDINGS_DB)
+        inputs = addresses(buildings, args.invoices, app.BUILDING_NAME_ALIASES)
+
+        slow, expected = timed(scan, inputs, 1)
+        before = app.ADDRESS_INDEX.stats()
+        fast, got = timed(app._match_building, inputs, args.runs)
+        after = app.ADDRESS_INDEX.stats()
+        scored = (after["candidates_scored"] - before["candidates_scored"]) / (len(inputs) * args.runs)
+        ok = same(got, expected)
+
+        # Delete and re-add a tenth of the buildings through the normal hook
+        for bbl in list(buildings)[::10]:
+            building = app.BUILDINGS_DB.pop(bbl)
+            app._note_building_change(bbl)
+            app.BUILDINGS_DB[bbl] = building
+            app._note_building_change(bbl)
+        sample = inputs[:100]
+        ok = ok and same([app._match_building(a) for a in sample], [scan(a) for a in sample])
+
+        print(f"{scale:>9} {slow:>10.1f} {fast:>9.1f} {slow / fast:>7.0f}x {scored:>7.1f} "
+              f"{'ok' if ok else 'WRONG':>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
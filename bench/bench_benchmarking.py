@@ -0,0 +1,109 @@
+"""
+BoardIQ — portfolio benchmarking: per-building loop vs batch engine
+====================================================================
+Benchmarks a synthetic portfolio (default 10,000 buildings, 8 vendor
+categories each) two ways:
+
+  loop   benchmark_building() once per building
+  batch  benchmark_portfolio() once over (buildings × categories) arrays
+
+and checks that the batch percentiles, statuses and savings match the
+per-building reports exactly.
+
+  python bench/bench_benchmarking.py [--buildings 10000] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarking_engine import (benchmark_building, benchmark_portfolio, get_neighborhood_cluster,
+                                 BASELINE_BENCHMARKS, NEIGHBORHOOD_CLUSTERS, PER_UNIT_CATEGORIES,
+                                 SIZE_BUCKETS)
+
+
+def make_portfolio(n, seed=13):
+    rnd = random.Random(seed)
+    hoods = [(h, "Manhattan") for hs in NEIGHBORHOOD_CLUSTERS.values() for h in hs]
+    buildings = []
+    for i in range(n):
+        neighborhood, borough = rnd.choice(hoods)
+        vendors = {}
+        for cat in rnd.sample(PER_UNIT_CATEGORIES, 8):
+            p50 = BASELINE_BENCHMARKS[cat]["by_size"]["medium"]["p50"]
+            vendors[f"Vendor {i}::{cat}"] = {"category": cat, "vendor_name": f"Vendor {i}",
+                                             "per_unit_annual": round(p50 * rnd.uniform(0.5, 1.8), 2)}
+        buildings.append({"vendor_summary": vendors, "units": rnd.randint(20, 400),
+                          "neighborhood": neighborhood, "borough": borough,
+                          "is_prewar": rnd.random() < 0.5,
+                          "building_type": rnd.choice(["coop", "condo"])})
+    return buildings
+
+
+def to_arrays(buildings):
+    col = {c: j for j, c in enumerate(PER_UNIT_CATEGORIES)}
+    spend = np.full((len(buildings), len(PER_UNIT_CATEGORIES)), np.nan)
+    for i, b in enumerate(buildings):
+        for v in b["vendor_summary"].values():
+            j = col.get(v["category"])
+            if j is not None and np.isnan(spend[i, j]):
+                spend[i, j] = v["per_unit_annual"]
+    return ([b["units"] for b in buildings], spend,
+            [get_neighborhood_cluster(b["neighborhood"], b["borough"]) for b in buildings],
+            ["prewar" if b["is_prewar"] else "postwar" for b in buildings],
+            [b["building_type"].lower() for b in buildings])
+
+
+def timed(fn, runs):
+    samples, result = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    buildings = make_portfolio(args.buildings)
+    loop_ms, reports = timed(lambda: [benchmark_building(**b) for b in buildings], args.runs)
+    prep_ms, arrays = timed(lambda: to_arrays(buildings), args.runs)
+    batch_ms, batch = timed(lambda: benchmark_portfolio(*arrays), args.runs)
+
+    # Same numbers both ways
+    col = {c: j for j, c in enumerate(PER_UNIT_CATEGORIES)}
+    for i, report in enumerate(reports):
+        assert report["size_bucket"] == SIZE_BUCKETS[batch["size_bucket"][i]]
+        assert report["total_savings_opportunity"] == round(float(batch["total_savings_opportunity"][i]), 0)
+        assert report["above_market_count"] == batch["above_market_count"][i]
+        for r in report["vendor_benchmarks"]:
+            j = col[r["category"]]
+            assert r["peer_median"] == batch["peer"][i, j, 1]
+            if r["percentile"] is not None:
+                assert r["percentile"] == batch["percentile"][i, j]
+                assert r["savings_opportunity_annual"] == batch["savings_annual"][i, j]
+
+    n = args.buildings
+    print(f"{n:,} buildings × {len(PER_UNIT_CATEGORIES)} categories, median of {args.runs} runs")
+    print(f"{'path':<24} {'ms':>9} {'µs/building':>12}")
+    for name, ms in (("loop (benchmark_building)", loop_ms), ("batch arrays", batch_ms),
+                     ("batch incl. array prep", batch_ms + prep_ms)):
+        print(f"{name:<24} {ms:>9.1f} {ms * 1000 / n:>12.2f}")
+    print(f"batch is {loop_ms / batch_ms:.0f}x faster ({loop_ms / (batch_ms + prep_ms):.0f}x incl. prep); "
+          f"results identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+BoardIQ — worker boot time: cold path vs boot snapshot
+========================================================
+Times `import app` in fresh interpreters (flask/pandas/openpyxl are imported
+first so only BoardIQ's own boot work is measured):
+
+  cold      no snapshot: exec-load century/mrc building files, merge, query DB
+  snapshot  valid .boot_snapshot: one file read + unpickle, no data queries
+
+Uses a throwaway SQLite database by default; set BOARDIQ_BENCH_DATABASE_URL
+to time against PostgreSQL instead (the tables are seeded if empty).
+
+  python bench/bench_boot.py [--runs 7]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+_CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {root!r})
+import flask, pandas, openpyxl  # framework imports are the same on both paths
+t0 = time.perf_counter()
+import app
+elapsed = (time.perf_counter() - t0) * 1000
+sys.__stdout__.write("BOOT " + json.dumps({{"ms": elapsed, "snapshot": app._BOOT_SNAPSHOT is not None}}) + "\n")
+"""
+
+
+def _boot(env):
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(root=ROOT)], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    line = next(l for l in out.splitlines() if l.startswith("BOOT "))
+    return json.loads(line[5:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-boot-")
+    snap = os.path.join(tmp, "boot.pickle")
+    env = dict(os.environ, BOARDIQ_BOOT_SNAPSHOT=snap, BOARDIQ_WRITE_BEHIND="0")
+    if os.environ.get("BOARDIQ_BENCH_DATABASE_URL"):
+        env["DATABASE_URL"] = os.environ["BOARDIQ_BENCH_DATABASE_URL"]
+        backend = "postgres"
+    else:
+        env.pop("DATABASE_URL", None)
+        env["BOARDIQ_SQLITE_PATH"] = os.path.join(tmp, "boardiq.db")
+        backend = "sqlite"
+
+    _boot(env)  # first boot seeds the database
+    results = {"cold": [], "snapshot": []}
+    for _ in range(args.runs):
+        if os.path.exists(snap):
+            os.remove(snap)
+        r = _boot(env)
+        assert not r["snapshot"]
+        results["cold"].append(r["ms"])
+        r = _boot(env)
+        assert r["snapshot"], "snapshot was not used — did the cold boot write to the DB?"
+        results["snapshot"].append(r["ms"])
+
+    print(f"import app, {args.runs} runs each ({backend}); snapshot file {os.path.getsize(snap) // 1024} KB")
+    print(f"{'path':<10} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for name, samples in results.items():
+        print(f"{name:<10} {statistics.median(samples):>10.1f} {min(samples):>8.1f} {max(samples):>8.1f}")
+    speedup = statistics.median(results["cold"]) / statistics.median(results["snapshot"])
+    print(f"snapshot boot is {speedup:.2f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
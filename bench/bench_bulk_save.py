@@ -0,0 +1,74 @@
+"""
+BoardIQ — bulk save throughput
+================================
+Rows/second for db.save_all_vendor_data (multi-row upserts) at 100k vendor
+rows, next to the old one-INSERT-per-row loop, plus the profile and contract
+bulk saves used by first-deploy seeding.
+
+Tables are wiped, so this only runs against a scratch database:
+
+  BOARDIQ_BENCH_DATABASE_URL=postgresql://... python bench/bench_bulk_save.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_commit_latency import synthetic_portfolio, VENDORS_PER_BUILDING
+
+TARGET_ROWS = 100_000
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    url = os.environ.get("BOARDIQ_BENCH_DATABASE_URL")
+    if not url:
+        print("Set BOARDIQ_BENCH_DATABASE_URL to a scratch PostgreSQL database (tables are wiped).")
+        return 1
+    os.environ["DATABASE_URL"] = url
+    import db
+    if not db.init_db():
+        return 1
+
+    portfolio = synthetic_portfolio(TARGET_ROWS // VENDORS_PER_BUILDING)
+    rows = [db._vendor_row(bbl, v) for bbl, b in portfolio.items() for v in b["vendor_data"]]
+
+    def row_at_a_time():
+        conn = db._get_conn()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM vendor_data")
+            for row in rows:
+                cur.execute(f"INSERT INTO vendor_data ({', '.join(db._VENDOR_COLUMNS)}) "
+                            f"VALUES ({', '.join(['%s'] * len(row))})", row)
+            conn.commit()
+        finally:
+            db._put_conn(conn)
+
+    profiles = {f"vb{i:05d}": {"company_name": f"Vendor {i}", "categories": ["CLEANING"]}
+                for i in range(10_000)}
+    contracts = {f"cb{i:05d}": {"building_bbl": f"bench_{i:06d}", "vendor_name": f"Vendor {i}",
+                                "annual_value": 12000, "key_terms": ["Net 30"]}
+                 for i in range(10_000)}
+
+    results = [
+        ("vendor_data row-at-a-time", len(rows), _timed(row_at_a_time)),
+        ("vendor_data bulk", len(rows), _timed(lambda: db.save_all_vendor_data(portfolio))),
+        ("vendor_profiles bulk", len(profiles), _timed(lambda: db.save_all_vendor_profiles(profiles))),
+        ("building_contracts bulk", len(contracts), _timed(lambda: db.save_all_contracts(contracts))),
+    ]
+    print(f"{'path':<28} {'rows':>8} {'seconds':>8} {'rows/s':>10}")
+    for name, n, secs in results:
+        print(f"{name:<28} {n:>8} {secs:>8.2f} {n / secs:>10,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+BoardIQ — invoice commit latency vs portfolio size
+====================================================
+Compares the legacy full-table rewrite (db.save_all_vendor_data) with the
+dirty-tracked path (db.save_vendor_data_for_buildings) that a one-invoice
+/api/commit-invoices now takes, across growing synthetic portfolios.
+
+The vendor_data table is wiped, so this only runs against a scratch database:
+
+  BOARDIQ_BENCH_DATABASE_URL=postgresql://... python bench/bench_commit_latency.py
+"""
+
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SIZES = (100, 1000, 5000)
+VENDORS_PER_BUILDING = 12
+REPEATS = 5
+
+
+def synthetic_portfolio(n_buildings):
+    """{bbl: {"units", "vendor_data": [...]}} shaped like BUILDINGS_DB."""
+    cats = ["ELEVATOR_MAINTENANCE", "CLEANING", "EXTERMINATING", "INSURANCE",
+            "WASTE_REMOVAL", "LANDSCAPING", "MANAGEMENT_FEE", "PLUMBING_REPAIRS",
+            "HVAC_MAINTENANCE", "SECURITY", "FIRE_SAFETY", "ROOFING"]
+    portfolio = {}
+    for i in range(n_buildings):
+        units = 40 + (i * 7) % 300
+        portfolio[f"bench_{i:06d}"] = {
+            "units": units,
+            "vendor_data": [
+                {"vendor": f"Vendor {j}", "category": cats[j % len(cats)],
+                 "annual": 1000.0 * (j + 1), "per_unit": round(1000.0 * (j + 1) / units),
+                 "last_bid_year": 2020, "months_left": 6}
+                for j in range(VENDORS_PER_BUILDING)
+            ],
+        }
+    return portfolio
+
+
+def _median_ms(fn):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    url = os.environ.get("BOARDIQ_BENCH_DATABASE_URL")
+    if not url:
+        print("Set BOARDIQ_BENCH_DATABASE_URL to a scratch PostgreSQL database (vendor_data is wiped).")
+        return 1
+    os.environ["DATABASE_URL"] = url
+    import db
+    if not db.init_db():
+        return 1
+
+    print(f"{'buildings':>10} {'rows':>8} {'full rewrite ms':>16} {'dirty commit ms':>16}")
+    for n in SIZES:
+        portfolio = synthetic_portfolio(n)
+        db.save_all_vendor_data(portfolio)
+        target = next(iter(portfolio))
+
+        def one_invoice_commit():
+            vendors = portfolio[target]["vendor_data"]
+            vendors[0]["annual"] += 1
+            db.save_vendor_data_for_buildings({target: vendors})
+
+        full_ms = _median_ms(lambda: db.save_all_vendor_data(portfolio))
+        dirty_ms = _median_ms(one_invoice_commit)
+        print(f"{n:>10} {n * VENDORS_PER_BUILDING:>8} {full_ms:>16.1f} {dirty_ms:>16.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
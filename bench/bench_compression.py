@@ -0,0 +1,72 @@
+"""
+BoardIQ — response sizes and compression cost per page
+=======================================================
+Fetches the main pages, their /assets files and a large invoice-review JSON
+payload through the Flask test client with Accept-Encoding set to identity,
+gzip and br (br only if the brotli package is installed), and reports bytes
+on the wire, server time and the transfer time at a given link speed.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/bench_compression.py [--runs 20] [--mbps 5]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mbps", type=float, default=5.0, help="link speed for the transfer-time column")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-gz-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    sys.path.insert(0, ROOT)
+    import app
+    import compression
+    from flask import jsonify
+
+    # Same shape as a large /api/upload-invoices response
+    invoices = [{"vendor": f"Vendor {i % 40}", "category": "ELEVATOR_MAINTENANCE",
+                 "total_amount": 1000 + i, "invoice_date": "2025-01-15",
+                 "description": "Monthly service contract", "matched_bbl": "bldg_004",
+                 "confidence": 0.92, "page": i} for i in range(5000)]
+    app.app.add_url_rule("/_bench/invoices", "_bench_invoices",
+                         lambda: jsonify({"invoices": invoices, "count": len(invoices)}))
+
+    client = app.app.test_client()
+    client.post("/login", data={"email": "century@boardiq.com", "password": "century"})
+    dashboard = client.get("/dashboard").get_data(as_text=True)
+    urls = ["/dashboard", "/portfolio", "/vendors", "/_bench/invoices"]
+    urls += sorted(set(re.findall(r'"(/assets/[^"]+)"', dashboard)))
+
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+    print(f"{'url':<48} {'encoding':<9} {'bytes':>9} {'p50 ms':>7} {'wire ms':>8}")
+    for url in urls:
+        for enc in encodings:
+            samples, size = [], 0
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                r = client.get(url, headers={"Accept-Encoding": enc})
+                size = len(r.get_data())
+                samples.append((time.perf_counter() - t0) * 1000)
+            wire_ms = size * 8 / (args.mbps * 1e6) * 1000
+            print(f"{url[:48]:<48} {enc:<9} {size:>9,} {statistics.median(samples):>7.2f} {wire_ms:>8.1f}")
+    print(json.dumps(compression.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+BoardIQ — LLM batch dispatch: sequential vs concurrent, with 429s
+==================================================================
+Starts a local stand-in for the Messages API that answers after a simulated
+latency and rejects a fraction of calls with 429 + Retry-After. It then
+parses a synthetic 300-page invoice bundle (20 batches of 15 pages) through
+_call_claude_for_invoices at several pool widths:
+
+  width 1   the old sequential loop
+  width N   llm_dispatch.map_batches, rate-limited by a token bucket
+
+Each run checks that the merged invoices come back in page order. A final run
+goes end to end through _parse_pdf_invoices on a generated PDF.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/bench_llm_dispatch.py [--pages 300] [--latency 0.5] [--p429 0.15]
+                                     [--widths 1,4,8] [--rate 8] [--burst 4]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+
+_PAGE_RE = re.compile(r"--- PAGE \d+ ---\n(.*?)(?=\n\n--- PAGE |\Z)", re.S)
+
+
+def make_handler(latency, p429, seed=19):
+    rnd = random.Random(seed)
+    lock = threading.Lock()
+    counts = {"requests": 0, "429": 0}
+
+    class StandIn(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                counts["requests"] += 1
+                reject = rnd.random() < p429
+                delay = latency * rnd.uniform(0.7, 1.3)
+            if reject:
+                with lock:
+                    counts["429"] += 1
+                self.send_response(429)
+                self.send_header("Retry-After", "0.5")
+                self.end_headers()
+                return
+            time.sleep(delay)
+            invoices = []
+            for page in _PAGE_RE.findall(body["messages"][0]["content"]):
+                lines = page.split("\n")
+                fields = dict(l.split(": ", 1) for l in lines if ": " in l)
+                invoices.append({
+                    "vendor_name": lines[0],
+                    "service_address": lines[lines.index("Ship To:") + 1],
+                    "total_amount": fields["Total Due"].lstrip("$").replace(",", ""),
+                    "invoice_date": fields["Invoice Date"],
+                    "invoice_number": fields["Invoice #"],
+                    "service_type": "ONE_TIME",
+                    "description": lines[lines.index("Description") + 1],
+                    "category": "OTHER",
+                })
+            data = json.dumps({"content": [{"type": "text", "text": json.dumps(invoices)}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return StandIn, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.5, help="stand-in seconds per call")
+    parser.add_argument("--p429", type=float, default=0.15, help="fraction of calls rejected with 429")
+    parser.add_argument("--widths", default="1,4,8")
+    parser.add_argument("--rate", type=float, default=8.0, help="token bucket calls/second")
+    parser.add_argument("--burst", type=float, default=4.0)
+    args = parser.parse_args()
+
+    handler, counts = make_handler(args.latency, args.p429)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-llm-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0",
+                      ANTHROPIC_API_KEY="bench", BOARDIQ_LLM_RATE=str(args.rate),
+                      BOARDIQ_LLM_BURST=str(args.burst),
+                      ANTHROPIC_API_URL=f"http://127.0.0.1:{server.server_port}/v1/messages")
+    sys.path.insert(0, ROOT)
+    import app
+    import llm_dispatch
+
+    rows = fixtures.invoice_rows(fixtures.make_buildings(200), args.pages)
+    pages = [fixtures.invoice_page(r) for r in rows]
+    expected = [r["Invoice Number"] for r in rows]
+    batches = [pages[i:i + 15] for i in range(0, len(pages), 15)]
+
+    print(f"{args.pages} pages in {len(batches)} batches; stand-in latency {args.latency}s, "
+          f"{args.p429:.0%} 429s; bucket {args.rate}/s burst {args.burst}")
+    print(f"{'width':>5} {'seconds':>8} {'calls':>6} {'429s':>5} {'order':>6}")
+    for width in (int(w) for w in args.widths.split(",")):
+        before = dict(counts)
+        bucket = llm_dispatch.TokenBucket(args.rate, args.burst)
+        t0 = time.perf_counter()
+        results = llm_dispatch.map_batches(lambda b: app._call_claude_for_invoices(b, "bench"),
+                                           batches, width=width, bucket=bucket)
+        elapsed = time.perf_counter() - t0
+        got = [inv["invoice_number"] for batch in results for inv in batch]
+        print(f"{width:>5} {elapsed:>8.2f} {counts['requests'] - before['requests']:>6} "
+              f"{counts['429'] - before['429']:>5} {'ok' if got == expected else 'WRONG':>6}")
+
+    pdf = os.path.join(tmp, "bundle.pdf")
+    fixtures.write_pdf(pdf, pages)
+    t0 = time.perf_counter()
+    invoices = app._parse_pdf_invoices(pdf)
+    print(f"\n_parse_pdf_invoices end to end (width {llm_dispatch.CONCURRENCY}): "
+          f"{time.perf_counter() - t0:.2f}s, {len(invoices)} invoices")
+    print(json.dumps(llm_dispatch.stats()))
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+BoardIQ — PDF re-upload with the parse cache
+=============================================
+Runs _parse_pdf_invoices three times against the local Messages API stand-in
+from bench_llm_dispatch.py:
+
+  cold        a fresh invoice bundle, nothing cached
+  identical   the same PDF uploaded again
+  edited      the same bundle with --changed pages rewritten
+
+and reports wall time, API calls and pages actually extracted for each, and
+whether the invoices match a parse with the cache off. A last run with a
+cache budget smaller than one bundle checks that eviction keeps the table
+under its limit.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/bench_parse_cache.py [--pages 300] [--changed 2] [--latency 0.3]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+from bench_llm_dispatch import make_handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--changed", type=int, default=2, help="pages rewritten for the edited run")
+    parser.add_argument("--latency", type=float, default=0.3, help="stand-in seconds per call")
+    args = parser.parse_args()
+
+    handler, counts = make_handler(args.latency, 0.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-cache-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0",
+                      ANTHROPIC_API_KEY="bench", BOARDIQ_LLM_RATE="0",
+                      ANTHROPIC_API_URL=f"http://127.0.0.1:{server.server_port}/v1/messages")
+    sys.path.insert(0, ROOT)
+    import app
+    import parse_cache
+    import pdf_extract
+
+    rows = fixtures.invoice_rows(fixtures.make_buildings(200), args.pages)
+    pages = [fixtures.invoice_page(r) for r in rows]
+    bundle = os.path.join(tmp, "bundle.pdf")
+    fixtures.write_pdf(bundle, pages)
+    edited_rows = [dict(r) for r in rows]
+    for i in range(0, args.pages, max(args.pages // max(args.changed, 1), 1))[:args.changed]:
+        edited_rows[i]["Amount"] = "999.99"
+    edited = os.path.join(tmp, "edited.pdf")
+    fixtures.write_pdf(edited, [fixtures.invoice_page(r) for r in edited_rows])
+
+    def run(path):
+        calls, extracted = counts["requests"], pdf_extract.stats()
+        t0 = time.perf_counter()
+        invoices = app._parse_pdf_invoices(path)
+        elapsed = time.perf_counter() - t0
+        after = pdf_extract.stats()
+        return (invoices, elapsed, counts["requests"] - calls,
+                (after["pages"] - extracted["pages"]) - (after["cached_pages"] - extracted["cached_pages"]))
+
+    saved = parse_cache.MAX_BYTES
+    parse_cache.MAX_BYTES = 0
+    expected = {bundle: run(bundle)[0], edited: run(edited)[0]}
+    parse_cache.MAX_BYTES = saved
+
+    print(f"{args.pages} pages, stand-in latency {args.latency}s")
+    print(f"{'run':<10} {'seconds':>8} {'API calls':>10} {'extracted':>10} {'same':>5}")
+    for name, path in (("cold", bundle), ("identical", bundle), ("edited", edited)):
+        invoices, elapsed, calls, extracted = run(path)
+        print(f"{name:<10} {elapsed:>8.2f} {calls:>10} {extracted:>10} "
+              f"{'ok' if invoices == expected[path] else 'WRONG':>5}")
+
+    conn = app.boardiq_db._get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT COALESCE(SUM(bytes), 0) FROM parse_cache")
+    full = cur.fetchone()[0]
+    parse_cache.MAX_BYTES = full // 2
+    parse_cache.put("page", {"bench-extra": "x" * 100})
+    cur.execute("SELECT COALESCE(SUM(bytes), 0), COUNT(*) FROM parse_cache")
+    size, entries = cur.fetchone()
+    conn.commit()
+    app.boardiq_db._put_conn(conn)
+    print(f"\neviction: {full:,} bytes cached; budget {parse_cache.MAX_BYTES:,} → "
+          f"{size:,} bytes in {entries} entries ({'ok' if size <= parse_cache.MAX_BYTES else 'OVER'})")
+    print(json.dumps(parse_cache.stats()))
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
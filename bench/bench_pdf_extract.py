@@ -0,0 +1,78 @@
+"""
+BoardIQ — PDF text extraction: in-process vs process pool
+==========================================================
+Generates synthetic invoice bundles (one invoice per page, bench/fixtures.py)
+and times pdf_extract.extract_pages on each:
+
+  in-process   every page extracted serially, the old loop
+  pool N       page-range shards extracted on N processes
+
+The pool is started and warmed before timing, as it would be in a worker
+that has already handled one large upload. Each run checks the pages come
+back identical and in order.
+
+  python bench/bench_pdf_extract.py [--pages 50,300,1000] [--workers 2,4] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures
+import pdf_extract
+
+
+def timed(path, runs):
+    samples, pages = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        pages = pdf_extract.extract_pages(path, threshold=0)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="50,300,1000")
+    parser.add_argument("--workers", default="2,4")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-pdf-")
+    sizes = [int(p) for p in args.pages.split(",")]
+    rows = fixtures.invoice_rows(fixtures.make_buildings(200), max(sizes))
+    paths = {}
+    for n in sizes:
+        paths[n] = os.path.join(tmp, f"bundle-{n}.pdf")
+        fixtures.write_pdf(paths[n], [fixtures.invoice_page(r) for r in rows[:n]])
+
+    print(f"{os.cpu_count()} CPUs; median of {args.runs} runs")
+    print(f"{'pages':>6} {'mode':>12} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'order':>6}")
+    baseline, expected = {}, {}
+    for n in sizes:
+        pdf_extract.WORKERS = 1
+        seconds, expected[n] = timed(paths[n], args.runs)
+        baseline[n] = seconds
+        print(f"{n:>6} {'in-process':>12} {seconds:>8.3f} {n / seconds:>8.0f} {'1.00x':>8} {'ok':>6}")
+    for w in (int(w) for w in args.workers.split(",")):
+        pdf_extract._reset_pool()
+        pdf_extract.WORKERS = w
+        pdf_extract.extract_pages(paths[sizes[0]], threshold=0)   # start the pool
+        for n in sizes:
+            seconds, pages = timed(paths[n], args.runs)
+            ok = pages == expected[n]
+            print(f"{n:>6} {f'pool {w}':>12} {seconds:>8.3f} {n / seconds:>8.0f} "
+                  f"{baseline[n] / seconds:>7.2f}x {'ok' if ok else 'WRONG':>6}")
+    pdf_extract._reset_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
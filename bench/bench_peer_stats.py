@@ -0,0 +1,102 @@
+"""
+BoardIQ — network peer statistics: update/query cost and sketch accuracy
+=========================================================================
+Feeds a synthetic network (default 10,000 buildings) into a PeerStatsStore
+and reports:
+
+  build     time to add every building's per-category spend
+  update    time to swap one building's contribution (an invoice commit)
+  query     quantiles() for every building × category, cold then cached
+  accuracy  worst relative error of sketch p25–p90 against exact
+            percentiles of the same peer groups (numpy, "lower" method)
+
+  python bench/bench_peer_stats.py [--buildings 10000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import peer_stats
+from benchmarking_engine import BASELINE_BENCHMARKS, CLUSTER_MULTIPLIERS, PER_UNIT_CATEGORIES
+
+
+def make_network(n, seed=14):
+    rnd = random.Random(seed)
+    network = []
+    for i in range(n):
+        group = (rnd.choice(["small", "medium", "large"]), rnd.choice(list(CLUSTER_MULTIPLIERS)),
+                 rnd.choice(["prewar", "postwar"]), rnd.choice(["coop", "condo"]))
+        values = {c: BASELINE_BENCHMARKS[c]["by_size"][group[0]]["p50"] * rnd.lognormvariate(0, 0.35)
+                  for c in rnd.sample(PER_UNIT_CATEGORIES, 10)}
+        network.append((f"b{i}", group, values))
+    return network
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=10000)
+    args = parser.parse_args()
+
+    network = make_network(args.buildings)
+    store = peer_stats.PeerStatsStore()
+
+    t0 = time.perf_counter()
+    for bid, group, values in network:
+        store.update_building(bid, group, values)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    def query_all():
+        t = time.perf_counter()
+        for _bid, group, _values in network:
+            for c in PER_UNIT_CATEGORIES:
+                store.quantiles(c, group)
+        return (time.perf_counter() - t) * 1e6 / (len(network) * len(PER_UNIT_CATEGORIES))
+
+    cold_us = query_all()
+    warm_us = query_all()
+
+    rnd = random.Random(1)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        bid, group, values = network[rnd.randrange(len(network))]
+        values = dict(values, **{next(iter(values)): rnd.uniform(10, 2000)})
+        store.update_building(bid, group, values)
+    update_us = (time.perf_counter() - t0) * 1000
+
+    # Accuracy: rebuild exact samples for each exact peer group that qualifies
+    exact = {}
+    for _bid, group, values in network:
+        for c, v in store._contrib[_bid][1].items():
+            exact.setdefault((c, group), []).append(v)
+    worst = 0.0
+    checked = 0
+    for (c, group), samples in exact.items():
+        q = store.quantiles(c, group)
+        if q is None or q["level"] != "exact":
+            continue
+        arr = np.sort(samples)
+        for name, frac in peer_stats.QUANTILES:
+            truth = arr[int(frac * (len(arr) - 1))]
+            worst = max(worst, abs(q[name] - truth) / truth)
+        checked += 1
+
+    print(f"{args.buildings:,} buildings, {len(PER_UNIT_CATEGORIES)} categories, min peers {store.min_peers}")
+    print(f"build              {build_ms:9.1f} ms total")
+    print(f"update one bldg    {update_us:9.1f} µs")
+    print(f"query (cold)       {cold_us:9.2f} µs per building × category")
+    print(f"query (cached)     {warm_us:9.2f} µs per building × category")
+    print(f"accuracy           worst {worst:.2%} over {checked} exact peer groups "
+          f"(bound {peer_stats.RELATIVE_ACCURACY:.0%})")
+    print(store.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
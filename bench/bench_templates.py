@@ -0,0 +1,108 @@
+"""
+BoardIQ — /dashboard latency: per-request compile vs compiled-template cache
+=============================================================================
+Logs in with the Flask test client and times GET /dashboard end to end:
+
+  recompile  the template cache is cleared before every request, which is
+             what render_template_string did (parse + compile ~3k lines)
+  cached     templates compiled once per process and reused
+
+Also reports the first-request cost in a fresh worker with and without the
+on-disk bytecode cache (BOARDIQ_JINJA_CACHE_DIR).
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/bench_templates.py [--requests 200]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+_CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {root!r})
+import app
+client = app.app.test_client()
+client.post("/login", data={{"email": "century@boardiq.com", "password": "century"}})
+t0 = time.perf_counter()
+assert client.get("/dashboard").status_code == 200
+sys.__stdout__.write("FIRST " + json.dumps((time.perf_counter() - t0) * 1000) + "\n")
+"""
+
+
+def _pct(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def _time_requests(client, n, before=None):
+    samples = []
+    for _ in range(n):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        r = client.get("/dashboard")
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.status_code
+    return samples
+
+
+def _first_request(env):
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(root=ROOT)], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    line = next(l for l in out.splitlines() if l.startswith("FIRST "))
+    return json.loads(line[6:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=3, help="fresh processes for the first-request figures")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-tpl-")
+    env = dict(os.environ, BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+               BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    for key in ("DATABASE_URL", "BOARDIQ_JINJA_CACHE_DIR"):
+        env.pop(key, None)
+        os.environ.pop(key, None)
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    import app
+
+    client = app.app.test_client()
+    client.post("/login", data={"email": "century@boardiq.com", "password": "century"})
+    client.get("/dashboard")  # warm data caches on both paths
+
+    results = {
+        "recompile": _time_requests(client, args.requests, before=app.app.jinja_env.cache.clear),
+        "cached": _time_requests(client, args.requests),
+    }
+
+    print(f"GET /dashboard, {args.requests} requests each")
+    print(f"{'path':<10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for name, samples in results.items():
+        print(f"{name:<10} {_pct(samples, 50):>8.2f} {_pct(samples, 99):>8.2f} {statistics.mean(samples):>8.2f}")
+    print(f"p50 speedup {_pct(results['recompile'], 50) / _pct(results['cached'], 50):.2f}x")
+
+    # First request in a fresh worker: compile from source vs load bytecode
+    _first_request(env)  # seed the database
+    cold = [_first_request(env) for _ in range(args.workers)]
+    bc_env = dict(env, BOARDIQ_JINJA_CACHE_DIR=os.path.join(tmp, "jinja"))
+    _first_request(bc_env)  # populate the bytecode cache
+    warm = [_first_request(bc_env) for _ in range(args.workers)]
+    print(f"first /dashboard in a new worker: compile {statistics.median(cold):.1f} ms, "
+          f"bytecode cache {statistics.median(warm):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
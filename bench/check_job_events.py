@@ -0,0 +1,143 @@
+"""
+BoardIQ — Job event stream from another worker
+===============================================
+/api/jobs/<id>/events has to stream an upload's invoices while the job runs,
+whichever gunicorn worker a (re)connection lands on. This starts a second
+process that plays the worker running the job (a fake upload emitting a few
+invoices at a time) and serves the stream from this process, which only
+sees the job through the database. It checks that
+
+  - invoices arrive while the job is still running
+  - a reconnect with Last-Event-ID resumes where the first stream stopped
+  - the invoices received end up exactly the job's result
+
+and exits 1 otherwise.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/check_job_events.py [--items 40] [--batch 4] [--pause 0.3]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+OWNER = "century@boardiq.com"
+
+
+def fake_upload(n, batch, pause, progress, emit):
+    """Shaped like app._run_invoice_upload: emits batches, returns the sorted list."""
+    invoices = []
+    progress("match", 0, n)
+    for start in range(0, n, batch):
+        time.sleep(pause)
+        new = [{"vendor": f"Vendor {i}", "amount": 100.0 + i} for i in range(start, min(n, start + batch))]
+        invoices.extend(new)
+        emit(new)
+        progress("match", len(invoices), n)
+    invoices.sort(key=lambda inv: -inv["amount"])
+    return {"success": True, "invoices": invoices, "count": len(invoices)}
+
+
+def worker(args):
+    """The other worker: run one job and report its id."""
+    sys.path.insert(0, ROOT)
+    import jobs
+    import app  # noqa: F401  (same boot as a real worker)
+    job = jobs.submit("invoices", OWNER, fake_upload, args.items, args.batch, args.pause)
+    print(f"JOB {job.id}", flush=True)
+    jobs.wait(job.id)
+    return 0
+
+
+def read_events(response, stop_after=None):
+    """[(event, data, id)] from an SSE response, optionally closing it after
+    `stop_after` invoices events."""
+    events, buf, seen = [], "", 0
+    for chunk in response.response:
+        buf += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while "\n\n" in buf:
+            block, buf = buf.split("\n\n", 1)
+            fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+            if "event" in fields:
+                events.append((fields["event"], json.loads(fields["data"]), fields.get("id")))
+                seen += fields["event"] == "invoices"
+        if stop_after is not None and seen >= stop_after:
+            break
+    response.close()
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--pause", type=float, default=0.3)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-events-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    sys.path.insert(0, ROOT)
+    import app
+    import jobs
+
+    other = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker",
+                              "--items", str(args.items), "--batch", str(args.batch), "--pause", str(args.pause)],
+                             stdout=subprocess.PIPE, text=True)
+    job_id = None
+    for line in other.stdout:
+        if line.startswith("JOB "):
+            job_id = line.split()[1]
+            break
+    if job_id is None:
+        print("the other worker did not start a job")
+        return 1
+
+    client = app.app.test_client()
+    client.post("/login", data={"email": OWNER, "password": "century"})
+    url = f"/api/jobs/{job_id}/events"
+    # First connection drops after two invoices events, like a stream cut off
+    # mid-job; the reconnect resumes from the last event id it got
+    first = read_events(client.get(url, buffered=False), stop_after=2)
+    status_then = (jobs.get(job_id) or {}).get("status")
+    last_id = next((e[2] for e in reversed(first) if e[2]), "")
+    second = read_events(client.get(url, headers={"Last-Event-ID": last_id}, buffered=False))
+    other.wait(timeout=60)
+
+    failures = []
+    if job_id in jobs._jobs:
+        failures.append("the job ran in this process, not the other worker")
+    if status_then != "running":
+        failures.append(f"the first invoices only arrived once the job was {status_then}")
+    received = []
+    for event, data, _id in first + second:
+        if event == "reset":
+            received = []
+        elif event == "invoices":
+            received.extend(data)
+    if not any(e[0] == "done" for e in second):
+        failures.append("the resumed stream did not reach done")
+    result = (jobs.get(job_id) or {}).get("result") or {}
+    key = lambda inv: inv["vendor"]
+    if sorted(received, key=key) != sorted(result.get("invoices", []), key=key):
+        failures.append(f"received {len(received)} invoices, the result has {result.get('count')}")
+
+    print(f"job {job_id}: {len(received)} invoices; job {status_then} when the first stream "
+          f"dropped, resumed from {last_id or '(none)'}")
+    for f in failures:
+        print(f"FAIL: {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+BoardIQ — Category classifier golden check
+===========================================
+The three category classifiers (app._classify_category,
+InvoiceProcessor.classify_vendor and yardi_import._classify) each have
+their own rule order and tie-breaking, and the invoices, benchmarks and
+Yardi imports already stored depend on them. classify_golden.json holds a
+few thousand inputs with the category each classifier gave for them; this
+script re-runs the classifiers over those inputs and reports any change.
+
+The corpus is every keyword the three rule tables use, variants of each
+(embedded in a word, pluralised, upper case, across a line break), random
+combinations of two or three keywords from different categories (which
+exercise the priority order) and the vendors in bench/fixtures.py.
+
+  python bench/classify_golden.py            check against classify_golden.json
+  python bench/classify_golden.py --write    regenerate it (only when a rule
+                                             change is meant to move results)
+
+It also times each classifier over the corpus, first with an empty memo and
+then again with the memo warm.
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import time
+import random
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classify_golden.json")
+
+FILLER = ["inc", "llc", "corp.", "services", "monthly", "invoice", "repair", "for", "the", "bldg",
+          "5th floor", "annual", "contract", "#1042", "labor and material", "co"]
+GL_CODES = ["5812", "5831", "5803", "5852", "5810", "5806", "5828", "5865", "5870", "6510", "5837",
+            "5999", "6100", ""]
+
+
+def _strings(path, names):
+    """String constants in the named functions/assignments of a source file."""
+    with open(os.path.join(ROOT, path)) as f:
+        tree = ast.parse(f.read())
+    out = []
+    for node in ast.walk(tree):
+        name = getattr(node, "name", None)
+        if isinstance(node, ast.Assign):
+            name = next((t.id for t in node.targets if isinstance(t, ast.Name)), None)
+        if name in names:
+            out.extend(n.value for n in ast.walk(node)
+                       if isinstance(n, ast.Constant) and isinstance(n.value, str))
+    return out
+
+
+def _as_text(keyword):
+    """A plain string that the keyword (literal or simple regex) matches."""
+    text = keyword.replace(r"\b", "").replace(r"\.", ".")
+    text = re.sub(r"\((\w+)\|\w+\)\?", r"\1", text)
+    return text.replace("s?", "s")
+
+
+def keywords():
+    words = _strings("app.py", {"_classify_category"})
+    words += _strings("invoice_pipeline.py", {"CATEGORIES", "classify_vendor"})
+    words += _strings("yardi_import.py", {"ACCOUNT_NAME_KEYWORDS"})
+    words = [_as_text(w) for w in words if w and w == w.lower() and not w.startswith(("_", " "))]
+    return sorted(set(w for w in words if re.search(r"[a-z]", w) and len(w) < 40))
+
+
+def corpus(seed=18):
+    import fixtures
+    rnd = random.Random(seed)
+    words = keywords()
+    texts = []
+    for w in words:
+        texts += [w, f"acme {w.upper()} {rnd.choice(FILLER)}", f"x{w}s", w.replace(" ", "\n")]
+    for _ in range(600):
+        picked = rnd.sample(words, rnd.choice((2, 2, 3)))
+        parts = picked + rnd.sample(FILLER, 2)
+        rnd.shuffle(parts)
+        texts.append(" ".join(parts))
+    for _cat, vendor, desc, acct in fixtures.VENDORS:
+        texts += [vendor, desc, acct]
+    texts += ["", " ", "misc", "n/a", "12345", "Consolidated Edison Co. of NY", "Con Ed Gas",
+              "Fox Rothschild LLP", "LRWOF bldg 2", "Otis Elevator\nMonthly service"]
+
+    cases = []
+    for t in texts:
+        split = rnd.randrange(len(t) + 1)
+        cases.append({"vendor": t[:split].strip(), "description": t[split:].strip()})
+        cases.append({"account": t, "gl": rnd.choice(GL_CODES)})
+    seen, unique = set(), []
+    for c in cases:
+        key = json.dumps(c, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            unique.append(c)
+    return unique
+
+
+def classifiers():
+    import app
+    import yardi_import
+    from invoice_pipeline import InvoiceProcessor
+    processor = InvoiceProcessor()
+    return {
+        "app": lambda c: app._classify_category(c["vendor"], c["description"]),
+        "pipeline": lambda c: processor.classify_vendor(c["vendor"], c["description"]),
+        "yardi": lambda c: yardi_import._classify(c["account"], c["gl"] or None),
+    }
+
+
+def _applies(name, case):
+    return ("account" in case) == (name == "yardi")
+
+
+def _clear_memos():
+    import classifier
+    classifier.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write", action="store_true", help="regenerate classify_golden.json")
+    args = parser.parse_args()
+
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.setdefault("BOARDIQ_SQLITE_PATH", os.path.join(os.environ.get("TMPDIR", "/tmp"),
+                                                              "boardiq-classify.db"))
+    os.environ.update(BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    fns = classifiers()
+
+    if args.write:
+        cases = corpus()
+        for c in cases:
+            c["expected"] = {name: fn(c) for name, fn in fns.items() if _applies(name, c)}
+        with open(GOLDEN, "w") as f:
+            f.write("[\n")
+            f.write(",\n".join(json.dumps(c, sort_keys=True) for c in cases))
+            f.write("\n]\n")
+        print(f"wrote {len(cases)} cases to {os.path.relpath(GOLDEN)}")
+        return 0
+
+    with open(GOLDEN) as f:
+        cases = json.load(f)
+    failures = 0
+    print(f"{len(cases)} cases")
+    print(f"{'classifier':<10} {'checked':>8} {'changed':>8} {'cold µs/op':>11} {'warm µs/op':>11}")
+    for name, fn in fns.items():
+        mine = [c for c in cases if _applies(name, c)]
+        try:
+            _clear_memos()
+        except ImportError:
+            pass
+        t0 = time.perf_counter()
+        got = [fn(c) for c in mine]
+        cold = (time.perf_counter() - t0) / len(mine) * 1e6
+        t0 = time.perf_counter()
+        for c in mine:
+            fn(c)
+        warm = (time.perf_counter() - t0) / len(mine) * 1e6
+        changed = [(c, g) for c, g in zip(mine, got) if g != c["expected"][name]]
+        failures += len(changed)
+        print(f"{name:<10} {len(mine):>8} {len(changed):>8} {cold:>11.1f} {warm:>11.1f}")
+        for c, g in changed[:10]:
+            inputs = {k: v for k, v in c.items() if k != "expected"}
+            print(f"    {json.dumps(inputs)}: {c['expected'][name]} -> {g}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+BoardIQ — synthetic benchmark fixtures
+=======================================
+Deterministic stand-ins for the data BoardIQ handles, at any scale:
+
+  make_buildings(n)        BUILDINGS_DB-shaped records with vendor_data
+  invoice_rows(bldgs, n)   invoice line items against those buildings
+  write_csv(path, rows)    the CSV invoice upload format
+  invoice_page(row)        one invoice page laid out the way the regex PDF
+                           parser expects (vendor line, Ship To, totals)
+  write_pdf(path, pages)   a minimal text PDF that pypdf can extract
+  write_yardi_xlsx(path, bldgs)
+                           a multi-property Yardi Expense Distribution export
+
+Used by bench/suite.py and the other bench/ scripts; nothing here touches the
+app's own data.
+"""
+
+import os
+import sys
+import csv
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarking_engine import BASELINE_BENCHMARKS, NEIGHBORHOOD_CLUSTERS
+
+# (category, vendor, invoice description, Yardi account name)
+VENDORS = [
+    ("ELEVATOR_MAINTENANCE", "Apex Elevator Company", "Monthly elevator maintenance", "Elevator Maintenance"),
+    ("EXTERMINATING", "Citywide Exterminating Inc.", "Monthly pest control service", "Exterminator"),
+    ("CLEANING", "Brightline Cleaning Services LLC", "Porter and janitorial service", "Cleaning Contract"),
+    ("WASTE_REMOVAL", "Metro Carting Corp.", "Weekly waste removal and recycling", "Trash Removal"),
+    ("INSURANCE", "Harbor Insurance Brokers LLC", "General liability insurance premium", "Insurance - Liability"),
+    ("PLUMBING_REPAIRS", "Riverside Plumbing & Heating Corp.", "Repair leaking riser, 5th floor", "Plumbing Repairs"),
+    ("LANDSCAPING", "Greenway Landscaping Inc.", "Seasonal planting and garden care", "Landscaping"),
+    ("WATER_TREATMENT", "Clearwater Treatment Services", "Cooling tower water treatment", "Water Treatment"),
+    ("MANAGEMENT_FEE", "Parkview Property Management LLC", "Managing agent fee", "Property Management Fee"),
+    ("FIRE_SAFETY", "Sentinel Fire Alarm Co.", "Annual fire alarm inspection", "Fire Alarm Service"),
+    ("HVAC_MAINTENANCE", "Northstar Mechanical Corp.", "Boiler service and HVAC tune-up", "Boiler Maintenance"),
+    ("SECURITY", "Guardian Security Services Inc.", "Lobby concierge coverage", "Security Staff"),
+]
+
+_CATEGORY_INDEX = {v[0]: j for j, v in enumerate(VENDORS)}
+
+_STREETS = ["East {n}th Street", "West {n}th Street", "{n}th Avenue", "Park Avenue", "Riverside Drive",
+            "Broadway", "Madison Avenue", "West End Avenue", "Lexington Avenue", "Amsterdam Avenue"]
+
+
+def _address(rnd):
+    street = rnd.choice(_STREETS).format(n=rnd.randint(4, 120))
+    return f"{rnd.randint(1, 2400)} {street}"
+
+
+def make_buildings(n, seed=18):
+    """{bbl: building} for n synthetic buildings, each with 6–12 vendors."""
+    rnd = random.Random(seed)
+    hoods = [h for hs in NEIGHBORHOOD_CLUSTERS.values() for h in hs]
+    buildings, addresses = {}, set()
+    for i in range(n):
+        address = _address(rnd)
+        while address in addresses:
+            address = _address(rnd)
+        addresses.add(address)
+        units = rnd.randint(12, 420)
+        vendor_data = []
+        for category, vendor, _desc, _acct in rnd.sample(VENDORS, rnd.randint(6, 12)):
+            by_size = BASELINE_BENCHMARKS.get(category, {}).get("by_size", {})
+            p50 = by_size.get("medium", {}).get("p50", 300)
+            per_unit = round(p50 * rnd.uniform(0.5, 1.8))
+            vendor_data.append({"vendor": vendor, "category": category, "annual": per_unit * units,
+                                "per_unit": per_unit, "last_bid_year": rnd.choice([None, 2018, 2021, 2023]),
+                                "months_left": rnd.choice([None, 3, 9, 18])})
+        bbl = f"fx_{i:05d}"
+        buildings[bbl] = {
+            "id": bbl, "bbl": bbl, "address": address, "borough": "Manhattan",
+            "neighborhood": rnd.choice(hoods), "units": units, "floors": rnd.randint(5, 40),
+            "year_built": rnd.randint(1890, 2015), "building_type": rnd.choice(["Coop", "Condo"]),
+            "vendor_data": vendor_data,
+        }
+    return buildings
+
+
+def invoice_rows(buildings, n, seed=18):
+    """n invoice line items; about one in ten names an address no building has."""
+    rnd = random.Random(seed)
+    bldgs = list(buildings.values())
+    rows = []
+    for i in range(n):
+        category, vendor, desc, _acct = rnd.choice(VENDORS)
+        address = _address(rnd) if rnd.random() < 0.1 else rnd.choice(bldgs)["address"]
+        rows.append({"Vendor": vendor, "Amount": f"{rnd.uniform(150, 25000):,.2f}", "Building": address,
+                     "Description": desc, "Invoice Number": f"INV-{100000 + i}",
+                     "Invoice Date": f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/2025"})
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def invoice_page(row):
+    """Text of one single-page invoice for an invoice_rows() row."""
+    return "\n".join([
+        row["Vendor"],
+        "PO Box 1200, New York, NY 10001",
+        f"Invoice #: {row['Invoice Number']}",
+        f"Invoice Date: {row['Invoice Date']}",
+        "Bill To: Board of Managers",
+        "Ship To:",
+        row["Building"],
+        "New York, NY 10021",
+        "Description",
+        row["Description"],
+        f"Subtotal ${row['Amount']}",
+        f"Total Due: ${row['Amount']}",
+        "Thank you for your business",
+    ])
+
+
+def _pdf_text(s):
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+def write_pdf(path, pages):
+    """Write pages (strings, one line per text line) as a PDF with one page each."""
+    n = len(pages)
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               ("<< /Type /Pages /Kids [%s] /Count %d >>"
+                % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n)).encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    for i, text in enumerate(pages):
+        lines = b" T* ".join(b"(" + _pdf_text(line) + b") Tj" for line in text.split("\n"))
+        stream = b"BT /F1 10 Tf 12 TL 50 760 Td " + lines + b" ET"
+        objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                        "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)).encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_yardi_xlsx(path, buildings, seed=18):
+    """A multi-property Expense Distribution (Paid Only) export, one section per building."""
+    import openpyxl
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    def row(*cells):
+        ws.append(cells)
+
+    for i, building in enumerate(buildings.values()):
+        row("Expense Distribution (Paid Only)")
+        row(str(1000 + i))
+        row("Period: From 01/2025 to 12/2025")
+        row("GL", "Account", "Check", "Payee", *[None] * 7, "Amount")
+        for v in building["vendor_data"]:
+            j = _CATEGORY_INDEX[v["category"]]
+            acct = VENDORS[j][3]
+            row(f"{5900 + j}-0000", acct)
+            for _ in range(rnd.randint(2, 12)):
+                row(None, None, str(rnd.randint(10000, 99999)), v["vendor"], *[None] * 7,
+                    round(v["annual"] / 12 * rnd.uniform(0.8, 1.2), 2))
+            row(f"Total {acct}")
+    wb.save(path)
@@ -0,0 +1,264 @@
+"""
+BoardIQ — hot-path microbenchmark suite
+========================================
+Times the request-path and ingestion hot spots against synthetic portfolios
+of 100, 1,000 and 10,000 buildings (bench/fixtures.py), swapped into
+BUILDINGS_DB in place of the seeded data:
+
+  benchmark_building          the engine, one call per building
+  compute_benchmarks          app wrapper incl. peer stats, cache cleared first
+  compute_benchmarks_cached   same, every building already cached
+  _match_building             invoice address → building
+  _classify_category          vendor + description → category
+  _parse_csv_invoices         a 100-row invoice CSV
+  _parse_pdf_invoices         regex branch (no API key) on a 50-page PDF
+  parse_multi_building_report a Yardi export with one section per 10 buildings
+  dashboard                   GET /dashboard through the Flask test client
+
+Each case runs once to warm up, then --runs times; the median per operation
+is reported. --out writes the results as JSON, and --compare BASELINE.json
+prints the change against an earlier run and exits 1 if any case got slower
+by more than --threshold.
+
+Uses a throwaway SQLite database and no boot snapshot.
+
+  python bench/suite.py [--scales 100,1000,10000] [--runs 3] [--only match,dashboard]
+                        [--out results.json] [--compare baseline.json] [--threshold 0.15]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+
+CASES = []
+
+
+def case(fn):
+    """Register a case: fn(ctx) returns (callable, operations per call)."""
+    CASES.append(fn)
+    return fn
+
+
+def _sample(ctx, k):
+    return list(ctx["buildings"].items())[:k]
+
+
+@case
+def benchmark_building(ctx):
+    app = ctx["app"]
+    calls = []
+    for _bbl, b in _sample(ctx, 500):
+        vendor_flat, last_bids, _group = app._benchmark_inputs(b)
+        calls.append(dict(vendor_summary=vendor_flat, units=b["units"], last_bid_years=last_bids,
+                          neighborhood=b["neighborhood"], borough=b["borough"],
+                          is_prewar=app._is_prewar(b), building_type=b["building_type"]))
+
+    def run():
+        for kwargs in calls:
+            app.benchmark_building(**kwargs)
+    return run, len(calls)
+
+
+@case
+def compute_benchmarks(ctx):
+    app = ctx["app"]
+    sample = _sample(ctx, 500)
+
+    def run():
+        app._BENCHMARK_CACHE.clear()
+        for bbl, b in sample:
+            app.compute_benchmarks(b, bbl)
+    return run, len(sample)
+
+
+@case
+def compute_benchmarks_cached(ctx):
+    app = ctx["app"]
+    sample = _sample(ctx, 500)
+    for bbl, b in sample:
+        app.compute_benchmarks(b, bbl)
+
+    def run():
+        for bbl, b in sample:
+            app.compute_benchmarks(b, bbl)
+    return run, len(sample)
+
+
+@case
+def _match_building(ctx):
+    app = ctx["app"]
+    addresses = [r["Building"] for r in fixtures.invoice_rows(ctx["buildings"], 50)]
+
+    def run():
+        for a in addresses:
+            app._match_building(a)
+    return run, len(addresses)
+
+
+@case
+def _classify_category(ctx):
+    app = ctx["app"]
+    rnd = random.Random(18)
+    pairs = [(vendor, desc) for _cat, vendor, desc, _acct in
+             (rnd.choice(fixtures.VENDORS) for _ in range(2000))]
+
+    def run():
+        for vendor, desc in pairs:
+            app._classify_category(vendor, desc)
+    return run, len(pairs)
+
+
+@case
+def _parse_csv_invoices(ctx):
+    app = ctx["app"]
+    path = os.path.join(ctx["tmp"], f"invoices-{ctx['scale']}.csv")
+    fixtures.write_csv(path, fixtures.invoice_rows(ctx["buildings"], 100))
+    return (lambda: app._parse_csv_invoices(path)), 1
+
+
+@case
+def _parse_pdf_invoices(ctx):
+    app = ctx["app"]
+    path = os.path.join(ctx["tmp"], f"invoices-{ctx['scale']}.pdf")
+    fixtures.write_pdf(path, [fixtures.invoice_page(r) for r in fixtures.invoice_rows(ctx["buildings"], 50)])
+    return (lambda: app._parse_pdf_invoices(path)), 1
+
+
+@case
+def parse_multi_building_report(ctx):
+    import yardi_import
+    path = os.path.join(ctx["tmp"], f"yardi-{ctx['scale']}.xlsx")
+    sections = dict(_sample(ctx, max(1, ctx["scale"] // 10)))
+    fixtures.write_yardi_xlsx(path, sections)
+    return (lambda: yardi_import.parse_multi_building_report(path)), 1
+
+
+@case
+def dashboard(ctx):
+    client = ctx["client"]
+    bbls = [bbl for bbl, _b in _sample(ctx, 20)]
+
+    def run():
+        for bbl in bbls:
+            with client.session_transaction() as s:
+                s["active_building"] = bbl
+            r = client.get("/dashboard")
+            assert r.status_code == 200, r.status_code
+    return run, len(bbls)
+
+
+def install(app, peer_stats, buildings):
+    """Swap the synthetic portfolio in for the seeded buildings."""
+    app.BUILDINGS_DB.clear()
+    app.BUILDINGS_DB.update(buildings)
+    app.BBL_NORMALIZE.clear()
+    app._BENCHMARK_CACHE.clear()
+    app.NETWORK_PEER_STATS = peer_stats.PeerStatsStore()
+    app._rebuild_peer_stats()
+
+
+def measure(fn, ops, runs):
+    fn()
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6 / ops)
+    return {"median_us": round(statistics.median(samples), 2), "min_us": round(min(samples), 2),
+            "ops": ops, "runs": runs}
+
+
+def compare(results, baseline, threshold):
+    """Print new vs baseline per case; return the number of regressions."""
+    regressions = 0
+    print(f"\n{'case':<42} {'baseline µs':>12} {'now µs':>12} {'change':>8}")
+    for key, new in results.items():
+        old = baseline.get("results", {}).get(key)
+        if old is None:
+            print(f"{key:<42} {'—':>12} {new['median_us']:>12.2f} {'new':>8}")
+            continue
+        change = new["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key:<42} {old['median_us']:>12.2f} {new['median_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="100,1000,10000")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--only", default="", help="comma-separated substrings of case names")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON from an earlier --out")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="slowdown counted as a regression (default 0.15 = 15%%)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="boardiq-suite-")
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.pop("ANTHROPIC_API_KEY", None)   # _parse_pdf_invoices takes the regex branch
+    os.environ.update(BOARDIQ_SQLITE_PATH=os.path.join(tmp, "boardiq.db"),
+                      BOARDIQ_BOOT_SNAPSHOT="off", BOARDIQ_WRITE_BEHIND="0")
+    sys.path.insert(0, ROOT)
+    import app
+    import peer_stats
+
+    client = app.app.test_client()
+    client.post("/login", data={"email": "admin@boardiq.com", "password": "admin"})
+
+    only = [s for s in args.only.split(",") if s]
+    cases = [c for c in CASES if not only or any(s in c.__name__ for s in only)]
+    results = {}
+    for scale in (int(s) for s in args.scales.split(",")):
+        buildings = fixtures.make_buildings(scale)
+        install(app, peer_stats, buildings)
+        ctx = {"app": app, "client": client, "buildings": buildings, "scale": scale, "tmp": tmp}
+        for c in cases:
+            fn, ops = c(ctx)
+            key = f"{c.__name__}@{scale}"
+            results[key] = measure(fn, ops, args.runs)
+            print(f"{key:<42} {results[key]['median_us']:>12.2f} µs/op  (min {results[key]['min_us']:.2f}, "
+                  f"{ops} ops × {args.runs} runs)", flush=True)
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    report = {
+        "meta": {"date": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "scales": args.scales, "runs": args.runs},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
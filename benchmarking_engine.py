@@ -7,14 +7,18 @@ Compares a building's vendor pricing against a curated peer group:
   • Same era (pre-war vs post-war)
   • Same ownership type (co-op vs condo)
 
-In production: peer_data comes from the aggregated invoice database.
-In MVP/demo: uses realistic seed data with peer-group-specific pricing.
+Peer percentiles come from the network's own vendor data (peer_stats.py)
+when a peer group has enough buildings; otherwise from realistic seed data
+with peer-group-specific pricing (BASELINE_BENCHMARKS × multipliers).
 All values are per-unit-per-year in dollars unless noted.
 """
 
 import json
+from datetime import datetime
 from typing import Optional
 
+import numpy as np
+
 # ── Neighborhood clusters ─────────────────────────────────────────────────────
 # Neighborhoods are grouped into clusters that share similar real estate
 # dynamics and vendor pricing. Pricing adjusts by cluster.
@@ -93,9 +97,21 @@ def get_size_bucket(units: int) -> str:
         return "large"
 
 
+def peer_group_key(units: int, neighborhood: str, borough: str,
+                   is_prewar: bool, building_type: str) -> tuple:
+    """(size bucket, cluster, era, type) — the key of a peer_stats peer group."""
+    return (get_size_bucket(units), get_neighborhood_cluster(neighborhood, borough),
+            "prewar" if is_prewar else "postwar", building_type.lower())
+
+
 def get_peer_group_description(units: int, neighborhood: str, borough: str,
-                                is_prewar: bool, building_type: str) -> dict:
-    """Build a human-readable description of the peer group used for comparison."""
+                                is_prewar: bool, building_type: str,
+                                peer_count: Optional[int] = None) -> dict:
+    """Build a human-readable description of the peer group used for comparison.
+
+    peer_count: real number of peer buildings, when known (see peer_stats.py);
+    otherwise a seeded estimate is reported.
+    """
     cluster = get_neighborhood_cluster(neighborhood, borough)
     size = get_size_bucket(units)
     era = "pre-war" if is_prewar else "post-war"
@@ -124,7 +140,7 @@ def get_peer_group_description(units: int, neighborhood: str, borough: str,
         "QNS_PRIME":{"small": 74,  "medium": 49, "large": 21},
         "BX_SI":    {"small": 61,  "medium": 38, "large": 14},
     }
-    peer_n = peer_counts.get(cluster, {}).get(size, 45)
+    peer_n = peer_count if peer_count is not None else peer_counts.get(cluster, {}).get(size, 45)
 
     return {
         "cluster": cluster,
@@ -382,17 +398,146 @@ def get_status(percentile: int) -> dict:
                 "color": "green", "icon": "✓", "action_recommended": False}
 
 
+# ── Batch engine ──────────────────────────────────────────────────────────────
+# benchmark_portfolio() benchmarks every building × category at once. The
+# arithmetic mirrors apply_peer_multiplier / calculate_percentile / get_status
+# operation for operation (same evaluation order, half-even rounding, int()
+# truncation), so its numbers are bit-identical to the scalar helpers.
+
+SIZE_BUCKETS = ("small", "medium", "large")
+
+# Categories benchmarked per unit, in BASELINE_BENCHMARKS order — the column
+# order of every (buildings × categories) array below
+PER_UNIT_CATEGORIES = [c for c, b in BASELINE_BENCHMARKS.items()
+                       if b["unit"] == "per_unit_annual"]
+
+# (size bucket, category, [p25, p50, p75, p90]) baseline table
+_BASELINE_TABLE = np.array([
+    [[BASELINE_BENCHMARKS[c]["by_size"].get(size, BASELINE_BENCHMARKS[c]["by_size"]["medium"])[p]
+      for p in ("p25", "p50", "p75", "p90")]
+     for c in PER_UNIT_CATEGORIES]
+    for size in SIZE_BUCKETS], dtype=np.float64)
+
+# Status codes, in dashboard sort order
+ABOVE_MARKET, SLIGHTLY_ABOVE, AT_MARKET, BELOW_MARKET, NO_DATA = range(5)
+_STATUS_BY_CODE = [get_status(90), get_status(70), get_status(50), get_status(0),
+                   {"status": "NO_DATA", "label": "No Data", "color": "gray"}]
+
+
+def _lookup(values, table, default=1.0):
+    """table.get(value, default) for each key, as a float array."""
+    return np.array([table.get(k, default) for k in values], dtype=np.float64)
+
+
+def benchmark_portfolio(units, spend, clusters, eras, building_types, peer=None) -> dict:
+    """
+    Benchmark a whole portfolio in one pass.
+
+    units          : (N,) residential unit counts
+    spend          : (N, C) per-unit annual spend, columns in PER_UNIT_CATEGORIES
+                     order; NaN where the building has no vendor in a category
+    clusters       : (N,) neighborhood cluster keys (see get_neighborhood_cluster)
+    eras           : (N,) "prewar" / "postwar"
+    building_types : (N,) lower-cased "coop" / "condo"
+    peer           : optional (N, C, 4) network p25/p50/p75/p90 (see
+                     network_peer_values); NaN entries use the seeded values
+
+    Returns (N, C) arrays peer (N, C, 4 — p25/p50/p75/p90), has_data,
+    percentile, status (codes above), annual_spend, savings_per_unit and
+    savings_annual, plus per-building (N,) size_bucket (index into
+    SIZE_BUCKETS), multiplier, total_annual_spend, total_savings_opportunity,
+    above_market_count and at_or_below_count. Entries without data hold 0.
+    """
+    units = np.asarray(units, dtype=np.float64)
+    spend = np.asarray(spend, dtype=np.float64).reshape(len(units), len(PER_UNIT_CATEGORIES))
+
+    size_idx = np.where(units < 50, 0, np.where(units < 125, 1, 2))
+    multiplier = (_lookup(clusters, CLUSTER_MULTIPLIERS)
+                  * _lookup(eras, ERA_MULTIPLIERS)
+                  * _lookup(building_types, TYPE_MULTIPLIERS))
+    seeded = np.round(_BASELINE_TABLE[size_idx] * multiplier[:, None, None])
+    if peer is None:
+        peer = seeded
+    else:
+        peer = np.asarray(peer, dtype=np.float64).reshape(seeded.shape)
+        peer = np.where(np.isnan(peer), seeded, peer)
+    p25, p50, p75, p90 = peer[..., 0], peer[..., 1], peer[..., 2], peer[..., 3]
+
+    has_data = ~np.isnan(spend)
+    v = np.where(has_data, spend, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentile = np.select(
+            [v <= p25, v <= p50, v <= p75, v <= p90],
+            [np.maximum(5, np.trunc(25 * v / p25)),
+             np.trunc(25 + 25 * (v - p25) / (p50 - p25)),
+             np.trunc(50 + 25 * (v - p50) / (p75 - p50)),
+             np.trunc(75 + 15 * (v - p75) / (p90 - p75))],
+            np.minimum(99, np.trunc(90 + 9 * (v - p90) / (p90 * 0.3))))
+    percentile = np.where(has_data, percentile, 0).astype(np.int64)
+
+    status = np.select([percentile >= 80, percentile >= 60, percentile >= 40],
+                       [ABOVE_MARKET, SLIGHTLY_ABOVE, AT_MARKET], BELOW_MARKET)
+    status = np.where(has_data, status, NO_DATA).astype(np.int8)
+    action = status <= SLIGHTLY_ABOVE
+
+    annual_spend = v * units[:, None]
+    savings_per_unit = np.where(has_data, np.maximum(0, v - p50), 0.0)
+    savings_annual = np.round(savings_per_unit * units[:, None], 0)
+
+    # cumsum adds strictly left to right, category by category as the scalar
+    # loop did, so the float totals come out identical (np.sum reorders)
+    total_spend = np.cumsum(annual_spend, axis=1)[:, -1]
+    total_savings = np.cumsum(np.where(action, savings_annual, 0.0), axis=1)[:, -1]
+
+    return {
+        "size_bucket": size_idx,
+        "multiplier": multiplier,
+        "peer": peer.astype(np.int64),
+        "has_data": has_data,
+        "percentile": percentile,
+        "status": status,
+        "annual_spend": annual_spend,
+        "savings_per_unit": savings_per_unit,
+        "savings_annual": savings_annual,
+        "total_annual_spend": total_spend,
+        "total_savings_opportunity": total_savings,
+        "above_market_count": action.sum(axis=1),
+        "at_or_below_count": ((status == AT_MARKET) | (status == BELOW_MARKET)).sum(axis=1),
+    }
+
+
+def _as(value, integral):
+    """Python int or float, matching the type the scalar arithmetic produced."""
+    return int(value) if integral else float(value)
+
+
+def network_peer_values(quantiles: Optional[dict]) -> list:
+    """[p25, p50, p75, p90] from PeerStatsStore.quantiles(), as whole dollars,
+    strictly increasing and positive so calculate_percentile never divides
+    by zero. NaNs (use the seeded values) when quantiles is None."""
+    if quantiles is None:
+        return [np.nan] * 4
+    values, floor = [], 1
+    for name in ("p25", "p50", "p75", "p90"):
+        v = max(round(quantiles[name]), floor)
+        values.append(v)
+        floor = v + 1
+    return values
+
+
 def benchmark_building(vendor_summary: dict, units: int = 100,
                         last_bid_years: Optional[dict] = None,
                         neighborhood: str = "Upper West Side",
                         borough: str = "Manhattan",
                         is_prewar: bool = True,
-                        building_type: str = "coop") -> dict:
+                        building_type: str = "coop",
+                        peer_stats=None) -> dict:
     """
     Main benchmarking function.
 
     Takes the output of invoice_pipeline.aggregate_by_vendor() and returns
     a complete benchmarking report against the building's specific peer group.
+    The numbers come from benchmark_portfolio() on a one-building portfolio.
 
     vendor_summary : {category: {vendor_name, total_annual, per_unit_annual}}
     units          : residential unit count
@@ -401,35 +546,48 @@ def benchmark_building(vendor_summary: dict, units: int = 100,
     borough        : Manhattan / Brooklyn / Queens / Bronx / Staten Island
     is_prewar      : True if building was built before 1945
     building_type  : "coop" or "condo"
+    peer_stats     : optional peer_stats.PeerStatsStore; categories whose peer
+                     group has enough network data are benchmarked against it
     """
-    size_bucket = get_size_bucket(units)
+    group = peer_group_key(units, neighborhood, borough, is_prewar, building_type)
+    network = [None] * len(PER_UNIT_CATEGORIES)
+    peer_count = None
+    if peer_stats is not None:
+        network = [peer_stats.quantiles(c, group) for c in PER_UNIT_CATEGORIES]
+        n = peer_stats.peer_count(group)
+        if n >= peer_stats.min_peers:
+            peer_count = n
     peer_group = get_peer_group_description(units, neighborhood, borough,
-                                             is_prewar, building_type)
-    multiplier = peer_group["multiplier"]
-
+                                             is_prewar, building_type, peer_count)
+    n_peers = peer_group["peer_building_count"]
+
+    # First vendor entry per category wins
+    by_category = {}
+    for data in vendor_summary.values():
+        by_category.setdefault(data.get("category"), data)
+    spends = [by_category[c].get("per_unit_annual", 0) if c in by_category else None
+              for c in PER_UNIT_CATEGORIES]
+
+    batch = benchmark_portfolio(
+        [units], [[np.nan if s is None else s for s in spends]],
+        [group[1]], [group[2]], [group[3]],
+        peer=None if peer_stats is None else [[network_peer_values(q) for q in network]])
+    peer = batch["peer"][0].tolist()
+    row = {k: batch[k][0].tolist() for k in
+           ("status", "percentile", "annual_spend", "savings_per_unit", "savings_annual")}
+
+    int_units = isinstance(units, int)
     results = []
-    total_savings_opportunity = 0
-    total_annual_spend = 0
-
-    for category, baseline in BASELINE_BENCHMARKS.items():
-        if baseline["unit"] != "per_unit_annual":
-            continue
-
-        raw_bench = baseline["by_size"].get(size_bucket,
-                                             baseline["by_size"]["medium"])
-        bench = apply_peer_multiplier(raw_bench, multiplier)
-        p25, p50, p75, p90 = bench["p25"], bench["p50"], bench["p75"], bench["p90"]
-
-        # Find this category in the building's vendor data
-        building_spend = None
-        vendor_name = None
-        for key, data in vendor_summary.items():
-            if data.get("category") == category:
-                building_spend = data.get("per_unit_annual", 0)
-                vendor_name = data.get("vendor_name", "Unknown")
-                break
-
-        if building_spend is None:
+    all_int_spend = all_int_savings = True
+    for j, category in enumerate(PER_UNIT_CATEGORIES):
+        baseline = BASELINE_BENCHMARKS[category]
+        p25, p50, p75, p90 = peer[j]
+        spend = spends[j]
+        # Network rows count the buildings behind their own distribution
+        row_peers = network[j]["n"] if network[j] else n_peers
+        peer_source = "network" if network[j] else "seeded"
+
+        if spend is None:
             results.append({
                 "category": category,
                 "category_label": baseline["description"],
@@ -441,34 +599,33 @@ def benchmark_building(vendor_summary: dict, units: int = 100,
                 "peer_p75": p75,
                 "peer_p90": p90,
                 "percentile": None,
-                "status": {"status": "NO_DATA", "label": "No Data", "color": "gray"},
+                "status": dict(_STATUS_BY_CODE[NO_DATA]),
                 "savings_opportunity_annual": 0,
-                "n_peer_buildings": peer_group["peer_building_count"],
+                "n_peer_buildings": row_peers,
+                "peer_source": peer_source,
             })
             continue
 
-        annual_spend = building_spend * units
-        total_annual_spend += annual_spend
-        percentile = calculate_percentile(building_spend, p25, p50, p75, p90)
-        status = get_status(percentile)
-
-        savings_per_unit = max(0, building_spend - p50)
-        savings_annual = round(savings_per_unit * units, 0)
+        # max(0, spend - p50) is the int 0 unless spend is above the median
+        int_spend = isinstance(spend, int)
+        int_savings = int_spend or not spend > p50
+        status = dict(_STATUS_BY_CODE[row["status"][j]])
+        savings_annual = _as(row["savings_annual"][j], int_savings and int_units)
+        all_int_spend &= int_spend and int_units
         if status["action_recommended"]:
-            total_savings_opportunity += savings_annual
+            all_int_savings &= int_savings and int_units
 
         last_bid_year = (last_bid_years or {}).get(category)
         years_since_bid = None
         if last_bid_year:
-            from datetime import datetime
             years_since_bid = datetime.now().year - int(last_bid_year)
 
         results.append({
             "category": category,
             "category_label": baseline["description"],
-            "vendor_name": vendor_name,
-            "annual_spend": round(annual_spend, 0),
-            "per_unit": round(building_spend, 2),
+            "vendor_name": by_category[category].get("vendor_name", "Unknown"),
+            "annual_spend": round(_as(row["annual_spend"][j], int_spend and int_units), 0),
+            "per_unit": round(spend, 2),
             "peer_p25": p25,
             "peer_median": p50,
             "peer_p75": p75,
@@ -479,11 +636,12 @@ def benchmark_building(vendor_summary: dict, units: int = 100,
             "network_p50": p50,
             "network_p75": p75,
             "network_p90": p90,
-            "percentile": percentile,
+            "percentile": row["percentile"][j],
             "status": status,
             "savings_opportunity_annual": savings_annual,
-            "savings_opportunity_per_unit": round(savings_per_unit, 2),
-            "n_peer_buildings": peer_group["peer_building_count"],
+            "savings_opportunity_per_unit": round(_as(row["savings_per_unit"][j], int_savings), 2),
+            "n_peer_buildings": row_peers,
+            "peer_source": peer_source,
             "factors": baseline["factors"],
             "years_since_bid": years_since_bid,
             "last_bid_year": last_bid_year,
@@ -499,9 +657,11 @@ def benchmark_building(vendor_summary: dict, units: int = 100,
     opportunities = [r for r in results
                      if r.get("savings_opportunity_annual", 0) > 0][:3]
 
+    total_annual_spend = _as(batch["total_annual_spend"][0], all_int_spend)
+    total_savings_opportunity = _as(batch["total_savings_opportunity"][0], all_int_savings)
     return {
         "units": units,
-        "size_bucket": size_bucket,
+        "size_bucket": SIZE_BUCKETS[batch["size_bucket"][0]],
         "peer_group": peer_group,
         "total_annual_spend_benchmarked": round(total_annual_spend, 0),
         "total_savings_opportunity": round(total_savings_opportunity, 0),
@@ -510,11 +670,69 @@ def benchmark_building(vendor_summary: dict, units: int = 100,
         "subscription_roi": round(total_savings_opportunity / (350 * 12), 1),
         "vendor_benchmarks": results,
         "top_opportunities": opportunities,
-        "above_market_count": sum(1 for r in results
-                                   if r["status"].get("action_recommended")),
-        "at_or_below_count": sum(1 for r in results
-                                  if not r["status"].get("action_recommended")
-                                  and r["status"].get("status") != "NO_DATA"),
+        "above_market_count": int(batch["above_market_count"][0]),
+        "at_or_below_count": int(batch["at_or_below_count"][0]),
+    }
+
+
+# ── What-if rebid scenarios ───────────────────────────────────────────────────
+# A scenario asks: if these buildings rebid these categories and landed at a
+# target percentile of their peer group, what would they save? Given the
+# (buildings × categories) position arrays benchmark_portfolio() already
+# produces, that is a few array operations, with no per-building re-benchmarking.
+
+SUCCESS_FEE = 0.25
+
+
+def price_at_percentile(peer, target):
+    """
+    Per-unit price at percentile `target` (0–99) of a peer distribution.
+
+    Inverse of calculate_percentile's piecewise-linear curve. peer is
+    (..., 4) p25/p50/p75/p90 and target broadcasts against peer[..., 0].
+    """
+    peer = np.asarray(peer, dtype=np.float64)
+    t = np.asarray(target, dtype=np.float64)
+    p25, p50, p75, p90 = peer[..., 0], peer[..., 1], peer[..., 2], peer[..., 3]
+    return np.select(
+        [t <= 25, t <= 50, t <= 75, t <= 90],
+        [p25 * t / 25,
+         p25 + (p50 - p25) * (t - 25) / 25,
+         p50 + (p75 - p50) * (t - 50) / 25,
+         p75 + (p90 - p75) * (t - 75) / 15],
+        p90 + p90 * 0.3 * (t - 90) / 9)
+
+
+def rebid_scenario(units, spend, peer, targets) -> dict:
+    """
+    Project the savings of rebidding at target percentiles.
+
+    units   : (N,) unit counts
+    spend   : (N, C) current per-unit spend, NaN where there is no vendor
+    peer    : (N, C, 4) peer p25/p50/p75/p90 (benchmark_portfolio()["peer"])
+    targets : (C,) target percentile per column, or a scalar
+
+    A building × category saves (spend − target price) × units when it
+    currently pays more than the target price, else nothing. Returns (N, C)
+    target_price and savings_annual, per-building (N,) savings_annual, and
+    portfolio totals total_savings, net_savings_after_fee and rebid_count
+    (building × categories that would save).
+    """
+    units = np.asarray(units, dtype=np.float64)
+    spend = np.asarray(spend, dtype=np.float64)
+    target_price = price_at_percentile(peer, targets)
+    with np.errstate(invalid="ignore"):
+        saves = spend > target_price
+    savings = np.round(np.where(saves, spend - target_price, 0.0) * units[:, None], 0)
+    by_building = savings.sum(axis=1)
+    total = float(by_building.sum())
+    return {
+        "target_price": target_price,
+        "savings_annual": savings,
+        "building_savings_annual": by_building,
+        "total_savings": total,
+        "net_savings_after_fee": round(total * (1 - SUCCESS_FEE), 0),
+        "rebid_count": int(saves.sum()),
     }
 
 
@@ -0,0 +1,102 @@
+"""
+BoardIQ — Boot snapshot
+========================
+Every worker import exec-loads century_buildings.py / mrc_buildings.py,
+merges them into BUILDINGS_DB with address aliasing, applies tombstones and
+pulls vendor data, profiles, contracts and bids from the database. After a
+boot that made no writes, app.py pickles the merged result here; the next
+boot reads it back in one read instead of repeating that work.
+
+A snapshot is only used when
+  - the format version and Python version match,
+  - the source fingerprint matches (hash of app.py and the building source
+    files, plus which database the state came from), and
+  - the database's data_version counter is unchanged, i.e. no process has
+    written to it since the snapshot was taken.
+
+BOARDIQ_BOOT_SNAPSHOT sets the file path; "off" disables snapshots.
+"""
+
+import io
+import os
+import sys
+import pickle
+import hashlib
+
+FORMAT_VERSION = 1
+
+SNAPSHOT_PATH = os.environ.get(
+    "BOARDIQ_BOOT_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".boot_snapshot.pickle"))
+if SNAPSHOT_PATH.lower() in ("", "off", "none", "0"):
+    SNAPSHOT_PATH = None
+
+
+def fingerprint(paths, extra=()):
+    """sha256 over the contents of `paths` and any extra identifying strings."""
+    h = hashlib.sha256()
+    h.update(f"{FORMAT_VERSION}|{sys.version_info[:2]}".encode())
+    for item in extra:
+        h.update(b"\0" + str(item).encode())
+    for path in paths:
+        h.update(b"\0" + os.path.basename(path).encode() + b"\0")
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def _header(source_fp, data_version):
+    return {"format": FORMAT_VERSION, "python": sys.version_info[:2],
+            "source": source_fp, "data_version": data_version}
+
+
+def load(source_fp, data_version, path=None):
+    """Return the snapshotted state dict, or None if missing or stale."""
+    path = path or SNAPSHOT_PATH
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"[BoardIQ] Boot snapshot unreadable: {e}")
+        return None
+    try:
+        buf = io.BytesIO(blob)
+        header = pickle.load(buf)
+        if header != _header(source_fp, data_version):
+            reason = "sources changed" if header.get("source") != source_fp else "database changed"
+            print(f"[BoardIQ] Boot snapshot is stale ({reason}) — cold boot")
+            return None
+        state = pickle.load(buf)
+    except Exception as e:
+        print(f"[BoardIQ] Boot snapshot unreadable: {e} — cold boot")
+        return None
+    print(f"[BoardIQ] Restored merged state from boot snapshot ({len(blob) // 1024} KB)")
+    return state
+
+
+def save(state, source_fp, data_version, path=None):
+    """Atomically write state (one pickle, so shared references survive)."""
+    path = path or SNAPSHOT_PATH
+    if not path:
+        return False
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(_header(source_fp, data_version), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return True
+    except Exception as e:
+        print(f"[BoardIQ] Could not write boot snapshot: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
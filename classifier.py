@@ -0,0 +1,166 @@
+"""
+BoardIQ — Compiled keyword classifier
+======================================
+Vendor categories are assigned by keyword tables in three places, each with
+its own rules for which match wins:
+
+  app._classify_category            first rule (in table order) with a match
+  InvoiceProcessor.classify_vendor  category with the most matching keywords
+  yardi_import._classify            first keyword (in table order) that matches
+
+Each used to test its keywords one after another in Python, tens of
+substring checks and re.search calls per invoice row. KeywordRules compiles
+a table into one regex over its literal keywords, merged on shared prefixes
+like a trie, inside a zero-width lookahead:
+
+  (?=(?:e(?:l(?:ectric(?P<k40>)|evator(?P<k0>))|...)|l(?:ift(?P<k1>)|...)|...))
+
+finditer() then stops at every position where some keyword starts and the
+empty group that matched names the longest keyword there. The keywords it
+starts with match at that position too, and the keywords it contains match
+somewhere, so precomputed tables give
+
+  first()   the category of the first rule with a keyword in the text
+  scores()  how many of each category's keywords are in the text
+
+from one scan. Regex keywords (app.py's \\bcab\\b and the like) get a second,
+smaller lookahead with the patterns in table order.
+
+Results are memoized on the lowercased text (BOARDIQ_CLASSIFY_MEMO entries
+per table, default 20000), as Yardi exports and invoice CSVs repeat the same
+account names and vendors on thousands of rows.
+"""
+
+import os
+import re
+import threading
+from functools import lru_cache
+
+MEMO_SIZE = int(os.environ.get("BOARDIQ_CLASSIFY_MEMO", "20000"))
+
+_tables = []
+_tables_lock = threading.Lock()
+
+
+class KeywordRules:
+    """An ordered keyword table: [(category, [keyword, ...]), ...].
+
+    A keyword is a literal substring unless regex(keyword) is true, in
+    which case it is a regular expression searched for in the text. Texts
+    are lowercased before matching, so keywords should be lower case.
+    """
+
+    def __init__(self, rules, regex=None, memo=MEMO_SIZE):
+        self.rules = [(category, list(keywords)) for category, keywords in rules]
+        regex = regex or (lambda keyword: False)
+        rank = {}                   # keyword -> index of the first rule listing it
+        for i, (_category, keywords) in enumerate(self.rules):
+            for k in keywords:
+                rank.setdefault(k, i)
+        literals = [k for k in rank if not regex(k)]
+        patterns = [k for k in rank if regex(k)]
+
+        self._literal_re = _compile_trie(literals)
+        # Where literals[j] matches, so do the keywords it contains; the ones
+        # it starts with match at the same position
+        self._contains = [[i for i, other in enumerate(literals) if other in k] for k in literals]
+        self._prefix_rank = [min(rank[other] for other in literals if k.startswith(other)) for k in literals]
+        self._counts = [[(i, keywords.count(k)) for i, (_c, keywords) in enumerate(self.rules) if k in keywords]
+                        for k in literals]
+
+        self._pattern_re = _compile_alternatives(patterns)
+        self._pattern_rank = [rank[k] for k in patterns]
+
+        self._first = lru_cache(maxsize=memo)(self._first_uncached)
+        self._scores = lru_cache(maxsize=memo)(self._scores_uncached)
+        with _tables_lock:
+            _tables.append(self)
+
+    def first(self, text):
+        """Category of the first rule with a keyword in text, or None."""
+        return self._first((text or "").lower())
+
+    def scores(self, text):
+        """{category: number of its keywords in text} for categories with any,
+        in table order. Only literal keywords are counted."""
+        return dict(self._scores((text or "").lower()))
+
+    def _first_uncached(self, text):
+        best = len(self.rules)
+        if self._literal_re is not None:
+            for m in self._literal_re.finditer(text):
+                best = min(best, self._prefix_rank[int(m.lastgroup[1:])])
+        if self._pattern_re is not None:
+            for m in self._pattern_re.finditer(text):
+                best = min(best, self._pattern_rank[int(m.lastgroup[1:])])
+        return self.rules[best][0] if best < len(self.rules) else None
+
+    def _scores_uncached(self, text):
+        if self._literal_re is None:
+            return ()
+        found = set()
+        for m in self._literal_re.finditer(text):
+            found.update(self._contains[int(m.lastgroup[1:])])
+        totals = {}
+        for j in found:
+            for i, n in self._counts[j]:
+                totals[i] = totals.get(i, 0) + n
+        return tuple((self.rules[i][0], totals[i]) for i in sorted(totals))
+
+    def memo_info(self):
+        first, scores = self._first.cache_info(), self._scores.cache_info()
+        return {"hits": first.hits + scores.hits, "misses": first.misses + scores.misses,
+                "entries": first.currsize + scores.currsize}
+
+
+# Each alternative ends in an empty group k<j> naming the keyword that matched,
+# and starts with the keyword itself so the regex engine can reject it on its
+# first character.
+
+def _compile_trie(keywords):
+    """Lookahead over literal keywords, merged on shared prefixes so a
+    position that starts no keyword is rejected after one branch per
+    distinct first letter; reports the longest keyword starting there."""
+    if not keywords:
+        return None
+    root = {}
+    for j, k in enumerate(keywords):
+        node = root
+        for ch in k:
+            node = node.setdefault(ch, {})
+        node[""] = j
+
+    def branch(node):
+        parts = [re.escape(ch) + branch(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            parts.append(f"(?P<k{node['']}>)")     # last, so longer keywords win
+        return parts[0] if len(parts) == 1 else "(?:" + "|".join(parts) + ")"
+    return re.compile(f"(?={branch(root)})", re.DOTALL)
+
+
+def _compile_alternatives(patterns):
+    """Lookahead over regex keywords in order; reports the first that
+    matches at each position."""
+    if not patterns:
+        return None
+    alternatives = "|".join(f"(?:{p})(?P<k{j}>)" for j, p in enumerate(patterns))
+    return re.compile(f"(?=(?:{alternatives}))", re.DOTALL)
+
+
+def clear():
+    """Drop every table's memo (e.g. before timing a cold run)."""
+    with _tables_lock:
+        tables = list(_tables)
+    for t in tables:
+        t._first.cache_clear()
+        t._scores.cache_clear()
+
+
+def stats():
+    with _tables_lock:
+        tables = list(_tables)
+    out = {"tables": len(tables), "hits": 0, "misses": 0, "entries": 0, "memo_size": MEMO_SIZE}
+    for t in tables:
+        for k, v in t.memo_info().items():
+            out[k] += v
+    return out
@@ -0,0 +1,167 @@
+"""
+BoardIQ — Response compression
+===============================
+Flask sends every response uncompressed; the dashboard alone is ~90 KB of
+HTML and /api/upload-invoices can return megabytes of JSON. app.py runs
+compress_response() as an after_request hook:
+
+  - negotiates brotli (if the brotli package is installed) or gzip from
+    Accept-Encoding, and adds Vary: Accept-Encoding
+  - only touches text-like content types, and leaves alone responses that
+    are already encoded (/assets serves its precompressed variants itself),
+    marked no-transform, file passthroughs, and bodies under
+    BOARDIQ_COMPRESS_MIN_BYTES (default 1024)
+  - compresses streamed responses chunk by chunk with a sync flush, so
+    NDJSON/SSE consumers still see each chunk as soon as it is produced
+  - compresses bodies over BOARDIQ_COMPRESS_STREAM_BYTES (default 256 KB)
+    incrementally as the server writes them out, instead of holding the
+    request until the whole payload is compressed
+
+BOARDIQ_COMPRESS=0 turns it off; BOARDIQ_COMPRESS_LEVEL sets the gzip level
+(default 6; brotli uses quality 5 for the same speed/ratio trade-off).
+"""
+
+import os
+import zlib
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.environ.get("BOARDIQ_COMPRESS", "1") != "0"
+MIN_BYTES = int(os.environ.get("BOARDIQ_COMPRESS_MIN_BYTES", "1024"))
+STREAM_BYTES = int(os.environ.get("BOARDIQ_COMPRESS_STREAM_BYTES", str(256 * 1024)))
+GZIP_LEVEL = int(os.environ.get("BOARDIQ_COMPRESS_LEVEL", "6"))
+BROTLI_QUALITY = 5
+CHUNK_BYTES = 64 * 1024
+
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript",
+                 "application/x-ndjson", "application/xml", "image/svg+xml")
+
+_lock = threading.Lock()
+_stats = {"compressed": 0, "streamed": 0, "skipped_small": 0,
+          "bytes_in": 0, "bytes_out": 0}
+
+
+def _count(**deltas):
+    with _lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def negotiate(accept_encodings):
+    """Best encoding the client accepts ("br" or "gzip"), or None."""
+    if brotli is not None and "br" in accept_encodings:
+        return "br"
+    if "gzip" in accept_encodings:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental gzip/brotli with the same interface for both."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)   # 31 = gzip container
+
+    def compress(self, data, sync=False):
+        if self.encoding == "br":
+            out = self._c.process(data)
+            return out + self._c.flush() if sync else out
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_SYNC_FLUSH) if sync else out
+
+    def finish(self):
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+def compress(data, encoding):
+    """One-shot compression of a whole body."""
+    c = _Compressor(encoding)
+    return c.compress(data) + c.finish()
+
+
+def _stream(chunks, encoding, sync):
+    c = _Compressor(encoding)
+    size_in = size_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if not chunk:
+                continue
+            size_in += len(chunk)
+            out = c.compress(chunk, sync=sync)
+            if out:
+                size_out += len(out)
+                yield out
+        out = c.finish()
+        size_out += len(out)
+        yield out
+    finally:
+        _count(bytes_in=size_in, bytes_out=size_out)
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _split(data):
+    for i in range(0, len(data), CHUNK_BYTES):
+        yield data[i:i + CHUNK_BYTES]
+
+
+def compress_response(response, request):
+    """after_request hook: compress response in place when worthwhile."""
+    if not ENABLED or response.direct_passthrough:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+    if "no-transform" in response.headers.get("Cache-Control", ""):
+        return response
+    if not (response.mimetype or "").startswith(_COMPRESSIBLE):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _stream(response.response, encoding, sync=True)
+        response.headers.pop("Content-Length", None)
+        _count(streamed=1)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_BYTES:
+            _count(skipped_small=1)
+            return response
+        if len(data) >= STREAM_BYTES:
+            response.response = _stream(_split(data), encoding, sync=False)
+            response.headers.pop("Content-Length", None)
+            _count(streamed=1)
+        else:
+            body = compress(data, encoding)
+            response.set_data(body)
+            _count(compressed=1, bytes_in=len(data), bytes_out=len(body))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+    out["enabled"] = ENABLED
+    out["brotli"] = brotli is not None
+    out["ratio"] = round(out["bytes_out"] / out["bytes_in"], 3) if out["bytes_in"] else None
+    return out
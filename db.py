@@ -1,53 +1,539 @@
 """
-BoardIQ — PostgreSQL persistence layer
-========================================
-Uses DATABASE_URL env var (provided by Railway).
-Falls back gracefully to in-memory-only mode when no database is configured.
+BoardIQ — PostgreSQL / SQLite persistence layer
+================================================
+Uses DATABASE_URL env var (provided by Railway). Without it, local and dev
+deployments use a SQLite file in WAL mode (BOARDIQ_SQLITE_PATH, default
+boardiq.db next to this file) behind the same functions. Set
+BOARDIQ_SQLITE_PATH=off to run in-memory only.
 
 Tables:
   - vendor_data: building vendor spend records (BBL + vendor + category)
   - vendor_profiles: full vendor profile JSON (keyed by vendor_id)
   - vendor_registry: vendor login credentials (keyed by email)
+  - building_contracts: contract JSON (keyed by contract_id, indexed by BBL)
+  - bid_requests: BidBoard requests (keyed by request_id, indexed by BBL)
+  - vendor_bids: vendor bids (keyed by bid_id, indexed by BBL, vendor, request)
+  - id_counters: cross-worker counters for sequential ids (b001, br001, ...)
+  - invoices: line-level invoice ledger (one row per committed invoice)
+  - invoice_spend_ttm (view): trailing-12-month spend per building/vendor/category
+  - added_buildings: buildings added through the admin lookup (keyed by BBL)
+  - deleted_buildings: tombstones for deleted (seeded or added) buildings
+  - jobs: background upload job state and results (keyed by job_id, see jobs.py)
+  - job_items: items a running job has emitted, appended in order (job_id, epoch, seq)
+  - parse_cache: PDF page text and LLM batch results by content hash (see parse_cache.py)
+  - data_version: single-row counter bumped by every write (boot snapshot validation)
 """
 
+import io
 import os
+import re
 import json
+import sqlite3
+import hashlib
+import time
+from datetime import date
+import threading
 import traceback
+from contextlib import contextmanager
 
 _db_url = os.environ.get("DATABASE_URL")
+_sqlite_path = None
+if not _db_url:
+    _sqlite_path = os.environ.get("BOARDIQ_SQLITE_PATH",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), "boardiq.db"))
+    if _sqlite_path.lower() in ("", "off", "none", "0"):
+        _sqlite_path = None
+# "postgres", "sqlite" or None (in-memory only)
+BACKEND = "postgres" if _db_url else ("sqlite" if _sqlite_path else None)
 _pool = None
+_pool_lock = threading.Lock()
+
+# Pool sizing / behaviour (per gunicorn worker process)
+POOL_MIN = int(os.environ.get("BOARDIQ_DB_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("BOARDIQ_DB_POOL_MAX", "5"))
+POOL_TIMEOUT = float(os.environ.get("BOARDIQ_DB_POOL_TIMEOUT", "10"))
+# Connections idle longer than this get a SELECT 1 before being handed out
+POOL_HEALTHCHECK_IDLE = float(os.environ.get("BOARDIQ_DB_HEALTHCHECK_IDLE", "30"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the acquire timeout."""
+
+
+class WriteError(Exception):
+    """Raised by write-behind jobs when a save reported failure, so the queue retries it."""
+
+
+class ConnectionManager:
+    """Thread-safe PostgreSQL connection pool.
+
+    Wraps psycopg2's ThreadedConnectionPool with a semaphore so callers wait
+    (up to a timeout) for a free connection instead of getting a PoolError,
+    checks connections on checkout, and keeps counters for /api/admin/metrics.
+    """
+
+    def __init__(self, dsn, minconn=POOL_MIN, maxconn=POOL_MAX, timeout=POOL_TIMEOUT,
+                 healthcheck_idle=POOL_HEALTHCHECK_IDLE):
+        self._pool = self._make_pool(dsn, minconn, maxconn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}  # id(conn) -> monotonic time it was returned
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self.in_use = 0
+        self.waiters = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.acquire_ms_total = 0.0
+        self.acquire_ms_max = 0.0
+
+    def _make_pool(self, dsn, minconn, maxconn):
+        import psycopg2.pool
+        pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, dsn)
+        # psycopg2 closes any returned connection beyond minconn; open only
+        # minconn up front but keep up to maxconn warm once they exist.
+        pool.minconn = maxconn
+        return pool
+
+    def _in_transaction(self, conn):
+        import psycopg2.extensions
+        return conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last = self._last_used.get(id(conn))
+        if last is not None and time.monotonic() - last < self.healthcheck_idle:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """Check out a connection, waiting up to `timeout` seconds for one."""
+        timeout = self.timeout if timeout is None else timeout
+        t0 = time.perf_counter()
+        with self._lock:
+            self.waiters += 1
+        got = self._slots.acquire(timeout=timeout)
+        with self._lock:
+            self.waiters -= 1
+            if not got:
+                self.timeouts += 1
+        if not got:
+            raise PoolTimeout(f"No database connection available within {timeout:.1f}s")
+        try:
+            conn = self._pool.getconn()
+            if not self._healthy(conn):
+                with self._lock:
+                    self.discarded += 1
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        waited_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.acquire_ms_total += waited_ms
+            self.acquire_ms_max = max(self.acquire_ms_max, waited_ms)
+        return conn
+
+    def release(self, conn):
+        """Return a connection; broken ones are closed instead of reused."""
+        close = bool(conn.closed)
+        if not close and self._in_transaction(conn):
+            try:
+                conn.rollback()
+            except Exception:
+                close = True
+        if close:
+            self._last_used.pop(id(conn), None)
+            with self._lock:
+                self.discarded += 1
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """`with manager.connection() as conn:` — commit is up to the caller."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.maxconn,
+                "in_use": self.in_use,
+                "idle": len(self._pool._pool),
+                "waiters": self.waiters,
+                "acquired_total": self.acquired,
+                "timeouts_total": self.timeouts,
+                "discarded_total": self.discarded,
+                "acquire_ms_avg": round(self.acquire_ms_total / self.acquired, 3) if self.acquired else 0.0,
+                "acquire_ms_max": round(self.acquire_ms_max, 3),
+            }
+
+
+# ── SQLite backend (local / dev, when DATABASE_URL is unset) ────────────────
+# The functions below are written against psycopg2. SQLite connections are
+# wrapped so the same statements run unchanged: %s placeholders become ?,
+# "col = ANY(%s)" expands to an IN list, ::jsonb casts are dropped and
+# GREATEST becomes MAX. JSONB / DATE / BOOLEAN columns are converted back to
+# dict / date / bool on read via declared column types.
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter("JSONB", json.loads)
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter("BOOLEAN", lambda b: b not in (b"0", b""))
+
+_ANY_OR_PARAM = re.compile(r"=\s*ANY\(%s\)|%s")
+
+
+def _sqlite_sql(sql, params):
+    """Translate a psycopg2-style statement and its params for sqlite3."""
+    sql = sql.replace("::jsonb", "").replace("GREATEST(", "MAX(")
+    if not params:
+        return sql, ()
+    out, args, pos = [], [], 0
+    values = iter(params)
+    for m in _ANY_OR_PARAM.finditer(sql):
+        out.append(sql[pos:m.start()])
+        value = next(values)
+        if m.group(0) == "%s":
+            out.append("?")
+            args.append(value)
+        else:
+            value = list(value)
+            out.append(f"IN ({', '.join('?' * len(value))})" if value else "IN (NULL)")
+            args.extend(value)
+        pos = m.end()
+    out.append(sql[pos:])
+    return "".join(out), args
+
+
+class _SQLiteCursor:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, sql, params=()):
+        self._cur.execute(*_sqlite_sql(sql, params))
+        return self
+
+    def executemany(self, sql, seq):
+        self._cur.executemany(_sqlite_sql(sql, ())[0].replace("%s", "?"), seq)
+        return self
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def close(self):
+        self._cur.close()
+
+
+class _SQLiteConnection:
+    """Enough of a psycopg2 connection for this module, over sqlite3."""
+
+    def __init__(self, path, timeout):
+        # IMMEDIATE: the implicit BEGIN before a write takes the write lock up
+        # front, so concurrent writers queue on busy_timeout instead of failing
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level="IMMEDIATE",
+                                     detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.closed = False
+
+    def cursor(self):
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+
+class _SQLitePool:
+    """getconn/putconn over lazily opened SQLite connections (ConnectionManager bounds the count)."""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._pool = []  # idle connections
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        with self._lock:
+            if self._pool:
+                return self._pool.pop()
+        return _SQLiteConnection(self.path, self.timeout)
+
+    def putconn(self, conn, close=False):
+        if close:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        with self._lock:
+            self._pool.append(conn)
+
+
+class SQLiteConnectionManager(ConnectionManager):
+    """ConnectionManager over a local SQLite database in WAL mode."""
+
+    def _make_pool(self, dsn, minconn, maxconn):
+        return _SQLitePool(dsn, POOL_TIMEOUT)
+
+    def _in_transaction(self, conn):
+        return conn.in_transaction
+
 
 def _get_pool():
     global _pool
     if _pool is not None:
         return _pool
-    if not _db_url:
-        return None
-    try:
-        import psycopg2.pool
-        # Railway provides postgres:// but psycopg2 needs postgresql://
-        url = _db_url
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql://", 1)
-        _pool = psycopg2.pool.SimpleConnectionPool(1, 5, url)
-        print("[BoardIQ DB] Connected to PostgreSQL")
-        return _pool
-    except Exception as e:
-        print(f"[BoardIQ DB] Could not connect to PostgreSQL: {e}")
+    if BACKEND is None:
         return None
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        if BACKEND == "sqlite":
+            try:
+                _pool = SQLiteConnectionManager(_sqlite_path)
+                print(f"[BoardIQ DB] Using SQLite database at {_sqlite_path} (WAL)")
+                return _pool
+            except Exception as e:
+                print(f"[BoardIQ DB] Could not open SQLite database {_sqlite_path}: {e}")
+                return None
+        try:
+            # Railway provides postgres:// but psycopg2 needs postgresql://
+            url = _db_url
+            if url.startswith("postgres://"):
+                url = url.replace("postgres://", "postgresql://", 1)
+            _pool = ConnectionManager(url)
+            print(f"[BoardIQ DB] Connected to PostgreSQL (pool {POOL_MIN}-{POOL_MAX})")
+            return _pool
+        except Exception as e:
+            print(f"[BoardIQ DB] Could not connect to PostgreSQL: {e}")
+            return None
 
 
 def _get_conn():
     pool = _get_pool()
     if pool is None:
         return None
-    return pool.getconn()
+    return pool.acquire()
 
 
 def _put_conn(conn):
     pool = _get_pool()
     if pool and conn:
-        pool.putconn(conn)
+        pool.release(conn)
+
+
+@contextmanager
+def connection():
+    """Pooled connection context manager; yields None when no database is configured."""
+    pool = _get_pool()
+    if pool is None:
+        yield None
+        return
+    with pool.connection() as conn:
+        yield conn
+
+
+def pool_stats():
+    """Connection pool counters, or None when no database is configured."""
+    pool = _get_pool()
+    return pool.stats() if pool else None
+
+
+# ── Change notifications (cross-worker cache coherence) ──────────────────────
+# Every write emits a NOTIFY on CHANGE_CHANNEL inside its transaction, so it
+# is delivered on commit. Each gunicorn worker runs a listener thread that
+# reloads only the rows named in the payload into its in-memory caches.
+
+CHANGE_CHANNEL = "boardiq_changes"
+# Identifies this process so a worker skips notifications for its own writes
+INSTANCE_ID = f"{os.getpid()}-{os.urandom(4).hex()}"
+# NOTIFY payloads must stay under 8000 bytes; bigger key lists become "reload all"
+_NOTIFY_MAX_PAYLOAD = 7500
+
+
+def _notify(cur, kind, keys=None):
+    """Record a change on the current transaction.
+
+    Bumps data_version (both backends; it's a row update, so it only counts
+    once the transaction commits) and queues a NOTIFY on Postgres. SQLite has
+    no LISTEN/NOTIFY.
+
+    kind: "vendor_data" (keys = bbls), "contract", "vendor_profile",
+    "vendor_registry", ... keys=None means every row of that kind changed.
+    """
+    cur.execute("UPDATE data_version SET value = value + 1 WHERE id = 1")
+    if BACKEND != "postgres":
+        return
+    payload = json.dumps({"origin": INSTANCE_ID, "kind": kind,
+                          "keys": list(keys) if keys is not None else None})
+    if len(payload) > _NOTIFY_MAX_PAYLOAD:
+        payload = json.dumps({"origin": INSTANCE_ID, "kind": kind, "keys": None})
+    cur.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, payload))
+
+
+def start_change_listener(callback, poll_seconds=5.0):
+    """Run callback(kind, keys) for every change committed by another process.
+
+    Uses a dedicated autocommit connection (outside the pool) on a daemon
+    thread and reconnects with backoff if it drops. Returns the thread, or
+    None when no database is configured. Must be called after fork, i.e. in
+    the worker rather than a --preload master.
+    """
+    if BACKEND != "postgres" or not has_database():
+        return None
+    import select
+    import psycopg2
+
+    url = _db_url
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    def _run():
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(url)
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+                print(f"[BoardIQ DB] Listening for changes on {CHANGE_CHANNEL}")
+                backoff = 1.0
+                while True:
+                    if select.select([conn], [], [], poll_seconds) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        try:
+                            msg = json.loads(note.payload)
+                        except ValueError:
+                            continue
+                        if msg.get("origin") == INSTANCE_ID:
+                            continue
+                        try:
+                            callback(msg.get("kind"), msg.get("keys"))
+                        except Exception as e:
+                            print(f"[BoardIQ DB] Change handler failed for {msg.get('kind')}: {e}")
+            except Exception as e:
+                print(f"[BoardIQ DB] Change listener error: {e} — reconnecting in {backoff:.0f}s")
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    t = threading.Thread(target=_run, name="boardiq-change-listener", daemon=True)
+    t.start()
+    return t
+
+
+# Rows per multi-row INSERT statement. Each page is one round trip, so bulk
+# saves cost rows / _BULK_PAGE_SIZE trips instead of one per row.
+_BULK_PAGE_SIZE = int(os.environ.get("BOARDIQ_DB_BULK_PAGE_SIZE", "1000"))
+# At or above this many rows, stream them with COPY into a temp staging table
+# and upsert from there in a single statement.
+_COPY_THRESHOLD = int(os.environ.get("BOARDIQ_DB_COPY_THRESHOLD", "5000"))
+
+
+def _copy_text(value):
+    """Encode one value for COPY ... FROM STDIN (text format)."""
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _bulk_upsert(cur, table, columns, rows, key_columns, template=None):
+    """Upsert a list of row tuples with INSERT ... ON CONFLICT DO UPDATE.
+
+    Small batches go out as multi-row VALUES pages; large ones are COPYed
+    into a temp staging table first. Rows sharing a key are collapsed (last
+    one wins) because Postgres refuses to update the same row twice within
+    one statement. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    key_idx = [columns.index(c) for c in key_columns]
+    deduped = {}
+    for row in rows:
+        deduped[tuple(row[i] for i in key_idx)] = row
+    rows = list(deduped.values())
+    update_cols = [c for c in columns if c not in key_columns]
+    cols = ", ".join(columns)
+    conflict = (
+        f"ON CONFLICT ({', '.join(key_columns)}) DO "
+        + ("UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols) if update_cols else "NOTHING")
+    )
+
+    if BACKEND == "sqlite":
+        placeholders = ", ".join(["%s"] * len(columns))
+        cur.executemany(f"INSERT INTO {table} ({cols}) VALUES ({placeholders}) {conflict}", rows)
+        return len(rows)
+
+    if len(rows) >= _COPY_THRESHOLD:
+        stage = f"_stage_{table}"
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+        cur.execute(f"TRUNCATE {stage}")
+        buf = io.StringIO()
+        for row in rows:
+            buf.write("\t".join(_copy_text(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+        cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN", buf)
+        cur.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} {conflict}")
+        return len(rows)
+
+    from psycopg2.extras import execute_values
+    execute_values(cur, f"INSERT INTO {table} ({cols}) VALUES %s {conflict}", rows,
+                   template=template, page_size=_BULK_PAGE_SIZE)
+    return len(rows)
 
 
 # ── Schema creation ──────────────────────────────────────────────────────────
@@ -99,9 +585,133 @@ def init_db():
         cur.execute("""
             CREATE INDEX IF NOT EXISTS idx_contracts_bbl ON building_contracts(building_bbl);
         """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS bid_requests (
+                request_id TEXT PRIMARY KEY,
+                building_bbl TEXT NOT NULL,
+                data JSONB NOT NULL DEFAULT '{}'
+            );
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bid_requests_bbl ON bid_requests(building_bbl);
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS vendor_bids (
+                bid_id TEXT PRIMARY KEY,
+                vendor_id TEXT NOT NULL,
+                building_bbl TEXT NOT NULL,
+                bid_request_id TEXT,
+                data JSONB NOT NULL DEFAULT '{}'
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vendor_bids_bbl ON vendor_bids(building_bbl);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vendor_bids_vendor ON vendor_bids(vendor_id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vendor_bids_request ON vendor_bids(bid_request_id);")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS id_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INTEGER PRIMARY KEY,
+                value BIGINT NOT NULL
+            );
+        """)
+        cur.execute("INSERT INTO data_version (id, value) VALUES (1, 0) ON CONFLICT (id) DO NOTHING")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS added_buildings (
+                bbl TEXT PRIMARY KEY,
+                data JSONB NOT NULL DEFAULT '{}'
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS deleted_buildings (
+                bbl TEXT PRIMARY KEY
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                owner TEXT,
+                status TEXT NOT NULL,
+                data JSONB NOT NULL DEFAULT '{}',
+                updated_at DOUBLE PRECISION NOT NULL
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at);")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                data JSONB NOT NULL,
+                PRIMARY KEY (job_id, epoch, seq)
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                kind TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                data JSONB NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used DOUBLE PRECISION NOT NULL,
+                PRIMARY KEY (kind, cache_key)
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_used ON parse_cache(last_used);")
+        if BACKEND == "sqlite":
+            _create_invoice_schema_sqlite(cur)
+            conn.commit()
+            cur.close()
+            print("[BoardIQ DB] Tables ready (including contracts, bids and invoices)")
+            return True
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS invoices (
+                invoice_id BIGSERIAL PRIMARY KEY,
+                building_bbl TEXT NOT NULL,
+                vendor TEXT NOT NULL,
+                category TEXT NOT NULL,
+                invoice_date DATE NOT NULL,
+                amount NUMERIC(14, 2) NOT NULL,
+                invoice_number TEXT,
+                recurring BOOLEAN NOT NULL DEFAULT FALSE,
+                source_hash TEXT NOT NULL UNIQUE,
+                data JSONB NOT NULL DEFAULT '{}',
+                committed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_invoices_bbl_cat_date
+                ON invoices(building_bbl, category, invoice_date);
+        """)
+        # Recurring lines are annualized over the months actually billed, so a
+        # single monthly invoice still reads as amount x 12 (matching the old
+        # collapse-to-one-row behaviour) and a full year of them sums exactly.
+        cur.execute("""
+            CREATE OR REPLACE VIEW invoice_spend_ttm AS
+            SELECT building_bbl,
+                   lower(vendor) AS vendor_key,
+                   category,
+                   (array_agg(vendor ORDER BY invoice_date DESC, invoice_id DESC))[1] AS vendor,
+                   SUM(amount) AS ttm_spend,
+                   COUNT(*) AS invoice_count,
+                   COUNT(DISTINCT date_trunc('month', invoice_date)) AS months_billed,
+                   bool_or(recurring) AS recurring,
+                   CASE WHEN bool_or(recurring)
+                        THEN SUM(amount) * 12 / COUNT(DISTINCT date_trunc('month', invoice_date))
+                        ELSE SUM(amount) END AS annual,
+                   MAX(invoice_date) AS last_invoice_date,
+                   (array_agg(amount ORDER BY invoice_date DESC, invoice_id DESC))[1] AS last_invoice_amount
+            FROM invoices
+            WHERE invoice_date > current_date - INTERVAL '12 months'
+            GROUP BY building_bbl, lower(vendor), category;
+        """)
         conn.commit()
         cur.close()
-        print("[BoardIQ DB] Tables ready (including contracts)")
+        print("[BoardIQ DB] Tables ready (including contracts, bids and invoices)")
         return True
     except Exception as e:
         conn.rollback()
@@ -112,16 +722,63 @@ def init_db():
         _put_conn(conn)
 
 
+def _create_invoice_schema_sqlite(cur):
+    """SQLite spelling of the invoices table and invoice_spend_ttm view."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS invoices (
+            invoice_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            building_bbl TEXT NOT NULL,
+            vendor TEXT NOT NULL,
+            category TEXT NOT NULL,
+            invoice_date DATE NOT NULL,
+            amount NUMERIC(14, 2) NOT NULL,
+            invoice_number TEXT,
+            recurring BOOLEAN NOT NULL DEFAULT 0,
+            source_hash TEXT NOT NULL UNIQUE,
+            data JSONB NOT NULL DEFAULT '{}',
+            committed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_invoices_bbl_cat_date
+            ON invoices(building_bbl, category, invoice_date);
+    """)
+    cur.execute("DROP VIEW IF EXISTS invoice_spend_ttm")
+    cur.execute("""
+        CREATE VIEW invoice_spend_ttm AS
+        WITH recent AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY building_bbl, lower(vendor), category
+                                         ORDER BY invoice_date DESC, invoice_id DESC) AS rn
+            FROM invoices
+            WHERE invoice_date > date('now', '-12 months')
+        )
+        SELECT building_bbl,
+               lower(vendor) AS vendor_key,
+               category,
+               MAX(CASE WHEN rn = 1 THEN vendor END) AS vendor,
+               SUM(amount) AS ttm_spend,
+               COUNT(*) AS invoice_count,
+               COUNT(DISTINCT strftime('%Y-%m', invoice_date)) AS months_billed,
+               MAX(recurring) AS recurring,
+               CASE WHEN MAX(recurring)
+                    THEN SUM(amount) * 12.0 / COUNT(DISTINCT strftime('%Y-%m', invoice_date))
+                    ELSE SUM(amount) END AS annual,
+               MAX(invoice_date) AS last_invoice_date,
+               MAX(CASE WHEN rn = 1 THEN amount END) AS last_invoice_amount
+        FROM recent
+        GROUP BY building_bbl, lower(vendor), category;
+    """)
+
+
 # ── Vendor Data (building spend records) ─────────────────────────────────────
 
-def load_all_vendor_data():
-    """Load all building vendor_data from DB. Returns {bbl: [vendor_dict, ...]}."""
+def _load_vendor_data(where="", params=()):
     conn = _get_conn()
     if conn is None:
         return {}
     try:
         cur = conn.cursor()
-        cur.execute("SELECT bbl, vendor, category, annual, per_unit, last_bid_year, months_left, last_invoice_date, last_invoice_amount FROM vendor_data")
+        cur.execute("SELECT bbl, vendor, category, annual, per_unit, last_bid_year, months_left, last_invoice_date, last_invoice_amount FROM vendor_data" + where, params)
         rows = cur.fetchall()
         cur.close()
         result = {}
@@ -139,44 +796,98 @@ def load_all_vendor_data():
             if inv_amount is not None:
                 entry["last_invoice_amount"] = inv_amount
             result.setdefault(bbl, []).append(entry)
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_vendor_data():
+    """Load all building vendor_data from DB. Returns {bbl: [vendor_dict, ...]}."""
+    try:
+        result = _load_vendor_data()
         print(f"[BoardIQ DB] Loaded vendor data for {len(result)} buildings")
         return result
     except Exception as e:
         print(f"[BoardIQ DB] Error loading vendor data: {e}")
         return {}
-    finally:
-        _put_conn(conn)
+
+
+def load_vendor_data_for_buildings(bbls):
+    """Load vendor_data for specific buildings. Buildings with no rows map to []."""
+    bbls = list(bbls)
+    try:
+        result = _load_vendor_data(" WHERE bbl = ANY(%s)", (bbls,))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading vendor data for {len(bbls)} buildings: {e}")
+        return {}
+    return {bbl: result.get(bbl, []) for bbl in bbls}
+
+
+def _vendor_row(bbl, v):
+    """Flatten a vendor_data dict into a vendor_data table row tuple."""
+    return (
+        bbl,
+        v.get("vendor", ""),
+        v.get("category", ""),
+        v.get("annual"),
+        v.get("per_unit"),
+        v.get("last_bid_year"),
+        v.get("months_left"),
+        v.get("last_invoice_date"),
+        v.get("last_invoice_amount"),
+    )
+
+
+_VENDOR_COLUMNS = ["bbl", "vendor", "category", "annual", "per_unit", "last_bid_year",
+                   "months_left", "last_invoice_date", "last_invoice_amount"]
+_VENDOR_KEY = ["bbl", "vendor", "category"]
 
 
 def save_building_vendor_data(bbl, vendor_list):
     """Upsert all vendor records for a single building."""
+    return save_vendor_data_for_buildings({bbl: vendor_list})
+
+
+def save_vendor_data_for_buildings(vendor_by_bbl):
+    """Persist vendor_data for just the given buildings in one transaction.
+
+    vendor_by_bbl: {bbl: [vendor_dict, ...]}. Each building's rows are
+    upserted on (bbl, vendor, category) and any rows for that building that
+    are no longer in its list are deleted, so the table ends up matching the
+    in-memory list without touching any other building.
+    Returns True on success (or when no database is configured).
+    """
+    if not vendor_by_bbl:
+        return True
     conn = _get_conn()
     if conn is None:
-        return
+        return True
     try:
         cur = conn.cursor()
-        # Delete existing rows for this building, then insert fresh
-        cur.execute("DELETE FROM vendor_data WHERE bbl = %s", (bbl,))
-        for v in vendor_list:
-            cur.execute("""
-                INSERT INTO vendor_data (bbl, vendor, category, annual, per_unit, last_bid_year, months_left, last_invoice_date, last_invoice_amount)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                bbl,
-                v.get("vendor", ""),
-                v.get("category", ""),
-                v.get("annual"),
-                v.get("per_unit"),
-                v.get("last_bid_year"),
-                v.get("months_left"),
-                v.get("last_invoice_date"),
-                v.get("last_invoice_amount"),
-            ))
+        bbls = list(vendor_by_bbl.keys())
+        cur.execute("SELECT bbl, vendor, category FROM vendor_data WHERE bbl = ANY(%s)", (bbls,))
+        stale = set(cur.fetchall())
+        rows = [_vendor_row(bbl, v) for bbl, vendor_list in vendor_by_bbl.items() for v in vendor_list or []]
+        stale.difference_update(row[:3] for row in rows)
+        count = _bulk_upsert(cur, "vendor_data", _VENDOR_COLUMNS, rows, _VENDOR_KEY)
+        if stale and BACKEND == "sqlite":
+            cur.executemany("DELETE FROM vendor_data WHERE bbl = %s AND vendor = %s AND category = %s",
+                            list(stale))
+        elif stale:
+            from psycopg2.extras import execute_values
+            execute_values(cur, """
+                DELETE FROM vendor_data d USING (VALUES %s) AS s (bbl, vendor, category)
+                WHERE d.bbl = s.bbl AND d.vendor = s.vendor AND d.category = s.category
+            """, list(stale), page_size=_BULK_PAGE_SIZE)
+        _notify(cur, "vendor_data", bbls)
         conn.commit()
         cur.close()
+        print(f"[BoardIQ DB] Saved {count} vendor data rows for {len(bbls)} buildings ({len(stale)} removed)")
+        return True
     except Exception as e:
         conn.rollback()
-        print(f"[BoardIQ DB] Error saving vendor data for {bbl}: {e}")
+        print(f"[BoardIQ DB] Error saving vendor data for {len(vendor_by_bbl)} buildings: {e}")
+        return False
     finally:
         _put_conn(conn)
 
@@ -189,24 +900,10 @@ def save_all_vendor_data(buildings_db):
     try:
         cur = conn.cursor()
         cur.execute("DELETE FROM vendor_data")
-        count = 0
-        for bbl, building in buildings_db.items():
-            for v in building.get("vendor_data", []):
-                cur.execute("""
-                    INSERT INTO vendor_data (bbl, vendor, category, annual, per_unit, last_bid_year, months_left, last_invoice_date, last_invoice_amount)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    bbl,
-                    v.get("vendor", ""),
-                    v.get("category", ""),
-                    v.get("annual"),
-                    v.get("per_unit"),
-                    v.get("last_bid_year"),
-                    v.get("months_left"),
-                    v.get("last_invoice_date"),
-                    v.get("last_invoice_amount"),
-                ))
-                count += 1
+        rows = [_vendor_row(bbl, v) for bbl, building in buildings_db.items()
+                for v in building.get("vendor_data", [])]
+        count = _bulk_upsert(cur, "vendor_data", _VENDOR_COLUMNS, rows, _VENDOR_KEY)
+        _notify(cur, "vendor_data")
         conn.commit()
         cur.close()
         print(f"[BoardIQ DB] Saved {count} vendor data rows")
@@ -219,14 +916,13 @@ def save_all_vendor_data(buildings_db):
 
 # ── Vendor Profiles ──────────────────────────────────────────────────────────
 
-def load_all_vendor_profiles():
-    """Returns {vendor_id: profile_dict}."""
+def _load_vendor_profiles(where="", params=()):
     conn = _get_conn()
     if conn is None:
         return {}
     try:
         cur = conn.cursor()
-        cur.execute("SELECT vendor_id, data FROM vendor_profiles")
+        cur.execute("SELECT vendor_id, data FROM vendor_profiles" + where, params)
         rows = cur.fetchall()
         cur.close()
         result = {}
@@ -234,13 +930,29 @@ def load_all_vendor_profiles():
             profile = data if isinstance(data, dict) else json.loads(data)
             profile["vendor_id"] = vid
             result[vid] = profile
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_vendor_profiles():
+    """Returns {vendor_id: profile_dict}."""
+    try:
+        result = _load_vendor_profiles()
         print(f"[BoardIQ DB] Loaded {len(result)} vendor profiles")
         return result
     except Exception as e:
         print(f"[BoardIQ DB] Error loading vendor profiles: {e}")
         return {}
-    finally:
-        _put_conn(conn)
+
+
+def load_vendor_profiles(vendor_ids):
+    """Returns {vendor_id: profile_dict} for the given ids that exist."""
+    try:
+        return _load_vendor_profiles(" WHERE vendor_id = ANY(%s)", (list(vendor_ids),))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading vendor profiles: {e}")
+        return {}
 
 
 def save_vendor_profile(vendor_id, profile):
@@ -256,6 +968,7 @@ def save_vendor_profile(vendor_id, profile):
             VALUES (%s, %s::jsonb)
             ON CONFLICT (vendor_id) DO UPDATE SET data = EXCLUDED.data
         """, (vendor_id, data))
+        _notify(cur, "vendor_profile", [vendor_id])
         conn.commit()
         cur.close()
     except Exception as e:
@@ -272,13 +985,10 @@ def save_all_vendor_profiles(profiles_dict):
         return
     try:
         cur = conn.cursor()
-        for vid, profile in profiles_dict.items():
-            data = json.dumps(profile, default=str)
-            cur.execute("""
-                INSERT INTO vendor_profiles (vendor_id, data)
-                VALUES (%s, %s::jsonb)
-                ON CONFLICT (vendor_id) DO UPDATE SET data = EXCLUDED.data
-            """, (vid, data))
+        rows = [(vid, json.dumps(profile, default=str)) for vid, profile in profiles_dict.items()]
+        _bulk_upsert(cur, "vendor_profiles", ["vendor_id", "data"], rows, ["vendor_id"],
+                     template="(%s, %s::jsonb)")
+        _notify(cur, "vendor_profile", [r[0] for r in rows])
         conn.commit()
         cur.close()
         print(f"[BoardIQ DB] Saved {len(profiles_dict)} vendor profiles")
@@ -291,14 +1001,13 @@ def save_all_vendor_profiles(profiles_dict):
 
 # ── Vendor Registry ──────────────────────────────────────────────────────────
 
-def load_all_vendor_registry():
-    """Returns {email: {vendor_id, password, ...}}."""
+def _load_vendor_registry(where="", params=()):
     conn = _get_conn()
     if conn is None:
         return {}
     try:
         cur = conn.cursor()
-        cur.execute("SELECT email, vendor_id, password, data FROM vendor_registry")
+        cur.execute("SELECT email, vendor_id, password, data FROM vendor_registry" + where, params)
         rows = cur.fetchall()
         cur.close()
         result = {}
@@ -307,13 +1016,29 @@ def load_all_vendor_registry():
             entry["vendor_id"] = vid
             entry["password"] = pw
             result[email] = entry
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_vendor_registry():
+    """Returns {email: {vendor_id, password, ...}}."""
+    try:
+        result = _load_vendor_registry()
         print(f"[BoardIQ DB] Loaded {len(result)} vendor registry entries")
         return result
     except Exception as e:
         print(f"[BoardIQ DB] Error loading vendor registry: {e}")
         return {}
-    finally:
-        _put_conn(conn)
+
+
+def load_vendor_registry_entries(emails):
+    """Returns {email: entry} for the given emails that exist."""
+    try:
+        return _load_vendor_registry(" WHERE email = ANY(%s)", (list(emails),))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading vendor registry entries: {e}")
+        return {}
 
 
 def save_vendor_registry_entry(email, entry):
@@ -333,6 +1058,7 @@ def save_vendor_registry_entry(email, entry):
             VALUES (%s, %s, %s, %s::jsonb)
             ON CONFLICT (email) DO UPDATE SET vendor_id = EXCLUDED.vendor_id, password = EXCLUDED.password, data = EXCLUDED.data
         """, (email, vid, pw, data))
+        _notify(cur, "vendor_registry", [email])
         conn.commit()
         cur.close()
     except Exception as e:
@@ -347,16 +1073,40 @@ def has_database():
     return _get_pool() is not None
 
 
+def database_identity():
+    """Which database this process persists to (URL or SQLite path; "" if none)."""
+    return _db_url or _sqlite_path or ""
+
+
+def data_version():
+    """Committed-change counter, or None without a database (or before init_db)."""
+    conn = _get_conn()
+    if conn is None:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT value FROM data_version WHERE id = 1")
+        row = cur.fetchone()
+        cur.close()
+        conn.rollback()
+        return row[0] if row else None
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error reading data_version: {e}")
+        return None
+    finally:
+        _put_conn(conn)
+
+
 # ── Building Contracts ──────────────────────────────────────────────────────
 
-def load_all_contracts():
-    """Load all contracts from DB. Returns {contract_id: contract_dict}."""
+def _load_contracts(where="", params=()):
     conn = _get_conn()
     if conn is None:
         return {}
     try:
         cur = conn.cursor()
-        cur.execute("SELECT contract_id, building_bbl, data FROM building_contracts")
+        cur.execute("SELECT contract_id, building_bbl, data FROM building_contracts" + where, params)
         rows = cur.fetchall()
         cur.close()
         result = {}
@@ -365,20 +1115,36 @@ def load_all_contracts():
             contract["contract_id"] = cid
             contract["building_bbl"] = bbl
             result[cid] = contract
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_contracts():
+    """Load all contracts from DB. Returns {contract_id: contract_dict}."""
+    try:
+        result = _load_contracts()
         print(f"[BoardIQ DB] Loaded {len(result)} contracts")
         return result
     except Exception as e:
         print(f"[BoardIQ DB] Error loading contracts: {e}")
         return {}
-    finally:
-        _put_conn(conn)
+
+
+def load_contracts(contract_ids):
+    """Returns {contract_id: contract_dict} for the given ids that exist."""
+    try:
+        return _load_contracts(" WHERE contract_id = ANY(%s)", (list(contract_ids),))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading contracts: {e}")
+        return {}
 
 
 def save_contract(contract_id, contract):
-    """Upsert a single contract."""
+    """Upsert a single contract. Returns False if the write failed."""
     conn = _get_conn()
     if conn is None:
-        return
+        return True
     try:
         cur = conn.cursor()
         bbl = contract.get("building_bbl", "")
@@ -388,11 +1154,14 @@ def save_contract(contract_id, contract):
             VALUES (%s, %s, %s::jsonb)
             ON CONFLICT (contract_id) DO UPDATE SET building_bbl = EXCLUDED.building_bbl, data = EXCLUDED.data
         """, (contract_id, bbl, data))
+        _notify(cur, "contract", [contract_id])
         conn.commit()
         cur.close()
+        return True
     except Exception as e:
         conn.rollback()
         print(f"[BoardIQ DB] Error saving contract {contract_id}: {e}")
+        return False
     finally:
         _put_conn(conn)
 
@@ -404,14 +1173,11 @@ def save_all_contracts(contracts_dict):
         return
     try:
         cur = conn.cursor()
-        for cid, contract in contracts_dict.items():
-            bbl = contract.get("building_bbl", "")
-            data = json.dumps(contract, default=str)
-            cur.execute("""
-                INSERT INTO building_contracts (contract_id, building_bbl, data)
-                VALUES (%s, %s, %s::jsonb)
-                ON CONFLICT (contract_id) DO UPDATE SET building_bbl = EXCLUDED.building_bbl, data = EXCLUDED.data
-            """, (cid, bbl, data))
+        rows = [(cid, contract.get("building_bbl", ""), json.dumps(contract, default=str))
+                for cid, contract in contracts_dict.items()]
+        _bulk_upsert(cur, "building_contracts", ["contract_id", "building_bbl", "data"], rows,
+                     ["contract_id"], template="(%s, %s, %s::jsonb)")
+        _notify(cur, "contract", [r[0] for r in rows])
         conn.commit()
         cur.close()
         print(f"[BoardIQ DB] Saved {len(contracts_dict)} contracts")
@@ -420,3 +1186,678 @@ def save_all_contracts(contracts_dict):
         print(f"[BoardIQ DB] Error in save_all_contracts: {e}")
     finally:
         _put_conn(conn)
+
+
+# ── BidBoard: Bid Requests ──────────────────────────────────────────────────
+
+def _load_bid_requests(where="", params=()):
+    conn = _get_conn()
+    if conn is None:
+        return {}
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT request_id, building_bbl, data FROM bid_requests" + where, params)
+        rows = cur.fetchall()
+        cur.close()
+        result = {}
+        for rid, bbl, data in rows:
+            br = data if isinstance(data, dict) else json.loads(data)
+            br["request_id"] = rid
+            br["building_bbl"] = bbl
+            result[rid] = br
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_bid_requests():
+    """Load all bid requests from DB. Returns {request_id: request_dict}."""
+    try:
+        result = _load_bid_requests()
+        print(f"[BoardIQ DB] Loaded {len(result)} bid requests")
+        return result
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading bid requests: {e}")
+        return {}
+
+
+def load_bid_requests(request_ids):
+    """Returns {request_id: request_dict} for the given ids that exist."""
+    try:
+        return _load_bid_requests(" WHERE request_id = ANY(%s)", (list(request_ids),))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading bid requests: {e}")
+        return {}
+
+
+def save_bid_request(request_id, bid_request):
+    """Upsert a single bid request."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        bbl = bid_request.get("building_bbl", "")
+        data = json.dumps(bid_request, default=str)
+        cur.execute("""
+            INSERT INTO bid_requests (request_id, building_bbl, data)
+            VALUES (%s, %s, %s::jsonb)
+            ON CONFLICT (request_id) DO UPDATE SET building_bbl = EXCLUDED.building_bbl, data = EXCLUDED.data
+        """, (request_id, bbl, data))
+        _notify(cur, "bid_request", [request_id])
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving bid request {request_id}: {e}")
+    finally:
+        _put_conn(conn)
+
+
+def save_all_bid_requests(requests_dict):
+    """Bulk save all bid requests."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        rows = [(rid, br.get("building_bbl", ""), json.dumps(br, default=str))
+                for rid, br in requests_dict.items()]
+        _bulk_upsert(cur, "bid_requests", ["request_id", "building_bbl", "data"], rows,
+                     ["request_id"], template="(%s, %s, %s::jsonb)")
+        _notify(cur, "bid_request", [r[0] for r in rows])
+        conn.commit()
+        cur.close()
+        print(f"[BoardIQ DB] Saved {len(requests_dict)} bid requests")
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error in save_all_bid_requests: {e}")
+    finally:
+        _put_conn(conn)
+
+
+# ── BidBoard: Vendor Bids ───────────────────────────────────────────────────
+
+def _load_vendor_bids(where="", params=()):
+    conn = _get_conn()
+    if conn is None:
+        return {}
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT bid_id, vendor_id, building_bbl, bid_request_id, data FROM vendor_bids" + where, params)
+        rows = cur.fetchall()
+        cur.close()
+        result = {}
+        for bid_id, vid, bbl, rid, data in rows:
+            bid = data if isinstance(data, dict) else json.loads(data)
+            bid["bid_id"] = bid_id
+            bid["vendor_id"] = vid
+            bid["building_bbl"] = bbl
+            if rid:
+                bid["bid_request_id"] = rid
+            result[bid_id] = bid
+        return result
+    finally:
+        _put_conn(conn)
+
+
+def load_all_vendor_bids():
+    """Load all vendor bids from DB. Returns {bid_id: bid_dict}."""
+    try:
+        result = _load_vendor_bids()
+        print(f"[BoardIQ DB] Loaded {len(result)} vendor bids")
+        return result
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading vendor bids: {e}")
+        return {}
+
+
+def load_vendor_bids(bid_ids):
+    """Returns {bid_id: bid_dict} for the given ids that exist."""
+    try:
+        return _load_vendor_bids(" WHERE bid_id = ANY(%s)", (list(bid_ids),))
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading vendor bids: {e}")
+        return {}
+
+
+def _vendor_bid_row(bid_id, bid):
+    return (bid_id, bid.get("vendor_id", ""), bid.get("building_bbl", ""),
+            bid.get("bid_request_id"), json.dumps(bid, default=str))
+
+
+def save_vendor_bid(bid_id, bid):
+    """Upsert a single vendor bid."""
+    return save_vendor_bids({bid_id: bid})
+
+
+def save_vendor_bids(bids_dict):
+    """Upsert several vendor bids in one transaction (e.g. an award and its losers)."""
+    if not bids_dict:
+        return
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        rows = [_vendor_bid_row(bid_id, bid) for bid_id, bid in bids_dict.items()]
+        _bulk_upsert(cur, "vendor_bids", ["bid_id", "vendor_id", "building_bbl", "bid_request_id", "data"],
+                     rows, ["bid_id"], template="(%s, %s, %s, %s, %s::jsonb)")
+        _notify(cur, "vendor_bid", [r[0] for r in rows])
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving {len(bids_dict)} vendor bids: {e}")
+    finally:
+        _put_conn(conn)
+
+
+def save_all_vendor_bids(bids_dict):
+    """Bulk save all vendor bids."""
+    save_vendor_bids(bids_dict)
+    if bids_dict and has_database():
+        print(f"[BoardIQ DB] Saved {len(bids_dict)} vendor bids")
+
+
+def delete_vendor_bid(bid_id):
+    """Remove a withdrawn bid."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM vendor_bids WHERE bid_id = %s", (bid_id,))
+        _notify(cur, "vendor_bid", [bid_id])
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error deleting vendor bid {bid_id}: {e}")
+    finally:
+        _put_conn(conn)
+
+
+# ── Sequential ids shared across workers ────────────────────────────────────
+
+def next_id(name, floor=1):
+    """Atomically hand out the next integer for a named counter (at least `floor`).
+
+    Lets every worker mint ids like b009 / br003 without colliding. Returns
+    None when no database is configured.
+    """
+    conn = _get_conn()
+    if conn is None:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO id_counters (name, value) VALUES (%s, %s)
+            ON CONFLICT (name) DO UPDATE SET value = GREATEST(id_counters.value + 1, EXCLUDED.value)
+            RETURNING value
+        """, (name, floor))
+        value = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+        return value
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error allocating id for {name}: {e}")
+        return None
+    finally:
+        _put_conn(conn)
+
+
+# ── Invoice ledger ──────────────────────────────────────────────────────────
+
+_INVOICE_COLUMNS = ["building_bbl", "vendor", "category", "invoice_date", "amount",
+                    "invoice_number", "recurring", "source_hash", "data"]
+
+
+def invoice_source_hash(bbl, vendor, category, invoice_date, amount, invoice_number=""):
+    """Stable fingerprint of an invoice line so re-committing the same upload is a no-op."""
+    key = "|".join([bbl, (vendor or "").strip().lower(), category, str(invoice_date),
+                    f"{float(amount or 0):.2f}", (invoice_number or "").strip().lower()])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def record_invoices(lines):
+    """Append invoice lines to the ledger, skipping any already recorded.
+
+    Each line is a dict with building_bbl, vendor, category, invoice_date
+    (date), amount, invoice_number, recurring, source_hash and data (the raw
+    reviewed invoice). Returns the number of new rows, or None with no DB.
+    """
+    if not lines:
+        return 0
+    conn = _get_conn()
+    if conn is None:
+        return None
+    try:
+        cur = conn.cursor()
+        rows = [(l["building_bbl"], l["vendor"], l["category"], l["invoice_date"], l["amount"],
+                 l.get("invoice_number") or None, bool(l.get("recurring")), l["source_hash"],
+                 json.dumps(l.get("data", {}), default=str)) for l in lines]
+        if BACKEND == "sqlite":
+            inserted = []
+            for row in rows:
+                cur.execute(f"""
+                    INSERT INTO invoices ({", ".join(_INVOICE_COLUMNS)})
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (source_hash) DO NOTHING
+                    RETURNING building_bbl
+                """, row)
+                inserted.extend(cur.fetchall())
+        else:
+            from psycopg2.extras import execute_values
+            inserted = execute_values(cur, f"""
+                INSERT INTO invoices ({", ".join(_INVOICE_COLUMNS)}) VALUES %s
+                ON CONFLICT (source_hash) DO NOTHING
+                RETURNING building_bbl
+            """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)",
+                page_size=_BULK_PAGE_SIZE, fetch=True)
+        if inserted:
+            _notify(cur, "invoice", sorted({r[0] for r in inserted}))
+        conn.commit()
+        cur.close()
+        return len(inserted)
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error recording {len(lines)} invoices: {e}")
+        return None
+    finally:
+        _put_conn(conn)
+
+
+def load_invoice_spend(bbls):
+    """Trailing-12-month spend from the ledger for the given buildings.
+
+    Returns {(bbl, vendor_lower, category): {vendor, annual, ttm_spend,
+    invoice_count, months_billed, recurring, last_invoice_date,
+    last_invoice_amount}}. Empty when there is no DB.
+    """
+    conn = _get_conn()
+    if conn is None:
+        return {}
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT building_bbl, vendor_key, category, vendor, annual, ttm_spend, invoice_count,
+                   months_billed, recurring, last_invoice_date, last_invoice_amount
+            FROM invoice_spend_ttm WHERE building_bbl = ANY(%s)
+        """, (list(bbls),))
+        result = {}
+        for (bbl, vendor_key, category, vendor, annual, ttm, count,
+             months, recurring, last_date, last_amount) in cur.fetchall():
+            result[(bbl, vendor_key, category)] = {
+                "vendor": vendor,
+                "annual": float(annual),
+                "ttm_spend": float(ttm),
+                "invoice_count": count,
+                "months_billed": months,
+                "recurring": bool(recurring),
+                # Postgres returns a date; SQLite's view yields the ISO string
+                "last_invoice_date": str(last_date),
+                "last_invoice_amount": float(last_amount),
+            }
+        cur.close()
+        return result
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading invoice spend: {e}")
+        return {}
+    finally:
+        _put_conn(conn)
+
+
+def load_invoices(bbl, category=None, since=None):
+    """Raw ledger lines for a building, newest first (optionally one category / since a date)."""
+    conn = _get_conn()
+    if conn is None:
+        return []
+    try:
+        cur = conn.cursor()
+        where, params = ["building_bbl = %s"], [bbl]
+        if category:
+            where.append("category = %s")
+            params.append(category)
+        if since:
+            where.append("invoice_date >= %s")
+            params.append(since)
+        cur.execute(f"""
+            SELECT invoice_id, vendor, category, invoice_date, amount, invoice_number, recurring, data
+            FROM invoices WHERE {" AND ".join(where)}
+            ORDER BY invoice_date DESC, invoice_id DESC
+        """, params)
+        rows = [{"invoice_id": iid, "vendor": vendor, "category": cat,
+                 "invoice_date": d.isoformat(), "amount": float(amount),
+                 "invoice_number": num, "recurring": recurring, "data": data}
+                for iid, vendor, cat, d, amount, num, recurring, data in cur.fetchall()]
+        cur.close()
+        return rows
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading invoices for {bbl}: {e}")
+        return []
+    finally:
+        _put_conn(conn)
+
+
+# ── Added / deleted buildings ───────────────────────────────────────────────
+
+def load_added_buildings(bbls=None):
+    """Returns {bbl: building_dict} for buildings added through the admin lookup
+    (only the given bbls that exist, if bbls is passed)."""
+    conn = _get_conn()
+    if conn is None:
+        return {}
+    try:
+        cur = conn.cursor()
+        if bbls is None:
+            cur.execute("SELECT bbl, data FROM added_buildings")
+        else:
+            cur.execute("SELECT bbl, data FROM added_buildings WHERE bbl = ANY(%s)", (list(bbls),))
+        rows = cur.fetchall()
+        cur.close()
+        return {bbl: data for bbl, data in rows}
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading added buildings: {e}")
+        return {}
+    finally:
+        _put_conn(conn)
+
+
+def save_added_buildings(buildings):
+    """Upsert added buildings ({bbl: building_dict}) row by row. Returns False if the write failed."""
+    if not buildings:
+        return True
+    conn = _get_conn()
+    if conn is None:
+        return True
+    try:
+        cur = conn.cursor()
+        rows = [(bbl, json.dumps(b, default=str)) for bbl, b in buildings.items()]
+        _bulk_upsert(cur, "added_buildings", ["bbl", "data"], rows, ["bbl"], template="(%s, %s::jsonb)")
+        _notify(cur, "added_building", list(buildings))
+        conn.commit()
+        cur.close()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving {len(buildings)} added buildings: {e}")
+        return False
+    finally:
+        _put_conn(conn)
+
+
+def delete_added_buildings(bbls):
+    """Remove added buildings by BBL (missing ones are ignored). Returns False if the write failed."""
+    bbls = list(bbls)
+    if not bbls:
+        return True
+    conn = _get_conn()
+    if conn is None:
+        return True
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM added_buildings WHERE bbl = ANY(%s)", (bbls,))
+        if cur.rowcount:
+            _notify(cur, "added_building", bbls)
+        conn.commit()
+        cur.close()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error deleting added buildings: {e}")
+        return False
+    finally:
+        _put_conn(conn)
+
+
+def load_deleted_buildings():
+    """Returns the set of tombstoned building ids."""
+    conn = _get_conn()
+    if conn is None:
+        return set()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT bbl FROM deleted_buildings")
+        rows = cur.fetchall()
+        cur.close()
+        return {r[0] for r in rows}
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading deleted buildings: {e}")
+        return set()
+    finally:
+        _put_conn(conn)
+
+
+def add_deleted_buildings(bbls):
+    """Tombstone building ids so deletions survive restarts. Returns False if the write failed."""
+    rows = [(bbl,) for bbl in bbls]
+    if not rows:
+        return True
+    conn = _get_conn()
+    if conn is None:
+        return True
+    try:
+        cur = conn.cursor()
+        _bulk_upsert(cur, "deleted_buildings", ["bbl"], rows, ["bbl"])
+        _notify(cur, "deleted_building", [r[0] for r in rows])
+        conn.commit()
+        cur.close()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving deleted buildings: {e}")
+        return False
+    finally:
+        _put_conn(conn)
+
+
+# ── Background jobs ─────────────────────────────────────────────────────────
+# Job rows are progress reports, not app data: no _notify / data_version bump.
+
+def save_job(job_id, job):
+    """Upsert a job's state ({status, stages, result, ...}, see jobs.py)."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO jobs (job_id, kind, owner, status, data, updated_at)
+            VALUES (%s, %s, %s, %s, %s::jsonb, %s)
+            ON CONFLICT (job_id) DO UPDATE SET status = EXCLUDED.status, data = EXCLUDED.data,
+                                               updated_at = EXCLUDED.updated_at
+        """, (job_id, job.get("kind", ""), job.get("owner"), job.get("status", ""),
+              json.dumps(job, default=str), job.get("updated_at") or time.time()))
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving job {job_id}: {e}")
+    finally:
+        _put_conn(conn)
+
+
+def load_job(job_id):
+    """Returns the job's state dict, or None if there is no such job."""
+    conn = _get_conn()
+    if conn is None:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT data FROM jobs WHERE job_id = %s", (job_id,))
+        row = cur.fetchone()
+        cur.close()
+        if row is None:
+            return None
+        return row[0] if isinstance(row[0], dict) else json.loads(row[0])
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading job {job_id}: {e}")
+        return None
+    finally:
+        _put_conn(conn)
+
+
+def append_job_items(job_id, epoch, start, items):
+    """Store a job's emitted items start, start+1, ... of an items epoch.
+    Returns False if the write failed."""
+    if not items:
+        return True
+    conn = _get_conn()
+    if conn is None:
+        return True
+    try:
+        cur = conn.cursor()
+        rows = [(job_id, epoch, start + i, json.dumps(item, default=str)) for i, item in enumerate(items)]
+        _bulk_upsert(cur, "job_items", ["job_id", "epoch", "seq", "data"], rows, ["job_id", "epoch", "seq"],
+                     template="(%s, %s, %s, %s::jsonb)")
+        conn.commit()
+        cur.close()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving {len(items)} items of job {job_id}: {e}")
+        return False
+    finally:
+        _put_conn(conn)
+
+
+def load_job_items(job_id, epoch, offset=0):
+    """Returns the job's stored items of an items epoch from number `offset` on, in order."""
+    conn = _get_conn()
+    if conn is None:
+        return []
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT data FROM job_items WHERE job_id = %s AND epoch = %s AND seq >= %s ORDER BY seq",
+                    (job_id, epoch, offset))
+        rows = cur.fetchall()
+        cur.close()
+        return [r[0] if isinstance(r[0], dict) else json.loads(r[0]) for r in rows]
+    except Exception as e:
+        print(f"[BoardIQ DB] Error loading items of job {job_id}: {e}")
+        return []
+    finally:
+        _put_conn(conn)
+
+
+def delete_job_items(job_id):
+    """Drop a job's stored items (its result has them once it finishes)."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM job_items WHERE job_id = %s", (job_id,))
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error deleting items of job {job_id}: {e}")
+    finally:
+        _put_conn(conn)
+
+
+def prune_jobs(before):
+    """Delete jobs last updated before the epoch time `before`, with their items."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM job_items WHERE job_id IN (SELECT job_id FROM jobs WHERE updated_at < %s)",
+                    (before,))
+        cur.execute("DELETE FROM jobs WHERE updated_at < %s", (before,))
+        if cur.rowcount:
+            print(f"[BoardIQ DB] Pruned {cur.rowcount} old jobs")
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error pruning jobs: {e}")
+    finally:
+        _put_conn(conn)
+
+
+# ── Parse cache ─────────────────────────────────────────────────────────────
+# Derived data keyed by content hash (see parse_cache.py): no _notify either.
+
+def load_parse_cache(kind, keys, now):
+    """Returns {cache_key: value} for the cached keys and stamps them used at now."""
+    conn = _get_conn()
+    if conn is None:
+        return {}
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT cache_key, data FROM parse_cache WHERE kind = %s AND cache_key = ANY(%s)",
+                    (kind, list(keys)))
+        hits = dict(cur.fetchall())
+        if hits:
+            cur.execute("UPDATE parse_cache SET last_used = %s WHERE kind = %s AND cache_key = ANY(%s)",
+                        (now, kind, list(hits)))
+        conn.commit()
+        cur.close()
+        return hits
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error loading parse cache: {e}")
+        return {}
+    finally:
+        _put_conn(conn)
+
+
+def save_parse_cache(kind, rows, now):
+    """Upsert [(cache_key, json_text)] entries of one kind."""
+    conn = _get_conn()
+    if conn is None:
+        return
+    try:
+        cur = conn.cursor()
+        _bulk_upsert(cur, "parse_cache", ["kind", "cache_key", "data", "bytes", "last_used"],
+                     [(kind, key, data, len(data), now) for key, data in rows], ["kind", "cache_key"],
+                     template="(%s, %s, %s::jsonb, %s, %s)")
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error saving parse cache: {e}")
+    finally:
+        _put_conn(conn)
+
+
+def evict_parse_cache(max_bytes, target_bytes):
+    """If the cache holds more than max_bytes, delete least recently used
+    entries until it is under target_bytes. Returns the number deleted."""
+    conn = _get_conn()
+    if conn is None:
+        return 0
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(SUM(bytes), 0) FROM parse_cache")
+        total = cur.fetchone()[0]
+        if total <= max_bytes:
+            cur.close()
+            conn.commit()
+            return 0
+        cur.execute("SELECT kind, cache_key, bytes FROM parse_cache ORDER BY last_used")
+        doomed = {}
+        for kind, key, size in cur.fetchall():
+            if total <= target_bytes:
+                break
+            total -= size
+            doomed.setdefault(kind, []).append(key)
+        deleted = 0
+        for kind, keys in doomed.items():
+            cur.execute("DELETE FROM parse_cache WHERE kind = %s AND cache_key = ANY(%s)", (kind, keys))
+            deleted += cur.rowcount
+        conn.commit()
+        cur.close()
+        print(f"[BoardIQ DB] Evicted {deleted} parse cache entries")
+        return deleted
+    except Exception as e:
+        conn.rollback()
+        print(f"[BoardIQ DB] Error evicting parse cache: {e}")
+        return 0
+    finally:
+        _put_conn(conn)
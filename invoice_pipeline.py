@@ -29,6 +29,8 @@ from datetime import datetime
 from typing import Optional
 from pathlib import Path
 
+import classifier
+
 # ── Vendor category taxonomy ──────────────────────────────────────────────────
 # The 20 categories that matter for co-op/condo benchmarking.
 # Every invoice gets normalized to one of these.
@@ -173,6 +175,17 @@ CATEGORIES = {
 }
 
 
+# Compiled once for classify_vendor (see classifier.py)
+_CATEGORY_KEYWORDS = classifier.KeywordRules(
+    (cat_key, cat_data["keywords"]) for cat_key, cat_data in CATEGORIES.items() if cat_key != "OTHER")
+_VENDOR_OVERRIDES = classifier.KeywordRules([
+    ("ELEVATOR_MAINTENANCE", ["schindler", "otis", "kone", "dover", "thyssenkrupp"]),
+    ("EXTERMINATING", ["orkin", "terminix", "pestco"]),
+    ("ELECTRIC", ["con ed", "coned", "con edison"]),
+    ("GAS", ["national grid"]),
+])
+
+
 class InvoiceProcessor:
     """
     Processes invoice files and extracts structured vendor/cost data.
@@ -192,32 +205,13 @@ class InvoiceProcessor:
         Rule-based matching — no API needed for common vendors.
         Returns category key.
         """
-        text = f"{vendor_name} {description}".lower()
-
-        # Score each category by keyword matches
-        scores = {}
-        for cat_key, cat_data in CATEGORIES.items():
-            if cat_key == "OTHER":
-                continue
-            score = sum(1 for kw in cat_data["keywords"] if kw in text)
-            if score > 0:
-                scores[cat_key] = score
-
+        # Score each category by keyword matches; ties go to the earlier category
+        scores = _CATEGORY_KEYWORDS.scores(f"{vendor_name} {description}")
         if scores:
             return max(scores, key=scores.get)
 
         # Known vendor name overrides (when description is generic)
-        vendor_lower = vendor_name.lower()
-        if any(x in vendor_lower for x in ["schindler", "otis", "kone", "dover", "thyssenkrupp"]):
-            return "ELEVATOR_MAINTENANCE"
-        if any(x in vendor_lower for x in ["orkin", "terminix", "pestco"]):
-            return "EXTERMINATING"
-        if any(x in vendor_lower for x in ["con ed", "coned", "con edison"]):
-            return "ELECTRIC"
-        if "national grid" in vendor_lower:
-            return "GAS"
-
-        return "OTHER"
+        return _VENDOR_OVERRIDES.first(vendor_name) or "OTHER"
 
     def parse_amount(self, amount_str: str) -> float:
         """Parse amount string to float. Handles $, commas, parens for negatives."""
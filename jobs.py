@@ -0,0 +1,308 @@
+"""
+BoardIQ — Background upload jobs
+=================================
+Invoice and contract uploads do PDF extraction, LLM calls and building
+matching, which can take minutes on a large bundle. Run inside the request
+they would tie up one of a gunicorn worker's threads (see Procfile) and the
+client's connection the whole time. The upload routes instead submit() the
+parse here and return a job id at once; a small thread pool
+(BOARDIQ_JOB_WORKERS per worker process, default 2) runs it.
+
+A job reports per-stage progress through the callable it is handed:
+
+  progress("extract", done, total)   set a stage's counters
+  progress("parse", total=20)        set only the total
+  progress("parse")                  one more done (safe across threads)
+
+and can hand over partial results as it goes with emit(items), e.g. each
+batch's invoices once matched; /api/jobs/<id>/events streams them. A job
+whose earlier items turn out wrong (the LLM path failing over to the regex
+parser) calls emit(reset=True) to start the list again.
+
+Job state (status and stages) is written to the jobs table (db.save_job)
+when the job starts, on each new stage and at most every
+BOARDIQ_JOB_PROGRESS_INTERVAL seconds in between (default 0.5), so
+GET /api/jobs/<id> answers from whichever worker receives it. Items emitted
+since the previous write go into the job_items table with it, appended by
+position, so items() (and the events stream) can follow a running job from
+any worker; they are deleted when the job finishes, as its result holds the
+same invoices. A failed write is logged and never fails the job. The worker
+that runs a job answers from memory, where a finished job keeps its result
+but drops its items.
+
+A job still queued or running whose row has not been written for
+BOARDIQ_JOB_STALE seconds (default 900) belonged to a worker that died; it
+is reported as failed. Finished jobs are kept BOARDIQ_JOB_RETENTION seconds
+(default 86400) and then pruned.
+"""
+
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import db as boardiq_db
+
+WORKERS = int(os.environ.get("BOARDIQ_JOB_WORKERS", "2"))
+PROGRESS_INTERVAL = float(os.environ.get("BOARDIQ_JOB_PROGRESS_INTERVAL", "0.5"))
+STALE_AFTER = float(os.environ.get("BOARDIQ_JOB_STALE", "900"))
+RETENTION = float(os.environ.get("BOARDIQ_JOB_RETENTION", "86400"))
+PRUNE_EVERY = 3600.0
+FINISHED = ("done", "error")
+
+
+class Job:
+    """One background parse: status, stage counters and the eventual result."""
+
+    def __init__(self, kind, owner, meta=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.meta = dict(meta or {})
+        self.status = "queued"
+        self.stage = None
+        self.stages = {}            # stage -> {"done": n, "total": n or None}
+        self.result = None
+        self.error = None
+        self.items = []             # partial results from emit(), in emit order; None once finished
+        self.items_epoch = 0        # bumped when the items are reset
+        self.version = 0            # bumped on every change (see wait_change)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._save_lock = threading.Lock()
+        self._saved_at = 0.0
+        self._items_saved = (0, 0)  # (items epoch, how many of its items are in job_items)
+
+    def progress(self, stage, done=None, total=None):
+        """Update a stage's counters; done=None counts one more item done."""
+        with self._lock:
+            counters = self.stages.get(stage)
+            new_stage = counters is None
+            if new_stage:
+                counters = self.stages[stage] = {"done": 0, "total": None}
+            if total is not None:
+                counters["total"] = total
+            if done is not None:
+                counters["done"] = done
+            elif total is None:
+                counters["done"] += 1
+            self.stage = stage
+            self._touch()
+        _save(self, force=new_stage)
+
+    def emit(self, items=(), reset=False):
+        """Publish partial results; reset=True drops the ones published so far."""
+        with self._lock:
+            if reset:
+                self.items = []
+                self.items_epoch += 1
+            self.items.extend(items)
+            self._touch()
+        _save(self, force=reset)
+
+    def _touch(self):
+        # Caller holds self._lock
+        self.updated_at = time.time()
+        self.version += 1
+        self._changed.notify_all()
+
+    def snapshot(self):
+        """The job's state as a dict, without the items (see items())."""
+        with self._lock:
+            return {
+                "job_id": self.id, "kind": self.kind, "owner": self.owner, "meta": dict(self.meta),
+                "status": self.status, "stage": self.stage,
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "result": self.result, "error": self.error,
+                "items_epoch": self.items_epoch, "version": self.version,
+                "created_at": self.created_at, "updated_at": self.updated_at,
+            }
+
+    def _set(self, **fields):
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+            self._touch()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_jobs = {}                  # job_id -> Job run by this process
+_jobs_lock = threading.Lock()
+_last_prune = 0.0
+_stats = {"submitted": 0, "done": 0, "failed": 0, "saves": 0, "save_errors": 0, "save_ms_total": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(WORKERS, 1), thread_name_prefix="boardiq-job")
+        return _pool
+
+
+def _save(job, force=False):
+    """Write the job's state to the DB, and append the items emitted since the
+    last write; throttled unless force. Errors are logged, not raised: a lost
+    progress write must not fail the job."""
+    if not force:
+        if time.time() - job._saved_at < PROGRESS_INTERVAL:
+            return
+        # Another thread is already writing a newer state; skip this one
+        if not job._save_lock.acquire(blocking=False):
+            return
+    else:
+        job._save_lock.acquire()
+    try:
+        t0 = time.perf_counter()
+        job._saved_at = time.time()
+        state = job.snapshot()
+        if state["status"] in FINISHED:
+            boardiq_db.save_job(job.id, state)
+            boardiq_db.delete_job_items(job.id)
+        else:
+            # Items first, so a reader never sees a version ahead of them
+            _save_items(job)
+            boardiq_db.save_job(job.id, state)
+        _count(saves=1, save_ms_total=(time.perf_counter() - t0) * 1000)
+    except Exception as e:
+        print(f"[BoardIQ] Job {job.id} state not saved: {e}")
+        _count(save_errors=1)
+    finally:
+        job._save_lock.release()
+
+
+def _save_items(job):
+    # Called with job._save_lock held
+    with job._lock:
+        epoch, start = job._items_saved
+        if epoch != job.items_epoch:
+            epoch, start = job.items_epoch, 0
+        new = job.items[start:] if job.items is not None else []
+    if boardiq_db.append_job_items(job.id, epoch, start, new):
+        job._items_saved = (epoch, start + len(new))
+
+
+def _run(job, fn, args, kwargs):
+    try:
+        job._set(status="running")
+        _save(job, force=True)
+        try:
+            result = fn(*args, progress=job.progress, emit=job.emit, **kwargs)
+            job._set(status="done", result=result)
+            _count(done=1)
+        except Exception as e:
+            print(f"[BoardIQ] Job {job.id} ({job.kind}) failed: {e}")
+            job._set(status="error", error=str(e))
+            _count(failed=1)
+        _save(job, force=True)
+    finally:
+        # The result holds what the items did; don't keep both for RETENTION
+        with job._lock:
+            job.items = None
+        job.finished.set()
+
+
+def _prune():
+    """Forget finished jobs past RETENTION, here and (hourly) in the DB."""
+    global _last_prune
+    now = time.time()
+    with _jobs_lock:
+        for job_id in [j.id for j in _jobs.values()
+                       if j.status in FINISHED and now - j.updated_at > RETENTION]:
+            del _jobs[job_id]
+        if now - _last_prune < PRUNE_EVERY:
+            return
+        _last_prune = now
+    boardiq_db.prune_jobs(now - RETENTION)
+
+
+def submit(kind, owner, fn, *args, meta=None, **kwargs):
+    """Run fn(*args, progress=..., emit=..., **kwargs) in the background; returns the Job.
+
+    fn's return value becomes the job result and must be JSON-serialisable;
+    an exception marks the job failed with str(exception) as its error.
+    """
+    _prune()
+    job = Job(kind, owner, meta)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _count(submitted=1)
+    _save(job, force=True)
+    _executor().submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get(job_id):
+    """Current state of a job as a dict, from memory or the DB; None if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.snapshot()
+    state = boardiq_db.load_job(job_id)
+    if state and state.get("status") not in FINISHED and time.time() - state.get("updated_at", 0) > STALE_AFTER:
+        state["status"] = "error"
+        state["error"] = "The job was interrupted (its worker restarted). Please upload the file again."
+    return state
+
+
+def items(job_id, epoch, offset=0):
+    """A running job's emitted items of an items epoch, from number `offset` on.
+
+    Jobs run by this process answer from memory; others from job_items,
+    which is at most one progress write behind. Empty once the job has
+    finished (see its result) or after a reset to a newer epoch."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return boardiq_db.load_job_items(job_id, epoch, offset)
+    with job._lock:
+        if job.items is None or job.items_epoch != epoch:
+            return []
+        return job.items[offset:]
+
+
+def wait(job_id, timeout=None):
+    """Block until a job run by this process finishes; returns its state."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        job.finished.wait(timeout)
+    return get(job_id)
+
+
+def wait_change(job_id, version, timeout):
+    """Sleep until the job's version moves past `version` or timeout passes.
+
+    Jobs run by this process wake the caller as soon as they change; others
+    are only visible through the DB, so this just waits out the interval
+    between progress writes."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        time.sleep(min(timeout, PROGRESS_INTERVAL))
+        return
+    with job._changed:
+        job._changed.wait_for(lambda: job.version != version, timeout)
+
+
+def stats():
+    with _jobs_lock:
+        states = [j.status for j in _jobs.values()]
+    with _stats_lock:
+        out = dict(_stats)
+    out["save_ms_total"] = round(out["save_ms_total"], 1)
+    out.update(workers=WORKERS, queued=states.count("queued"), running=states.count("running"),
+               held=len(states))
+    return out
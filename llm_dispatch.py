@@ -0,0 +1,165 @@
+"""
+BoardIQ — Concurrent LLM batch dispatch
+========================================
+_parse_pdf_invoices splits a PDF into page batches and sends each to the
+Messages API. Run one after another, a 300-page bundle is 20 calls of up to
+120 s each, well past gunicorn's 300 s --timeout. map_batches() runs them on a
+thread pool instead and returns the results in batch order, so the merged
+invoice list reads in the same page order as before. imap_batches() yields
+each result as soon as it and all earlier batches are in, for callers that
+stream partial results.
+
+Concurrency is bounded two ways:
+  BOARDIQ_LLM_CONCURRENCY  calls in flight per request (default 4)
+  BOARDIQ_LLM_RATE         call starts per second across the whole worker,
+                           a token bucket holding up to BOARDIQ_LLM_BURST
+                           tokens (defaults 2/s, burst 4; rate 0 = unlimited)
+
+A 429 (rate limited) or 529 (overloaded) response is retried up to
+BOARDIQ_LLM_RETRIES times (default 4). The wait is the Retry-After header,
+or exponential backoff without one, and the whole bucket holds off for that
+long so the other threads back off too. Any other error, or running out of
+retries, propagates from map_batches; the caller's regex fallback takes over.
+
+ANTHROPIC_API_URL overrides the Messages endpoint (e.g. a local stand-in for
+benchmarks).
+"""
+
+import os
+import time
+import random
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+API_URL = os.environ.get("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
+CONCURRENCY = int(os.environ.get("BOARDIQ_LLM_CONCURRENCY", "4"))
+RATE = float(os.environ.get("BOARDIQ_LLM_RATE", "2"))
+BURST = float(os.environ.get("BOARDIQ_LLM_BURST", "4"))
+MAX_RETRIES = int(os.environ.get("BOARDIQ_LLM_RETRIES", "4"))
+RETRY_STATUSES = (429, 529)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens a second, at most `burst` banked."""
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._hold_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._hold_until:
+                    delay = self._hold_until - now
+                elif self.rate <= 0:
+                    return waited
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def hold(self, seconds):
+        """Hand out no tokens for `seconds` (the server asked us to back off)."""
+        with self._lock:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+_bucket = TokenBucket()
+_stats_lock = threading.Lock()
+_stats = {"batches": 0, "calls": 0, "retries": 0, "failed": 0,
+          "in_flight": 0, "max_in_flight": 0, "throttled_ms": 0.0}
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+
+
+def _retry_after(err, attempt):
+    value = err.headers.get("Retry-After") if err.headers else None
+    try:
+        return min(max(float(value), 0.0), BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.8, 1.2)
+
+
+def _call(fn, batch, bucket, retries):
+    for attempt in range(retries + 1):
+        waited = bucket.acquire()
+        _count(calls=1, in_flight=1, throttled_ms=waited * 1000)
+        try:
+            return fn(batch)
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_STATUSES or attempt == retries:
+                _count(failed=1)
+                raise
+            delay = _retry_after(e, attempt)
+            print(f"[BoardIQ] LLM call got HTTP {e.code}; retrying in {delay:.1f}s")
+            bucket.hold(delay)
+            _count(retries=1)
+        except Exception:
+            _count(failed=1)
+            raise
+        finally:
+            _count(in_flight=-1)
+
+
+def map_batches(fn, batches, width=None, bucket=None, retries=None):
+    """[fn(b) for b in batches], run `width` at a time under the rate limit.
+
+    Results come back in batch order. On the first exception (after retries)
+    batches not yet started are cancelled and the exception is raised once
+    the calls in flight have finished.
+    """
+    return list(imap_batches(fn, batches, width, bucket, retries))
+
+
+def imap_batches(fn, batches, width=None, bucket=None, retries=None):
+    """map_batches as a generator: yields each result, in batch order, as
+    soon as it and every batch before it have finished."""
+    batches = list(batches)
+    width = CONCURRENCY if width is None else width
+    bucket = _bucket if bucket is None else bucket
+    retries = MAX_RETRIES if retries is None else retries
+    _count(batches=len(batches))
+    if width <= 1 or len(batches) <= 1:
+        for b in batches:
+            yield _call(fn, b, bucket, retries)
+        return
+    with ThreadPoolExecutor(max_workers=min(width, len(batches)),
+                            thread_name_prefix="boardiq-llm") as pool:
+        futures = [pool.submit(_call, fn, b, bucket, retries) for b in batches]
+        try:
+            for f in futures:
+                yield f.result()
+        except BaseException:
+            # Includes GeneratorExit when the caller stops iterating early
+            for f in futures:
+                f.cancel()
+            raise
+
+
+def stats():
+    with _stats_lock:
+        out = dict(_stats)
+    out["throttled_ms"] = round(out["throttled_ms"], 1)
+    out.update(concurrency=CONCURRENCY, rate=RATE, burst=BURST)
+    return out
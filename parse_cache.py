@@ -0,0 +1,127 @@
+"""
+BoardIQ — Content-addressed cache for PDF parsing
+==================================================
+Managers often re-upload the same monthly invoice PDF after a failed review.
+Without a cache every re-upload re-extracts every page and pays for every
+LLM batch again. Two kinds of entry, both keyed by content hashes rather than
+file names or upload ids:
+
+  page   page text, keyed by a fingerprint of the page's content stream and
+         fonts plus the pypdf version (pdf_extract.page_fingerprint)
+  llm    a batch's parsed invoices, keyed by the batch's page texts, the
+         model and the prompt version (batch_key)
+
+so an identical PDF is served entirely from the cache, and one with a few
+changed pages re-extracts just those pages and re-sends just the batches
+they fall in.
+
+Entries live in the parse_cache table (PostgreSQL or the local SQLite file),
+shared by all workers. When their total size passes BOARDIQ_PARSE_CACHE_MB
+(default 64) the least recently used are deleted down to 90% of that.
+Without a database a per-process LRU of the same size stands in. Set
+BOARDIQ_PARSE_CACHE_MB=0 to disable.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import db as boardiq_db
+
+MAX_BYTES = int(float(os.environ.get("BOARDIQ_PARSE_CACHE_MB", "64")) * 1024 * 1024)
+EVICT_TO = 0.9
+
+_memory = OrderedDict()        # (kind, key) -> JSON text, when there's no DB
+_memory_bytes = 0
+_lock = threading.Lock()
+_stats = {"page_hits": 0, "page_misses": 0, "llm_hits": 0, "llm_misses": 0, "stored": 0, "evicted": 0}
+
+
+def _count(**deltas):
+    with _lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+def batch_key(page_texts, model, prompt_version):
+    """Key for an LLM batch: its page texts under a given model and prompt."""
+    h = hashlib.sha256(f"{model}\x00{prompt_version}".encode())
+    for text in page_texts:
+        h.update(b"\x00page\x00")
+        h.update(text.encode("utf-8", errors="replace"))
+    return h.hexdigest()
+
+
+def get(kind, keys):
+    """{key: value} for the keys that are cached (and marks them used)."""
+    keys = [k for k in dict.fromkeys(keys) if k]
+    if MAX_BYTES <= 0 or not keys:
+        return {}
+    if boardiq_db.BACKEND is None:
+        hits = {}
+        with _lock:
+            for k in keys:
+                data = _memory.get((kind, k))
+                if data is not None:
+                    _memory.move_to_end((kind, k))
+                    hits[k] = data
+        hits = {k: json.loads(data) for k, data in hits.items()}
+    else:
+        hits = boardiq_db.load_parse_cache(kind, keys, time.time())
+    _count(**{f"{kind}_hits": len(hits), f"{kind}_misses": len(keys) - len(hits)})
+    return hits
+
+
+def put(kind, entries):
+    """Store {key: value} (JSON-serialisable), then evict down to size if over."""
+    global _memory_bytes
+    if MAX_BYTES <= 0 or not entries:
+        return
+    rows = [(k, json.dumps(v)) for k, v in entries.items() if k]
+    _count(stored=len(rows))
+    if boardiq_db.BACKEND is not None:
+        boardiq_db.save_parse_cache(kind, rows, time.time())
+        _count(evicted=boardiq_db.evict_parse_cache(MAX_BYTES, int(MAX_BYTES * EVICT_TO)))
+        return
+    evicted = 0
+    with _lock:
+        for k, data in rows:
+            old = _memory.pop((kind, k), None)
+            if old is not None:
+                _memory_bytes -= len(old)
+            _memory[(kind, k)] = data
+            _memory_bytes += len(data)
+        if _memory_bytes > MAX_BYTES:
+            while _memory and _memory_bytes > MAX_BYTES * EVICT_TO:
+                _key, data = _memory.popitem(last=False)
+                _memory_bytes -= len(data)
+                evicted += 1
+    _count(evicted=evicted)
+
+
+class _Kind:
+    """get/put bound to one kind of entry (what pdf_extract.extract_pages takes)."""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def get(self, keys):
+        return get(self.kind, keys)
+
+    def put(self, entries):
+        put(self.kind, entries)
+
+
+pages = _Kind("page")
+llm = _Kind("llm")
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["memory_entries"] = len(_memory)
+    out["max_mb"] = round(MAX_BYTES / 1024 / 1024, 1)
+    return out
@@ -0,0 +1,230 @@
+"""
+BoardIQ — Parallel PDF text extraction
+=======================================
+pypdf's page.extract_text() is pure Python: CPU-bound and holding the GIL,
+so a 300-page invoice bundle extracted page by page keeps one core busy for
+the whole stretch no matter how many threads the worker has. extract_pages()
+splits large PDFs into contiguous page ranges and extracts them on a pool of
+processes; each shard opens the file itself and returns (page index, text)
+pairs, which are put back in page order.
+
+  BOARDIQ_PDF_WORKERS         processes in the pool (default: CPU count, max 4;
+                              1 = always extract in-process)
+  BOARDIQ_PDF_PARALLEL_PAGES  PDFs with fewer pages stay in-process (default 40),
+                              where pool start-up and re-opening the file per
+                              shard would cost more than they save
+
+The pool is created the first time a large PDF arrives and kept for the life
+of the process. It uses the forkserver start method where available, so the
+pool processes are forked from a clean server process rather than from a
+gunicorn worker holding DB connections and background threads. If the pool
+breaks, extraction falls back to in-process.
+
+Given a cache (parse_cache.pages), pages are first looked up by
+page_fingerprint() and only the misses are extracted, so a re-uploaded PDF
+costs a hash of each page's content stream instead of a text extraction.
+"""
+
+import os
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+WORKERS = int(os.environ.get("BOARDIQ_PDF_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PARALLEL_PAGES = int(os.environ.get("BOARDIQ_PDF_PARALLEL_PAGES", "40"))
+SHARDS_PER_WORKER = 2      # >1 so one slow range doesn't leave the other workers idle
+MIN_SHARD_PAGES = 10
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"documents": 0, "pages": 0, "cached_pages": 0, "parallel_documents": 0, "shards": 0,
+          "fallbacks": 0}
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+def _open(path):
+    from pypdf import PdfReader
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return PdfReader(path, strict=False)
+
+
+def _page_text(page):
+    try:
+        text = page.extract_text() or ""
+    except Exception:
+        return ""
+    # Ensure text is valid UTF-8
+    return text.encode("utf-8", errors="replace").decode("utf-8", errors="replace")
+
+
+def _extract_indices(path, indices):
+    """Pool task: [(index, text)] for the given pages of the PDF at path."""
+    reader = _open(path)
+    return [(i, _page_text(reader.pages[i])) for i in indices]
+
+
+_FONT_FILES = ("/FontFile", "/FontFile2", "/FontFile3")
+
+
+def _canonical(obj, h, seen, depth=0):
+    """Feed a stable serialisation of a PDF object into hash h.
+
+    Indirect references are followed (object ids differ between files),
+    embedded font programs and images are skipped (extraction never reads
+    them) and other streams contribute their decoded data."""
+    if depth > 12:
+        return
+    if hasattr(obj, "get_object"):
+        obj = obj.get_object()
+    ref = getattr(obj, "indirect_reference", None)
+    if ref is not None:
+        if (ref.idnum, ref.generation) in seen:
+            h.update(b"<seen>")
+            return
+        seen.add((ref.idnum, ref.generation))
+    if isinstance(obj, dict):
+        if obj.get("/Subtype") == "/Image":
+            h.update(b"<image>")
+            return
+        for k in sorted(obj):
+            if k in _FONT_FILES:
+                continue
+            h.update(str(k).encode())
+            _canonical(obj[k], h, seen, depth + 1)
+        if hasattr(obj, "get_data"):
+            h.update(obj.get_data())
+    elif isinstance(obj, list):
+        h.update(b"[")
+        for item in obj:
+            _canonical(item, h, seen, depth + 1)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+
+
+def page_fingerprint(page):
+    """Content hash of everything extract_text() reads for a page: its
+    content streams, fonts, form XObjects and rotation, plus the pypdf
+    version. None if the page can't be read."""
+    import pypdf
+    try:
+        h = hashlib.sha256(f"pypdf {pypdf.__version__}\x00".encode())
+        contents = page.get_contents()
+        h.update(contents.get_data() if contents is not None else b"")
+        resources = page["/Resources"] if "/Resources" in page else {}
+        seen = set()
+        for name in ("/Font", "/XObject"):
+            h.update(name.encode())
+            if name in resources:
+                _canonical(resources[name], h, seen)
+        h.update(repr(page.get("/Rotate", 0)).encode())
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            if ctx.get_start_method() == "forkserver":
+                ctx.set_forkserver_preload(["pypdf", "pdf_extract"])
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=ctx)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_reset_pool)
+
+
+def shards(indices, workers=None):
+    """Split page indices into contiguous runs, about SHARDS_PER_WORKER per worker."""
+    workers = WORKERS if workers is None else workers
+    size = max(MIN_SHARD_PAGES, -(-len(indices) // max(workers * SHARDS_PER_WORKER, 1)))
+    return [indices[start:start + size] for start in range(0, len(indices), size)]
+
+
+def extract_pages(path, progress=None, threshold=None, cache=None):
+    """Text of every page of the PDF at path, in page order.
+
+    A page whose text can't be extracted comes back as "". Errors opening
+    the file propagate. progress(stage, done, total), if given, is told
+    about pages extracted as "extract" (see jobs.py). cache, if given, is
+    an object with get(keys) -> {key: text} and put({key: text}).
+    """
+    threshold = PARALLEL_PAGES if threshold is None else threshold
+    reader = _open(path)
+    n = len(reader.pages)
+    pages = [None] * n
+    keys = [None] * n
+    if cache is not None:
+        keys = [page_fingerprint(page) for page in reader.pages]
+        hits = cache.get(keys)
+        for i, key in enumerate(keys):
+            if key in hits:
+                pages[i] = hits[key]
+    missing = [i for i in range(n) if pages[i] is None]
+    _count(documents=1, pages=n, cached_pages=n - len(missing))
+    if progress:
+        progress("extract", n - len(missing), n)
+
+    extracted = None
+    if WORKERS > 1 and len(missing) >= threshold:
+        try:
+            extracted = _extract_parallel(path, missing, n, progress)
+        except Exception as e:
+            print(f"[BoardIQ] Parallel PDF extraction failed ({e}); extracting in-process")
+            _count(fallbacks=1)
+            _reset_pool()
+    if extracted is None:
+        extracted = []
+        for i in missing:
+            extracted.append((i, _page_text(reader.pages[i])))
+            if progress:
+                progress("extract")
+    for i, text in extracted:
+        pages[i] = text
+    if cache is not None:
+        cache.put({keys[i]: pages[i] for i in missing if keys[i]})
+    return pages
+
+
+def _extract_parallel(path, missing, n, progress):
+    runs = shards(missing)
+    _count(parallel_documents=1, shards=len(runs))
+    extracted = []
+    done = n - len(missing)
+    futures = [_executor().submit(_extract_indices, path, run) for run in runs]
+    for future in as_completed(futures):
+        results = future.result()
+        extracted.extend(results)
+        done += len(results)
+        if progress:
+            progress("extract", done, n)
+    return extracted
+
+
+def stats():
+    with _stats_lock:
+        out = dict(_stats)
+    out.update(workers=WORKERS, parallel_pages=PARALLEL_PAGES, pool_started=_pool is not None)
+    return out
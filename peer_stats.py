@@ -0,0 +1,211 @@
+"""
+BoardIQ — Network peer statistics
+==================================
+Empirical per-unit spend distributions for the benchmarking engine, built
+from every building's vendor_data instead of the seeded BASELINE_BENCHMARKS.
+
+Each peer group — (category, size bucket, cluster, era, type) — holds a
+QuantileSketch: a log-bucketed histogram (the DDSketch scheme) whose
+quantiles are within RELATIVE_ACCURACY of the true value. Sketches are
+mergeable (add the bucket counts) and support removal, so a building's
+contribution is swapped in place when an invoice commit or Yardi import
+changes its vendor_data; nothing is recomputed from scratch.
+
+A peer group with fewer than BOARDIQ_MIN_PEERS buildings (default 5) rolls
+up by merging its siblings: first across building types, then eras, then
+clusters. If even the (category, size) roll-up is too thin, quantiles()
+returns None and the engine falls back to the seeded benchmarks. Merged
+roll-ups and quantiles are cached until a member building changes, so
+repeat queries are dictionary lookups. version() exposes a per-size-bucket
+change counter so callers can cache results derived from quantiles().
+"""
+
+import os
+import math
+import threading
+
+RELATIVE_ACCURACY = 0.01
+MIN_PEERS = int(os.environ.get("BOARDIQ_MIN_PEERS", "5"))
+QUANTILES = (("p25", 0.25), ("p50", 0.50), ("p75", 0.75), ("p90", 0.90))
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+# Roll-up levels: which of (size, cluster, era, type) a level keeps
+_LEVELS = ("exact", "any_type", "any_era", "any_cluster")
+_LEVEL_KEEP = (4, 3, 2, 1)
+
+
+class QuantileSketch:
+    """Mergeable log-bucket histogram of positive values."""
+
+    __slots__ = ("bins", "count")
+
+    def __init__(self):
+        self.bins = {}      # bucket index -> count
+        self.count = 0
+
+    @staticmethod
+    def _index(value):
+        return math.ceil(math.log(value) / _LOG_GAMMA)
+
+    def add(self, value, n=1):
+        i = self._index(value)
+        c = self.bins.get(i, 0) + n
+        if c:
+            self.bins[i] = c
+        else:
+            del self.bins[i]
+        self.count += n
+
+    def remove(self, value):
+        self.add(value, -1)
+
+    def merge(self, other):
+        for i, c in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + c
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0–1), or None if empty."""
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if seen > rank:
+                # Bucket i covers (gamma^(i-1), gamma^i]; this midpoint is
+                # within RELATIVE_ACCURACY of anything in it
+                return 2 * _GAMMA ** i / (_GAMMA + 1)
+        return 2 * _GAMMA ** max(self.bins) / (_GAMMA + 1)
+
+
+def _rollup(group, level):
+    """Group key with the dimensions dropped at `level` replaced by None."""
+    keep = _LEVEL_KEEP[level]
+    return tuple(group[:keep]) + (None,) * (4 - keep)
+
+
+class PeerStatsStore:
+    """Per-worker peer distributions, updated one building at a time."""
+
+    def __init__(self, min_peers=MIN_PEERS):
+        self.min_peers = min_peers
+        self._lock = threading.Lock()
+        self._sketches = {}     # (category, group) -> QuantileSketch, exact groups only
+        self._children = {}     # (category, rolled-up group) -> set of exact groups
+        self._members = {}      # group -> set of building ids with any data
+        self._contrib = {}      # building id -> (group, {category: value})
+        self._cache = {}        # (category, level, rolled-up group) -> quantiles or None
+        self._versions = {}     # size bucket -> changes to any group in it
+        self.updates = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # ── Writes ──
+
+    def update_building(self, building_id, group, values):
+        """Replace a building's contribution.
+
+        group  : (size bucket, cluster, era, type)
+        values : {category: per-unit annual spend}; non-positive values are ignored
+        """
+        group = tuple(group)
+        values = {c: float(v) for c, v in values.items() if v is not None and v > 0}
+        with self._lock:
+            if self._contrib.get(building_id) == (group, values):
+                return
+            self._remove(building_id)
+            if not values:
+                return
+            for category, value in values.items():
+                sketch = self._sketches.get((category, group))
+                if sketch is None:
+                    sketch = self._sketches[(category, group)] = QuantileSketch()
+                    for level in range(1, len(_LEVELS)):
+                        self._children.setdefault((category, _rollup(group, level)), set()).add(group)
+                sketch.add(value)
+                self._invalidate(category, group)
+            self._versions[group[0]] = self._versions.get(group[0], 0) + 1
+            self._members.setdefault(group, set()).add(building_id)
+            self._contrib[building_id] = (group, values)
+            self.updates += 1
+
+    def remove_building(self, building_id):
+        with self._lock:
+            self._remove(building_id)
+
+    def _remove(self, building_id):
+        # Called with _lock held
+        old = self._contrib.pop(building_id, None)
+        if old is None:
+            return
+        group, values = old
+        for category, value in values.items():
+            self._sketches[(category, group)].remove(value)
+            self._invalidate(category, group)
+        self._members[group].discard(building_id)
+        self._versions[group[0]] = self._versions.get(group[0], 0) + 1
+
+    def _invalidate(self, category, group):
+        for level in range(len(_LEVELS)):
+            self._cache.pop((category, level, _rollup(group, level)), None)
+
+    # ── Reads ──
+
+    def quantiles(self, category, group):
+        """{"p25", "p50", "p75", "p90", "n", "level"} for the narrowest peer group
+        with at least min_peers buildings, or None if there is none."""
+        group = tuple(group)
+        with self._lock:
+            for level in range(len(_LEVELS)):
+                key = (category, level, _rollup(group, level))
+                if key in self._cache:
+                    self.cache_hits += 1
+                    result = self._cache[key]
+                else:
+                    self.cache_misses += 1
+                    result = self._cache[key] = self._compute(category, group, level)
+                if result is not None:
+                    return result
+        return None
+
+    def _compute(self, category, group, level):
+        # Called with _lock held
+        if level == 0:
+            sketch = self._sketches.get((category, group))
+        else:
+            sketch = QuantileSketch()
+            for child in self._children.get((category, _rollup(group, level)), ()):
+                sketch.merge(self._sketches[(category, child)])
+        if sketch is None or sketch.count < self.min_peers:
+            return None
+        result = {name: sketch.quantile(q) for name, q in QUANTILES}
+        result["n"] = sketch.count
+        result["level"] = _LEVELS[level]
+        return result
+
+    def version(self, group):
+        """Change counter for everything quantiles(…, group) can draw on: the
+        widest roll-up keeps only the size bucket, so any change in it counts."""
+        with self._lock:
+            return self._versions.get(group[0], 0)
+
+    def peer_count(self, group):
+        """Buildings with vendor data in exactly this (size, cluster, era, type) group."""
+        with self._lock:
+            return len(self._members.get(tuple(group), ()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buildings": len(self._contrib),
+                "groups": sum(1 for m in self._members.values() if m),
+                "sketches": len(self._sketches),
+                "min_peers": self.min_peers,
+                "updates": self.updates,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            }
@@ -0,0 +1,139 @@
+"""
+BoardIQ — Fingerprinted static assets
+======================================
+The page templates in app.py carry their CSS and JS inline, so every page
+view re-downloads a few hundred KB that only changes on deploy. At boot,
+externalize() moves each inline <style>/<script> block that contains no
+Jinja markup into a registry keyed by a hash of its content, and replaces the
+block with a <link>/<script src> tag pointing at /assets/<name>.<hash>.<ext>.
+
+Because the file name changes whenever the content does, app.py serves these
+with a one-year immutable Cache-Control header. The gzip and brotli variants
+(brotli only if the package is installed) are compressed once per process at
+maximum quality: in the background after boot (precompress()), or on first
+request if that hasn't finished yet.
+
+Every worker builds the same registry from the same template strings, so any
+worker can serve an asset URL rendered by another.
+
+Blocks smaller than BOARDIQ_ASSET_MIN_BYTES (default 1024) stay inline; an
+extra request costs more than they do.
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+URL_PREFIX = "/assets/"
+MIN_BYTES = int(os.environ.get("BOARDIQ_ASSET_MIN_BYTES", "1024"))
+
+# Only attribute-less blocks: <script src=...> and typed blocks (JSON data,
+# templates) are left alone
+_BLOCK_RE = re.compile(r"<(style|script)>(.*?)</\1>", re.S)
+_JINJA_MARKERS = ("{{", "{%", "{#")
+
+_KINDS = {
+    "style": ("css", "text/css; charset=utf-8", '<link rel="stylesheet" href="{url}">'),
+    "script": ("js", "application/javascript; charset=utf-8", '<script src="{url}"></script>'),
+}
+
+
+class Asset:
+    """One content-addressed file; compressed variants are built on first use."""
+
+    __slots__ = ("filename", "mimetype", "body", "digest", "_variants", "_lock")
+
+    def __init__(self, filename, mimetype, body, digest):
+        self.filename = filename
+        self.mimetype = mimetype
+        self.body = body
+        self.digest = digest
+        self._variants = {"identity": body}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        """Bytes for `encoding` ("br", "gzip" or "identity")."""
+        data = self._variants.get(encoding)
+        if data is not None:
+            return data
+        with self._lock:
+            if encoding not in self._variants:
+                if encoding == "br":
+                    self._variants["br"] = brotli.compress(self.body, quality=11)
+                elif encoding == "gzip":
+                    self._variants["gzip"] = gzip.compress(self.body, 9, mtime=0)
+                else:
+                    raise ValueError(f"unsupported encoding {encoding!r}")
+            return self._variants[encoding]
+
+    def encodings(self):
+        """Encodings this asset can be served in, best first."""
+        return (("br",) if brotli else ()) + ("gzip", "identity")
+
+
+_lock = threading.Lock()
+_assets = {}    # filename -> Asset
+_tags = {}      # (kind, body) -> replacement tag
+
+
+def register(kind, body, name="page"):
+    """Add one CSS/JS body to the registry and return its URL."""
+    ext, mimetype, _ = _KINDS[kind]
+    data = body.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    filename = f"{name}.{digest}.{ext}"
+    with _lock:
+        if filename not in _assets:
+            _assets[filename] = Asset(filename, mimetype, data, digest)
+    return URL_PREFIX + filename
+
+
+def externalize(html, name="page", register_new=True):
+    """Return html with its static inline <style>/<script> blocks replaced by asset tags.
+
+    Pages assembled per request pass register_new=False: only blocks already
+    registered at boot are swapped, so per-request data never becomes an asset.
+    """
+    def _replace(m):
+        kind, body = m.group(1), m.group(2)
+        tag = _tags.get((kind, body))
+        if tag is not None:
+            return tag
+        if (not register_new or len(body) < MIN_BYTES
+                or any(marker in body for marker in _JINJA_MARKERS)):
+            return m.group(0)
+        tag = _KINDS[kind][2].format(url=register(kind, body, name))
+        _tags[(kind, body)] = tag
+        return tag
+    return _BLOCK_RE.sub(_replace, html)
+
+
+def precompress():
+    """Build every compressed variant now, so no request waits on brotli-11."""
+    with _lock:
+        assets = list(_assets.values())
+    for asset in assets:
+        for encoding in asset.encodings():
+            asset.variant(encoding)
+
+
+def get(filename):
+    """The registered Asset for a /assets/ file name, or None."""
+    return _assets.get(filename)
+
+
+def stats():
+    with _lock:
+        assets = list(_assets.values())
+    return {
+        "assets": len(assets),
+        "bytes": sum(len(a.body) for a in assets),
+        "brotli": brotli is not None,
+    }
@@ -0,0 +1,248 @@
+"""
+BoardIQ — Write-behind persistence queue
+=========================================
+Request handlers enqueue persistence work here instead of blocking on
+PostgreSQL round-trips and JSON file rewrites. A single background thread
+drains the queue every BOARDIQ_WRITE_BEHIND_INTERVAL seconds (or sooner when
+it is half full) and once more on interpreter shutdown.
+
+Jobs are keyed: submitting a job under a key that is already queued replaces
+the queued one, so ten edits to the same building or contract between
+flushes cost one write. Jobs should read current in-memory state when they
+run rather than capture it at submit time.
+
+Callers that need durable acknowledgement call flush(), which blocks until
+everything submitted before the call has been written. A job signals a failed
+write by raising; it is retried up to MAX_ATTEMPTS times and then dropped,
+and flush() returns False if any job it waited on was dropped. A job that
+replaces a queued one keeps the older job's place in line, so flush() waits
+for the write that supersedes the one it was waiting on.
+
+Set BOARDIQ_WRITE_BEHIND=0 to run every job inline (the old behaviour).
+"""
+
+import os
+import time
+import atexit
+import threading
+import traceback
+from collections import OrderedDict, deque
+
+ENABLED = os.environ.get("BOARDIQ_WRITE_BEHIND", "1") != "0"
+FLUSH_INTERVAL = float(os.environ.get("BOARDIQ_WRITE_BEHIND_INTERVAL", "0.5"))
+MAX_PENDING = int(os.environ.get("BOARDIQ_WRITE_BEHIND_MAX", "1000"))
+MAX_ATTEMPTS = 3
+DROPPED_HISTORY = 1000
+
+
+class WriteBehindQueue:
+    """Bounded, coalescing queue of persistence jobs with one flush thread."""
+
+    def __init__(self, interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, enabled=ENABLED):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._pending = OrderedDict()   # key -> [seq, fn, args, attempts]
+        self._cond = threading.Condition()
+        self._seq = 0            # last sequence number handed out
+        self._done_seq = 0       # every job with seq <= this has been run or dropped
+        self._dropped = deque(maxlen=DROPPED_HISTORY)   # seqs of jobs given up on
+        self._local = threading.local()                 # .failed: inline failures since flush()
+        self._thread = None
+        self._stopped = False
+        # Metrics
+        self.submitted = 0
+        self.coalesced = 0
+        self.inline = 0
+        self.jobs_run = 0
+        self.failed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.last_flush_ms = 0.0
+        self.max_depth = 0
+
+    # ── Producer side ──
+
+    def submit(self, key, fn, *args):
+        """Queue fn(*args) under key, replacing any queued job with the same key."""
+        if not self.enabled or self._stopped:
+            self._run_inline(fn, args)
+            return
+        with self._cond:
+            self.submitted += 1
+            seq = None
+            if key in self._pending:
+                self.coalesced += 1
+                seq = self._pending.pop(key)[0]
+            elif len(self._pending) >= self.max_pending:
+                # Full: write on the caller's thread rather than drop the job
+                # or let the queue grow without bound
+                self.inline += 1
+                key = None
+            if key is not None:
+                self._seq += 1
+                self._pending[key] = [seq or self._seq, fn, args, 0]
+                self.max_depth = max(self.max_depth, len(self._pending))
+                self._ensure_thread()
+                if len(self._pending) * 2 >= self.max_pending:
+                    self._cond.notify_all()
+                return
+        self._run_inline(fn, args)
+
+    def flush(self, timeout=None):
+        """Block until every job submitted before this call has run.
+
+        Returns False on timeout, if one of those jobs was dropped after
+        failing, or if a job run inline on this thread failed since the last
+        flush().
+        """
+        inline_ok = not getattr(self._local, "failed", 0)
+        self._local.failed = 0
+        if not self.enabled:
+            return inline_ok
+        with self._cond:
+            start = self._done_seq
+            target = self._seq
+            worker_alive = self._thread is not None and self._thread.is_alive() and not self._stopped
+        if not worker_alive:
+            self._drain()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._done_seq < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return inline_ok and not any(start < seq <= target for seq in self._dropped)
+
+    def stop(self, timeout=10.0):
+        """Flush what's queued and stop the worker; later submits run inline."""
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "depth": len(self._pending),
+                "max_depth": self.max_depth,
+                "max_pending": self.max_pending,
+                "interval_s": self.interval,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "inline": self.inline,
+                "jobs_run": self.jobs_run,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "avg_flush_ms": round(self.flush_ms_total / self.flushes, 2) if self.flushes else 0.0,
+                "max_flush_ms": round(self.flush_ms_max, 2),
+            }
+
+    # ── Consumer side ──
+
+    def _ensure_thread(self):
+        # Called with _cond held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="boardiq-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                # Sleep one interval so repeated writes coalesce; flush() and a
+                # half-full queue wake us early
+                self._cond.wait(self.interval)
+            self._drain()
+
+    def _drain(self):
+        """Run everything queued right now, in submission order."""
+        with self._cond:
+            if not self._pending:
+                return
+            batch = list(self._pending.items())
+            self._pending.clear()
+            batch_seq = self._seq
+        started = time.perf_counter()
+        retry, dropped = [], []
+        for key, (seq, fn, args, attempts) in batch:
+            try:
+                fn(*args)
+            except Exception as e:
+                attempts += 1
+                print(f"[BoardIQ WriteBehind] Job {key!r} failed (attempt {attempts}): {e}")
+                if attempts < MAX_ATTEMPTS:
+                    retry.append((key, [seq, fn, args, attempts]))
+                else:
+                    traceback.print_exc()
+                    dropped.append(seq)
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._cond:
+            self.jobs_run += len(batch) - len(retry) - len(dropped)
+            self.failed += len(retry) + len(dropped)
+            self.dropped += len(dropped)
+            self._dropped.extend(dropped)
+            for key, job in retry:
+                # A newer submit under the same key supersedes the failed job
+                # but inherits its place, so the watermark still waits for it
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = job
+                else:
+                    newer[0] = min(newer[0], job[0])
+            self.flushes += 1
+            self.last_flush_ms = elapsed
+            self.flush_ms_total += elapsed
+            self.flush_ms_max = max(self.flush_ms_max, elapsed)
+            # Jobs newer than this batch have higher seqs; only retries can
+            # hold the watermark back
+            waiting = [job[0] for job in self._pending.values() if job[0] <= batch_seq]
+            self._done_seq = max(self._done_seq, (min(waiting) - 1) if waiting else batch_seq)
+            self._cond.notify_all()
+
+    def _run_inline(self, fn, args):
+        started = time.perf_counter()
+        try:
+            fn(*args)
+            failed = 0
+        except Exception as e:
+            print(f"[BoardIQ WriteBehind] Inline job failed: {e}")
+            traceback.print_exc()
+            failed = 1
+        elapsed = (time.perf_counter() - started) * 1000
+        self._local.failed = getattr(self._local, "failed", 0) + failed
+        with self._cond:
+            self.jobs_run += 1 - failed
+            self.failed += failed
+            self.dropped += failed
+            self.last_flush_ms = elapsed
+
+
+_queue = WriteBehindQueue()
+atexit.register(_queue.stop)
+
+
+def submit(key, fn, *args):
+    """Queue a persistence job on the shared queue (see WriteBehindQueue.submit)."""
+    _queue.submit(key, fn, *args)
+
+
+def flush(timeout=None):
+    """Durable acknowledgement: wait until all earlier writes have been persisted."""
+    return _queue.flush(timeout)
+
+
+def stats():
+    return _queue.stats()
@@ -20,6 +20,8 @@ import re
 from collections import defaultdict
 import openpyxl
 
+import classifier
+
 
 # Account Name keyword → BoardIQ category.
 # Order matters: the first keyword substring that matches wins, so more
@@ -68,6 +70,8 @@ ACCOUNT_NAME_KEYWORDS = [
     ("legal", "LEGAL"),
 ]
 
+_ACCOUNT_RULES = classifier.KeywordRules((cat, [kw]) for kw, cat in ACCOUNT_NAME_KEYWORDS)
+
 
 # Legacy GL-code fallback, kept as a secondary signal when the account
 # name doesn't match any keyword. Values here come from Century
@@ -93,10 +97,9 @@ def _classify(account_name, gl_code):
     Prefers keyword match on the account name (chart-of-accounts agnostic).
     Falls back to a legacy GL-code mapping, then to "OTHER".
     """
-    name = (account_name or "").lower()
-    for kw, cat in ACCOUNT_NAME_KEYWORDS:
-        if kw in name:
-            return cat
+    cat = _ACCOUNT_RULES.first(account_name)
+    if cat:
+        return cat
     if gl_code and gl_code in GL_CATEGORY_FALLBACK:
         return GL_CATEGORY_FALLBACK[gl_code]
     return "OTHER"